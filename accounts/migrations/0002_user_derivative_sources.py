@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='derivative_sources',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='فایل\u200cهای دارای پیش\u200cنمایش'),
+        ),
+    ]
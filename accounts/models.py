@@ -44,6 +44,14 @@ class User(AbstractUser):
         verbose_name='تایید شده'
     )
     
+    # فایل‌هایی از این رکورد که تصاویر کوچکشان ساخته شده است (files.derivatives)
+    derivative_sources = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name='فایل‌های دارای پیش‌نمایش'
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='تاریخ ایجاد'
@@ -1,3 +1,72 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from files.derivatives import derivative, derivative_name, process_pending_tasks
+from files.models import DerivativeTask
+
+User = get_user_model()
+
+
+def image_upload(name, size, color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ProfileImageDerivativeTests(TestCase):
+    """تصاویر کوچک پروفایل در صف ساخته و آماده بودنشان روی کاربر ثبت می‌شود"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('user', password='pass', user_type='student')
+
+    def upload(self, name, color='red'):
+        self.user.profile_image = image_upload(name, (300, 200), color)
+        self.user.save()
+        return self.user.profile_image.name
+
+    def test_derivatives_are_generated_in_worker(self):
+        name = self.upload('avatar.png')
+        self.assertTrue(DerivativeTask.objects.filter(name=name, kind='image').exists())
+        self.assertIsNone(derivative(self.user.profile_image, 'avatar'))
+
+        self.assertEqual(process_pending_tasks(), 1)
+        for size, dimensions in (('avatar', (96, 96)), ('profile', (240, 240))):
+            for extension in ('jpg', 'webp'):
+                with default_storage.open(derivative_name(name, size, extension)) as file:
+                    self.assertEqual(Image.open(file).size, dimensions)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.derivative_sources, [name])
+        # قالب‌ها ذخیره‌ساز را بررسی نمی‌کنند
+        with mock.patch.object(default_storage, 'exists') as exists, self.assertNumQueries(0):
+            avatar = derivative(user.profile_image, 'avatar')
+            self.assertIsNone(derivative(user.profile_image, 'thumb'))
+        exists.assert_not_called()
+        self.assertEqual(avatar.url, default_storage.url(derivative_name(name, 'avatar', 'jpg')))
+        self.assertEqual(avatar.webp_url, default_storage.url(derivative_name(name, 'avatar', 'webp')))
+
+    def test_replaced_image_waits_for_new_derivatives(self):
+        old_name = self.upload('avatar.png')
+        process_pending_tasks()
+
+        self.user.refresh_from_db()
+        new_name = self.upload('avatar.png', color='blue')
+        self.assertNotEqual(new_name, old_name)
+        self.assertIsNone(derivative(self.user.profile_image, 'avatar'))
+
+        process_pending_tasks()
+        self.assertEqual(User.objects.get(pk=self.user.pk).derivative_sources, [new_name])
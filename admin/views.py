@@ -3,7 +3,8 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.http import JsonResponse
 from django.core.paginator import Paginator
 from students.models import StudentProfile
-from notifications.models import Notification
+from notifications.delivery import notify
+from matching.models import Match
 from django.contrib import messages
 import json
 
@@ -73,7 +74,7 @@ def approve_verification(request, profile_id):
         profile.save()
         
         # ارسال نوتیفیکیشن به دانشجو
-        Notification.objects.create(
+        notify(
             user=profile.user,
             title='احراز هویت تایید شد',
             message='تبریک! احراز هویت دانشجویی شما تایید شد.',
@@ -99,7 +100,7 @@ def reject_verification(request, profile_id):
         profile.save()
         
         # ارسال نوتیفیکیشن به دانشجو
-        Notification.objects.create(
+        notify(
             user=profile.user,
             title='احراز هویت رد شد',
             message=f'متاسفانه احراز هویت شما رد شد. دلیل: {reason}',
@@ -130,7 +131,7 @@ def dashboard(request):
     total_students = StudentProfile.objects.count()
     total_companies = StudentProfile.objects.filter(user__user_type='company').count()
     pending_verifications = StudentProfile.objects.filter(verification_status='pending').count()
-    total_matches = 0  # اینجا می‌توانید آمار مچینگ را اضافه کنید
+    total_matches = Match.objects.count()
     
     # آمار اخیر
     recent_verifications = StudentProfile.objects.filter(
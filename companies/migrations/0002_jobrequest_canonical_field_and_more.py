@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('matching', '0005_fieldgroup_fieldofstudy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobrequest',
+            name='canonical_field',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='matching.fieldofstudy', verbose_name='رشته تحصیلی نرمال شده'),
+        ),
+        migrations.AddField(
+            model_name='jobrequest',
+            name='field_group_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='گروه\u200cهای رشته تحصیلی'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:21
+
+import files.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_jobrequest_canonical_field_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='companyprofile',
+            name='verification_document',
+            field=models.FileField(blank=True, null=True, storage=files.storage.document_storage, upload_to='company_verification/', verbose_name='مدرک تایید شرکت'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_alter_companyprofile_verification_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyprofile',
+            name='derivative_sources',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='فایل\u200cهای دارای پیش\u200cنمایش'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
+from files.storage import document_storage
+
 User = get_user_model()
 
 
@@ -88,11 +90,20 @@ class CompanyProfile(models.Model):
     
     verification_document = models.FileField(
         upload_to='company_verification/',
+        storage=document_storage,
         blank=True,
         null=True,
         verbose_name='مدرک تایید شرکت'
     )
     
+    # فایل‌هایی از این رکورد که تصاویر کوچکشان ساخته شده است (files.derivatives)
+    derivative_sources = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name='فایل‌های دارای پیش‌نمایش'
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='تاریخ ایجاد'
@@ -144,6 +155,23 @@ class JobRequest(models.Model):
         verbose_name='رشته تحصیلی مورد نیاز'
     )
     
+    # رشته تحصیلی نرمال شده؛ هنگام ذخیره پر می‌شود
+    canonical_field = models.ForeignKey(
+        'matching.FieldOfStudy',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name='رشته تحصیلی نرمال شده'
+    )
+    
+    field_group_mask = models.BigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='گروه‌های رشته تحصیلی'
+    )
+    
     job_type = models.CharField(
         max_length=20,
         choices=JOB_TYPE_CHOICES,
@@ -74,7 +74,9 @@ def candidates(request):
     """لیست کاندیداها"""
     # در اینجا کاندیداهای مچ شده نمایش داده می‌شوند
     from matching.models import Match
-    matches = Match.objects.filter(company=request.user, status='pending')
+    matches = Match.objects.filter(company=request.user, status='pending').select_related(
+        'student__student_profile', 'job_request'
+    ).order_by('-match_score')
     
     return render(request, 'companies/candidates.html', {'matches': matches})
 
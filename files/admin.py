@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import Blob, DerivativeTask
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'last_uploaded_at', 'created_at')
+    list_filter = ('ref_count',)
+    search_fields = ('checksum',)
+    readonly_fields = ('checksum', 'name', 'size', 'ref_count', 'created_at', 'last_uploaded_at')
+
+
+@admin.register(DerivativeTask)
+class DerivativeTaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'storage', 'kind', 'requested_at')
+    list_filter = ('storage', 'kind')
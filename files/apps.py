@@ -0,0 +1,17 @@
+import os
+
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class FilesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'files'
+
+    def ready(self):
+        # پوشه فایل‌های موقت آپلود ممکن است هنوز وجود نداشته باشد
+        if settings.FILE_UPLOAD_TEMP_DIR:
+            os.makedirs(settings.FILE_UPLOAD_TEMP_DIR, exist_ok=True)
+
+        from .signals import connect_signals
+        connect_signals()
@@ -0,0 +1,288 @@
+"""
+تصاویر کوچک و پیش‌نمایش فایل‌ها
+
+برای تصویر پروفایل کاربران و مدارک احراز هویت نسخه‌های کوچک‌تر در چند
+اندازه و در دو قالب WebP و JPEG در derivatives/<مسیر فایل>/<اندازه>.<قالب>
+ذخیره می‌شوند؛ برای مدارک PDF صفحه اول پیش‌نمایش می‌شود. PyMuPDF (بسته
+اختیاری pymupdf) فقط برای PDF لازم است؛ بدون آن پیش‌نمایش PDF ساخته نمی‌شود،
+یک هشدار در لاگ ثبت می‌شود و قالب‌ها آیکون مدرک را نشان می‌دهند.
+
+ذخیره فایل تازه فقط یک DerivativeTask ثبت می‌کند و تصاویر خارج از چرخه
+درخواست/پاسخ توسط دستور run_derivative_worker ساخته می‌شوند؛ تا آن زمان
+قالب‌ها فایل اصلی یا آیکون را نشان می‌دهند. نام مشتق‌ها از نام فایل
+اصلی می‌آید، پس فایل تازه مشتق‌های تازه دارد و مشتق‌های فایل قبلی هنگام
+تغییر یا حذف آن (و برای محتوای مشترک blobs در collect_blobs) پاک می‌شوند.
+
+نام فایل‌هایی که مشتق‌هایشان ساخته شده در فیلد derivative_sources همان
+رکورد ذخیره می‌شود تا قالب‌ها بدون مراجعه به ذخیره‌ساز بدانند مشتق آماده است.
+"""
+import io
+import logging
+from collections import namedtuple
+from functools import cache, reduce
+from operator import or_
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, storages
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import DerivativeTask
+from .storage import blob_checksum
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_PREFIX = 'derivatives/'
+
+# نام اندازه: (عرض، ارتفاع، برش مربعی)
+SIZES = {
+    'avatar': (96, 96, True),
+    'profile': (240, 240, True),
+    'thumb': (160, 160, False),
+    'preview': (1024, 1024, False),
+}
+
+KIND_SIZES = {
+    'image': ['avatar', 'profile'],
+    'document': ['thumb', 'preview'],
+}
+
+# WebP اول نوشته می‌شود؛ وجود JPEG یعنی هر دو قالب آماده‌اند
+FORMATS = {
+    'webp': 'WEBP',
+    'jpg': 'JPEG',
+}
+
+QUALITY = 80
+
+PDF_DPI = 150
+
+DERIVATIVE_FIELDS = {
+    'accounts.User': {'profile_image': 'image'},
+    'students.StudentProfile': {
+        'student_id_document': 'document',
+        'national_id_document': 'document',
+        'verification_document': 'document',
+    },
+    'companies.CompanyProfile': {'verification_document': 'document'},
+}
+
+Derivative = namedtuple('Derivative', ['url', 'webp_url'])
+
+
+def derivative_name(name, size, extension):
+    return f'{DERIVATIVE_PREFIX}{name}/{size}.{extension}'
+
+
+def derivative(file, size):
+    """
+    نشانی‌های مشتق یک فایل در اندازه size
+
+    Returns:
+        Derivative: نشانی JPEG و WebP؛ None اگر فایل خالی باشد یا مشتق هنوز ساخته نشده باشد
+    """
+    if not file:
+        return None
+    kind = DERIVATIVE_FIELDS.get(file.instance._meta.label, {}).get(file.field.name)
+    if size not in KIND_SIZES.get(kind, ()) or file.name not in file.instance.derivative_sources:
+        return None
+    return Derivative(
+        default_storage.url(derivative_name(file.name, size, 'jpg')),
+        default_storage.url(derivative_name(file.name, size, 'webp')),
+    )
+
+
+def mark_ready(name):
+    """
+    ثبت آماده بودن مشتق‌های name در derivative_sources رکوردهایی که به آن اشاره می‌کنند
+
+    نام فایل‌هایی که دیگر در فیلدهای رکورد نیستند هم‌زمان حذف می‌شوند.
+    """
+    for model, fields in derivative_models():
+        records = model.objects.filter(reduce(or_, (Q(**{field: name}) for field in fields)))
+        for record in records.only('pk', 'derivative_sources', *fields):
+            current = {getattr(record, field).name for field in fields}
+            sources = [source for source in record.derivative_sources if source in current and source != name]
+            sources.append(name)
+            if sources != record.derivative_sources:
+                # update تا سیگنال‌های ذخیره (و auto_now) اجرا نشوند
+                model.objects.filter(pk=record.pk).update(derivative_sources=sources)
+
+
+def storage_alias(storage):
+    for alias in settings.STORAGES:
+        if storages[alias] is storage:
+            return alias
+    return 'default'
+
+
+def derivative_models():
+    """[(مدل، {فیلد: نوع})]"""
+    return [(apps.get_model(label), fields) for label, fields in DERIVATIVE_FIELDS.items()]
+
+
+def enqueue(storage, name, kind):
+    """ثبت وظیفه ساخت مشتق‌های یک فایل"""
+    # upsert روی (storage, name) مانند صف مچینگ
+    DerivativeTask.objects.bulk_create(
+        [DerivativeTask(storage=storage, name=name, kind=kind, requested_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=['storage', 'name'],
+        update_fields=['kind', 'requested_at'],
+    )
+
+
+def enqueue_all():
+    """
+    ثبت وظیفه برای همه فایل‌های موجود، مثلاً پس از تغییر اندازه‌ها
+
+    Returns:
+        int: تعداد وظایف ثبت شده
+    """
+    queued = 0
+    for model, fields in derivative_models():
+        for field_name, kind in fields.items():
+            alias = storage_alias(model._meta.get_field(field_name).storage)
+            names = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for name in names.values_list(field_name, flat=True).distinct().iterator():
+                enqueue(alias, name, kind)
+                queued += 1
+    return queued
+
+
+def delete_derivatives(name):
+    """حذف همه مشتق‌های یک فایل"""
+    for size in SIZES:
+        for extension in FORMATS:
+            default_storage.delete(derivative_name(name, size, extension))
+
+
+def is_shared(name):
+    """محتوای blobs ممکن است فایل چند رکورد باشد و فقط collect_blobs مشتق‌هایش را حذف می‌کند"""
+    return blob_checksum(name) is not None
+
+
+@cache
+def _pymupdf():
+    try:
+        import fitz
+    except ImportError:
+        logger.warning('PyMuPDF نصب نیست؛ برای مدارک PDF پیش‌نمایش ساخته نمی‌شود (pip install pymupdf)')
+        return None
+    return fitz
+
+
+def _render_pdf(file):
+    """تصویر صفحه اول PDF؛ None اگر PyMuPDF نصب نباشد"""
+    fitz = _pymupdf()
+    if fitz is None:
+        return None
+    with fitz.open(stream=file.read(), filetype='pdf') as document:
+        if not document.page_count:
+            return None
+        pixmap = document[0].get_pixmap(dpi=PDF_DPI)
+    return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+
+
+def _open_image(file, name, max_size):
+    if name.lower().endswith('.pdf'):
+        return _render_pdf(file)
+    try:
+        image = Image.open(file)
+    except UnidentifiedImageError:
+        return None
+    # JPEG مستقیماً با مقیاس کوچک‌تر decode می‌شود
+    image.draft('RGB', max_size)
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, 'white')
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    return image.convert('RGB')
+
+
+def _resize(image, size):
+    width, height, crop = SIZES[size]
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    image = image.copy()
+    image.thumbnail((width, height), Image.Resampling.LANCZOS)
+    return image
+
+
+def _is_fresh(storage, name, sizes):
+    """مشتق‌ها ساخته شده‌اند و از فایل اصلی قدیمی‌تر نیستند"""
+    try:
+        source_time = storage.get_modified_time(name)
+        return all(
+            default_storage.get_modified_time(derivative_name(name, size, 'jpg')) >= source_time
+            for size in sizes
+        )
+    except (FileNotFoundError, NotImplementedError):
+        return False
+
+
+def generate(storage, name, kind, force=False):
+    """
+    ساخت مشتق‌های یک فایل
+
+    Args:
+        storage: نام ذخیره‌ساز در STORAGES
+        force: ساخت دوباره حتی اگر مشتق‌ها به‌روز باشند
+
+    Returns:
+        int: تعداد فایل‌های ساخته شده؛ صفر برای فایل‌هایی که تصویر نیستند
+    """
+    storage = storages[storage]
+    sizes = KIND_SIZES[kind]
+    if not force and _is_fresh(storage, name, sizes):
+        mark_ready(name)
+        return 0
+
+    max_size = max((SIZES[size][:2] for size in sizes), key=lambda dimensions: dimensions[0] * dimensions[1])
+    with storage.open(name) as file:
+        image = _open_image(file, name, max_size)
+    if image is None:
+        return 0
+
+    written = 0
+    for size in sizes:
+        resized = _resize(image, size)
+        for extension, image_format in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, quality=QUALITY, optimize=True)
+            target = derivative_name(name, size, extension)
+            default_storage.delete(target)
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+            written += 1
+    mark_ready(name)
+    return written
+
+
+def process_pending_tasks(limit=100):
+    """
+    ساخت مشتق‌های قدیمی‌ترین وظایف صف
+
+    هر وظیفه مانند صف مچینگ پیش از اجرا با حذف شرطی روی requested_at
+    برداشته می‌شود. فایل خراب یا حذف شده دوباره در صف قرار نمی‌گیرد.
+
+    Returns:
+        int: تعداد وظایف اجرا شده
+    """
+    processed = 0
+    for task in DerivativeTask.objects.order_by('requested_at')[:limit]:
+        claimed, _ = DerivativeTask.objects.filter(pk=task.pk, requested_at=task.requested_at).delete()
+        if not claimed:
+            continue
+
+        try:
+            generate(task.storage, task.name, task.kind)
+        except FileNotFoundError:
+            logger.warning('فایل %s برای ساخت پیش‌نمایش پیدا نشد', task.name)
+        except Exception:
+            logger.exception('ساخت پیش‌نمایش %s ناموفق بود', task.name)
+        processed += 1
+    return processed
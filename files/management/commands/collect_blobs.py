@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from files.references import collect_unreferenced, recount_references
+
+
+class Command(BaseCommand):
+    help = 'حذف محتوای فایل‌هایی که دیگر هیچ رکوردی به آن‌ها اشاره نمی‌کند'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=None, help='نگهداری محتوای آپلود شده در این مدت اخیر (پیش‌فرض: BLOB_GRACE_HOURS)')
+        parser.add_argument('--recount', action='store_true', help='محاسبه دوباره شمارنده‌های ارجاع پیش از حذف')
+        parser.add_argument('--dry-run', action='store_true', help='فقط گزارش، بدون حذف')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            changed = recount_references()
+            self.stdout.write(f'شمارنده ارجاع {changed} محتوا اصلاح شد')
+
+        collected, freed = collect_unreferenced(grace_hours=options['grace_hours'], dry_run=options['dry_run'])
+        verb = 'قابل حذف است' if options['dry_run'] else 'حذف شد'
+        self.stdout.write(f'{collected} محتوا ({filesizeformat(freed)}) {verb}')
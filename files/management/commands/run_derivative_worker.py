@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from files.derivatives import enqueue_all, process_pending_tasks
+
+
+class Command(BaseCommand):
+    help = 'اجرای پردازشگر صف ساخت تصاویر کوچک و پیش‌نمایش فایل‌ها'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='تعداد وظایف در هر دور')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='فاصله بررسی صف خالی (ثانیه)')
+        parser.add_argument('--once', action='store_true', help='فقط یک بار صف را خالی کن و خارج شو')
+        parser.add_argument('--enqueue-all', action='store_true', help='ثبت وظیفه برای همه فایل‌های موجود پیش از شروع')
+
+    def handle(self, *args, **options):
+        if options['enqueue_all']:
+            queued = enqueue_all()
+            self.stdout.write(f'{queued} فایل در صف قرار گرفت')
+
+        batch_size = options['batch_size']
+        while True:
+            processed = process_pending_tasks(batch_size)
+            if processed:
+                self.stdout.write(f'{processed} وظیفه پردازش شد')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
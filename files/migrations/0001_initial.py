@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum', models.CharField(max_length=64, unique=True, verbose_name='checksum (sha256)')),
+                ('name', models.CharField(max_length=255, verbose_name='مسیر فایل')),
+                ('size', models.BigIntegerField(verbose_name='حجم')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='تعداد ارجاع')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('last_uploaded_at', models.DateTimeField(auto_now_add=True, verbose_name='آخرین آپلود')),
+            ],
+            options={
+                'verbose_name': 'محتوای فایل',
+                'verbose_name_plural': 'محتوای فایل\u200cها',
+                'indexes': [models.Index(fields=['ref_count', 'last_uploaded_at'], name='blob_unreferenced_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DerivativeTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage', models.CharField(max_length=50, verbose_name='ذخیره\u200cساز')),
+                ('name', models.CharField(max_length=255, verbose_name='مسیر فایل')),
+                ('kind', models.CharField(choices=[('image', 'تصویر پروفایل'), ('document', 'مدرک')], max_length=20, verbose_name='نوع')),
+                ('requested_at', models.DateTimeField(verbose_name='زمان درخواست')),
+            ],
+            options={
+                'verbose_name': 'وظیفه ساخت پیش\u200cنمایش',
+                'verbose_name_plural': 'وظایف ساخت پیش\u200cنمایش',
+                'unique_together': {('storage', 'name')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.core.files.storage import default_storage
+from django.db import migrations
+
+# مدل: {فیلد: اندازه‌ها}؛ نسخه ثابت DERIVATIVE_FIELDS و KIND_SIZES در زمان این migration
+FIELDS = {
+    ('accounts', 'User'): {'profile_image': ['avatar', 'profile']},
+    ('students', 'StudentProfile'): {
+        'student_id_document': ['thumb', 'preview'],
+        'national_id_document': ['thumb', 'preview'],
+        'verification_document': ['thumb', 'preview'],
+    },
+    ('companies', 'CompanyProfile'): {'verification_document': ['thumb', 'preview']},
+}
+
+
+def mark_existing_derivatives(apps, schema_editor):
+    # مشتق‌هایی که پیش از این migration ساخته شده‌اند
+    for (app_label, model_name), fields in FIELDS.items():
+        model = apps.get_model(app_label, model_name)
+        for record in model.objects.only('pk', *fields).iterator():
+            sources = [
+                getattr(record, field).name for field, sizes in fields.items()
+                if getattr(record, field) and all(
+                    default_storage.exists(f'derivatives/{getattr(record, field).name}/{size}.jpg') for size in sizes
+                )
+            ]
+            if sources:
+                model.objects.filter(pk=record.pk).update(derivative_sources=sources)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0002_derivativetask'),
+        ('accounts', '0002_user_derivative_sources'),
+        ('companies', '0004_companyprofile_derivative_sources'),
+        ('students', '0005_studentprofile_derivative_sources'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_existing_derivatives, migrations.RunPython.noop),
+    ]
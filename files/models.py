@@ -0,0 +1,89 @@
+from django.db import models
+
+
+class Blob(models.Model):
+    """محتوای یک فایل که یک بار و با نام checksum آن ذخیره شده است"""
+    
+    checksum = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='checksum (sha256)'
+    )
+    
+    name = models.CharField(
+        max_length=255,
+        verbose_name='مسیر فایل'
+    )
+    
+    size = models.BigIntegerField(
+        verbose_name='حجم'
+    )
+    
+    # تعداد فیلدهای فایلی که به این محتوا اشاره می‌کنند
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='تعداد ارجاع'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='تاریخ ایجاد'
+    )
+    
+    # آخرین آپلود این محتوا؛ پاک‌سازی محتوای تازه آپلود شده را نادیده می‌گیرد
+    last_uploaded_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='آخرین آپلود'
+    )
+    
+    class Meta:
+        verbose_name = 'محتوای فایل'
+        verbose_name_plural = 'محتوای فایل‌ها'
+        indexes = [
+            models.Index(fields=['ref_count', 'last_uploaded_at'], name='blob_unreferenced_idx'),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+
+class DerivativeTask(models.Model):
+    """
+    صف ساخت تصاویر کوچک و پیش‌نمایش یک فایل
+
+    برای هر فایل حداکثر یک ردیف وجود دارد و دستور run_derivative_worker
+    آن را خارج از چرخه درخواست/پاسخ پردازش می‌کند.
+    """
+    
+    KIND_CHOICES = [
+        ('image', 'تصویر پروفایل'),
+        ('document', 'مدرک'),
+    ]
+    
+    storage = models.CharField(
+        max_length=50,
+        verbose_name='ذخیره‌ساز'
+    )
+    
+    name = models.CharField(
+        max_length=255,
+        verbose_name='مسیر فایل'
+    )
+    
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name='نوع'
+    )
+    
+    requested_at = models.DateTimeField(
+        verbose_name='زمان درخواست'
+    )
+    
+    class Meta:
+        verbose_name = 'وظیفه ساخت پیش‌نمایش'
+        verbose_name_plural = 'وظایف ساخت پیش‌نمایش'
+        unique_together = ['storage', 'name']
+    
+    def __str__(self):
+        return self.name
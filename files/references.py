@@ -0,0 +1,101 @@
+"""
+شمارش ارجاع‌ها به محتوای ذخیره شده
+
+فیلدهای فایلی که با document_storage ذخیره می‌شوند در TRACKED_FIELDS
+فهرست شده‌اند. سیگنال‌ها هنگام تغییر یا حذف این فیلدها شمارنده Blob را
+به‌روز می‌کنند و recount_references همه شمارنده‌ها را از روی داده‌ها از
+نو می‌سازد.
+"""
+from collections import Counter
+
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+
+from .derivatives import delete_derivatives
+from .models import Blob
+from .storage import blob_checksum, document_storage
+
+TRACKED_FIELDS = {
+    'students.StudentFile': ['file'],
+    'students.StudentProfile': ['verification_document', 'student_id_document', 'national_id_document'],
+    'companies.CompanyProfile': ['verification_document'],
+}
+
+BATCH_SIZE = 1000
+
+DEFAULT_GRACE_HOURS = 24
+
+
+def tracked_models():
+    """[(مدل، فیلدها)]"""
+    return [(apps.get_model(label), fields) for label, fields in TRACKED_FIELDS.items()]
+
+
+def referenced_checksums(names):
+    """شمارش checksum محتوای نام‌های فایل"""
+    return Counter(checksum for checksum in map(blob_checksum, names) if checksum)
+
+
+def adjust_references(added, removed):
+    """افزایش و کاهش شمارنده‌ها بر اساس Counter از checksumها"""
+    for checksum, count in (added - removed).items():
+        Blob.objects.filter(checksum=checksum).update(ref_count=F('ref_count') + count)
+    for checksum, count in (removed - added).items():
+        Blob.objects.filter(checksum=checksum, ref_count__gte=count).update(ref_count=F('ref_count') - count)
+
+
+def recount_references():
+    """
+    محاسبه دوباره همه شمارنده‌ها از روی فیلدهای فایل
+
+    Returns:
+        int: تعداد محتواهایی که شمارنده‌شان تغییر کرد
+    """
+    counts = Counter()
+    for model, fields in tracked_models():
+        for names in model.objects.values_list(*fields).iterator(chunk_size=BATCH_SIZE):
+            counts.update(referenced_checksums(names))
+
+    changed = []
+    for blob in Blob.objects.only('id', 'checksum', 'ref_count').iterator(chunk_size=BATCH_SIZE):
+        if blob.ref_count != counts[blob.checksum]:
+            blob.ref_count = counts[blob.checksum]
+            changed.append(blob)
+    Blob.objects.bulk_update(changed, ['ref_count'], batch_size=BATCH_SIZE)
+    return len(changed)
+
+
+def collect_unreferenced(grace_hours=None, dry_run=False):
+    """
+    حذف محتوای بدون ارجاع
+
+    محتوایی که در grace_hours اخیر آپلود شده نگه داشته می‌شود، چون ممکن
+    است فایل آن ذخیره شده ولی رکورد ارجاع‌دهنده هنوز ثبت نشده باشد.
+
+    Returns:
+        tuple: (تعداد محتواها، مجموع حجم آزاد شده)
+    """
+    if grace_hours is None:
+        grace_hours = getattr(settings, 'BLOB_GRACE_HOURS', DEFAULT_GRACE_HOURS)
+    cutoff = timezone.now() - timedelta(hours=grace_hours)
+    unreferenced = Blob.objects.filter(ref_count=0, last_uploaded_at__lt=cutoff)
+
+    storage = document_storage()
+    collected = freed = 0
+    for blob in unreferenced.only('id', 'checksum', 'name', 'size').iterator(chunk_size=BATCH_SIZE):
+        if not dry_run:
+            # حذف شرطی تا ارجاع یا آپلود هم‌زمان محتوا را نگه دارد
+            if not unreferenced.filter(pk=blob.pk).delete()[0]:
+                continue
+            # delete خود ContentAddressedStorage محتوای مشترک را حذف نمی‌کند
+            for name in storage.blob_names(blob.checksum):
+                FileSystemStorage.delete(storage, name)
+                delete_derivatives(name)
+        collected += 1
+        freed += blob.size
+    return collected, freed
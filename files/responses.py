@@ -0,0 +1,125 @@
+"""
+ارسال فایل‌های ذخیره شده به کاربر
+
+بسته به تنظیم FILE_DELIVERY:
+
+- 'x-accel': فقط هدر X-Accel-Redirect برگردانده می‌شود و nginx فایل را
+  از location داخلی FILE_ACCEL_REDIRECT_PREFIX با sendfile و پشتیبانی
+  Range ارسال می‌کند.
+- 'x-sendfile': مانند بالا با هدر X-Sendfile برای Apache/lighttpd.
+- 'python' (پیش‌فرض): فایل به‌صورت جریانی خوانده می‌شود؛ درخواست‌های
+  Range با پاسخ 206 و درخواست کامل با FileResponse (که در سرورهای WSGI
+  از wsgi.file_wrapper و sendfile استفاده می‌کند) پاسخ داده می‌شوند.
+
+در همه حالت‌ها بررسی دسترسی پیش از فراخوانی send_file در view انجام
+می‌شود و checksum فایل به‌عنوان ETag استفاده می‌شود.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_range(header, size):
+    """
+    بازه (شروع، پایان شامل) یک هدر Range تک‌بازه‌ای
+
+    Returns:
+        tuple: بازه؛ None اگر هدر قابل استفاده نباشد (پاسخ کامل)
+
+    Raises:
+        ValueError: اگر بازه خارج از فایل باشد (پاسخ 416)
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # bytes=-N: آخرین N بایت
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError('بازه نامعتبر است')
+    return start, end
+
+
+def _read_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _python_response(request, field_file, etag):
+    size = field_file.size
+    content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = field_file.storage.open(field_file.name, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(_read_range(file, start, end - start + 1), status=206, content_type=content_type)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return response
+
+
+def send_file(request, field_file, checksum=None, as_attachment=False):
+    """
+    پاسخ HTTP برای فایل یک FileField
+
+    Args:
+        field_file: مقدار FileField (مانند student_file.file)
+        checksum: checksum ذخیره شده فایل برای ETag
+        as_attachment: دانلود به‌جای نمایش در مرورگر
+    """
+    etag = f'"{checksum}"' if checksum else None
+    if etag and etag in request.headers.get('If-None-Match', ''):
+        return HttpResponseNotModified()
+
+    delivery = getattr(settings, 'FILE_DELIVERY', 'python')
+    if delivery == 'x-accel':
+        response = HttpResponse(content_type=mimetypes.guess_type(field_file.name)[0] or '')
+        response['X-Accel-Redirect'] = settings.FILE_ACCEL_REDIRECT_PREFIX + quote(field_file.name)
+    elif delivery == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = field_file.path
+    else:
+        response = _python_response(request, field_file, etag)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, os.path.basename(field_file.name))
+    if etag:
+        response['ETag'] = etag
+    # فایل‌های کاربران خصوصی هستند
+    response['Cache-Control'] = 'private'
+    return response
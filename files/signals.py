@@ -0,0 +1,93 @@
+from collections import Counter
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .derivatives import delete_derivatives, derivative_models, enqueue, is_shared, storage_alias
+from .models import DerivativeTask
+from .references import adjust_references, referenced_checksums, tracked_models
+
+
+def _referenced(sender, instance):
+    return referenced_checksums(getattr(instance, field).name for field in sender._blob_fields)
+
+
+def remember_previous_files(sender, instance, **kwargs):
+    """checksum فایل‌های ذخیره شده قبلی برای مقایسه در post_save"""
+    previous = None
+    if instance.pk:
+        previous = sender._default_manager.filter(pk=instance.pk).values_list(*sender._blob_fields).first()
+    instance._blob_references = referenced_checksums(previous or ())
+
+
+def update_references(sender, instance, **kwargs):
+    current = _referenced(sender, instance)
+    adjust_references(current, getattr(instance, '_blob_references', Counter()))
+    instance._blob_references = current
+
+
+def release_references(sender, instance, **kwargs):
+    adjust_references(Counter(), _referenced(sender, instance))
+
+
+def _derivative_fields(sender, update_fields):
+    fields = sender._derivative_fields
+    if update_fields is not None:
+        # مثلاً ذخیره last_login هنگام ورود
+        fields = {field: kind for field, kind in fields.items() if field in update_fields}
+    return fields
+
+
+def _discard_derivatives(names):
+    names = [name for name in names if name and not is_shared(name)]
+    if not names:
+        return
+    DerivativeTask.objects.filter(name__in=names).delete()
+    for name in names:
+        transaction.on_commit(partial(delete_derivatives, name))
+
+
+def remember_previous_sources(sender, instance, update_fields=None, **kwargs):
+    """نام فایل‌های قبلی برای پاک کردن مشتق‌هایشان در post_save"""
+    fields = _derivative_fields(sender, update_fields)
+    previous = None
+    if fields and instance.pk:
+        previous = sender._default_manager.filter(pk=instance.pk).values(*fields).first()
+    instance._derivative_sources = previous or {}
+
+
+def update_derivatives(sender, instance, update_fields=None, **kwargs):
+    previous = getattr(instance, '_derivative_sources', {})
+    replaced = []
+    for field, kind in _derivative_fields(sender, update_fields).items():
+        file = getattr(instance, field)
+        if file.name == previous.get(field):
+            continue
+        replaced.append(previous.get(field))
+        if file:
+            enqueue(storage_alias(file.storage), file.name, kind)
+    _discard_derivatives(replaced)
+    instance._derivative_sources = {field: getattr(instance, field).name for field in sender._derivative_fields}
+
+
+def release_derivatives(sender, instance, **kwargs):
+    _discard_derivatives([getattr(instance, field).name for field in sender._derivative_fields])
+
+
+def connect_signals():
+    """اتصال سیگنال‌های شمارش ارجاع و ساخت پیش‌نمایش برای مدل‌های TRACKED_FIELDS و DERIVATIVE_FIELDS"""
+    for model, fields in tracked_models():
+        model._blob_fields = fields
+        uid = model._meta.label_lower
+        pre_save.connect(remember_previous_files, sender=model, dispatch_uid=f'blob_pre_save_{uid}')
+        post_save.connect(update_references, sender=model, dispatch_uid=f'blob_post_save_{uid}')
+        post_delete.connect(release_references, sender=model, dispatch_uid=f'blob_post_delete_{uid}')
+
+    for model, fields in derivative_models():
+        model._derivative_fields = fields
+        uid = model._meta.label_lower
+        pre_save.connect(remember_previous_sources, sender=model, dispatch_uid=f'derivative_pre_save_{uid}')
+        post_save.connect(update_derivatives, sender=model, dispatch_uid=f'derivative_post_save_{uid}')
+        post_delete.connect(release_derivatives, sender=model, dispatch_uid=f'derivative_post_delete_{uid}')
@@ -0,0 +1,91 @@
+"""
+ذخیره‌سازی فایل‌ها بر اساس محتوا
+
+هر فایل با sha256 محتوایش در blobs/<دو حرف اول>/<checksum><پسوند>
+ذخیره می‌شود؛ آپلود دوباره همان محتوا (مثلاً یک رزومه در چند فیلد)، حتی
+با پسوند دیگر، فقط به نام ثبت شده در Blob اشاره می‌کند و روی دیسک نوشته
+نمی‌شود. برای هر
+محتوا یک ردیف Blob با شمارنده ارجاع نگهداری می‌شود که سیگنال‌های
+files.signals آن را به‌روز می‌کنند و فرمان collect_blobs محتوای بدون
+ارجاع را پاک می‌کند.
+"""
+import os
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils import timezone
+
+from .uploads import file_checksum
+
+BLOB_PREFIX = 'blobs/'
+
+
+def blob_name(checksum, extension=''):
+    return f'{BLOB_PREFIX}{checksum[:2]}/{checksum}{extension.lower()}'
+
+
+def blob_checksum(name):
+    """checksum محتوای یک نام ذخیره شده؛ None برای فایل‌های خارج از blobs"""
+    if not name or not name.startswith(BLOB_PREFIX):
+        return None
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage با نام‌گذاری بر اساس checksum و حذف محتوای تکراری"""
+
+    def get_available_name(self, name, max_length=None):
+        # نام نهایی در _save از محتوا ساخته می‌شود؛ اگر همان محتوا هم‌زمان
+        # ذخیره شده باشد FileSystemStorage._save به‌جای نام جدید خطا می‌گیرد
+        if name.startswith(BLOB_PREFIX) and self.exists(name):
+            raise FileExistsError(name)
+        return name
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        checksum = file_checksum(content)
+        # محتوای موجود با همان نام اول ذخیره شده استفاده می‌شود، صرف نظر از پسوند
+        blob = Blob.objects.filter(checksum=checksum).first()
+        if blob is not None and self.exists(blob.name):
+            Blob.objects.filter(pk=blob.pk).update(last_uploaded_at=timezone.now())
+            return blob.name
+
+        name = blob_name(checksum, os.path.splitext(name)[1])
+        written = False
+        if not self.exists(name):
+            try:
+                super()._save(name, content)
+                written = True
+            except FileExistsError:
+                pass
+
+        blob, created = Blob.objects.get_or_create(checksum=checksum, defaults={'name': name, 'size': content.size})
+        if not created and blob.name != name:
+            if self.exists(blob.name):
+                # همان محتوا هم‌زمان با پسوند دیگری ذخیره شده است
+                if written:
+                    super().delete(name)
+                return blob.name
+            Blob.objects.filter(pk=blob.pk).update(name=name, size=content.size, last_uploaded_at=timezone.now())
+        return name
+
+    def blob_names(self, checksum):
+        """همه نام‌های ذخیره شده یک محتوا؛ شامل نسخه‌هایی که پیش‌تر با پسوند دیگری ذخیره شده‌اند"""
+        directory = os.path.dirname(blob_name(checksum))
+        if not self.exists(directory):
+            return []
+        _, files = self.listdir(directory)
+        return [
+            f'{directory}/{filename}' for filename in files
+            if os.path.splitext(filename)[0] == checksum
+        ]
+
+    def delete(self, name):
+        # محتوای مشترک فقط با collect_blobs حذف می‌شود
+        if blob_checksum(name) is None:
+            super().delete(name)
+
+
+def document_storage():
+    """ذخیره‌سازی مدارک و فایل‌های دانشجویان و شرکت‌ها"""
+    return storages['documents']
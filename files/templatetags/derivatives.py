@@ -0,0 +1,16 @@
+from django import template
+
+from files.derivatives import derivative as get_derivative
+
+register = template.Library()
+
+
+@register.simple_tag
+def derivative(file, size):
+    """
+    نشانی‌های تصویر کوچک یک فایل
+
+    {% derivative user.profile_image 'avatar' as avatar %} و سپس
+    avatar.webp_url و avatar.url؛ اگر هنوز ساخته نشده باشد None است.
+    """
+    return get_derivative(file, size)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Match, MatchCriteria, MatchHistory
+from .models import FieldGroup, FieldOfStudy, Match, MatchCriteria, MatchHistory, MatchRecomputeTask, MatchScore, Skill
 
 
 @admin.register(Match)
@@ -23,3 +23,36 @@ class MatchHistoryAdmin(admin.ModelAdmin):
     list_filter = ('action', 'created_at')
     search_fields = ('match__student__first_name', 'match__company__company_profile__company_name')
     readonly_fields = ('created_at',)
+
+
+@admin.register(MatchScore)
+class MatchScoreAdmin(admin.ModelAdmin):
+    list_display = ('student_request', 'job_request', 'score', 'updated_at')
+    list_select_related = ('student_request__user', 'job_request__company__company_profile')
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(MatchRecomputeTask)
+class MatchRecomputeTaskAdmin(admin.ModelAdmin):
+    list_display = ('entity_type', 'entity_id', 'requested_at', 'attempts', 'run_after')
+    list_filter = ('entity_type', 'attempts')
+
+
+@admin.register(FieldGroup)
+class FieldGroupAdmin(admin.ModelAdmin):
+    list_display = ('name', 'keywords', 'bit')
+    search_fields = ('name', 'keywords')
+    readonly_fields = ('bit',)
+
+
+@admin.register(FieldOfStudy)
+class FieldOfStudyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'group_mask')
+    search_fields = ('name',)
+    readonly_fields = ('group_mask',)
@@ -0,0 +1,274 @@
+"""
+بنچمارک الگوریتم و صفحه مچینگ
+
+جمعیت مصنوعی با seed ثابت (شرکت‌ها، درخواست‌های شغلی و درخواست‌های
+دانشجو با رشته‌ها، مهارت‌ها، شهرها و حقوق واقعی‌نما) ساخته و این موارد
+اندازه‌گیری می‌شود:
+
+- جفت در ثانیه برای calculate_match_score، موتور دسته‌ای و top_k_matches
+- میانه و صدک 95 زمان پاسخ صفحه مچینگ شرکت و دانشجو
+- تعداد کوئری‌های هر صفحه
+- بیشینه حافظه هر مرحله (tracemalloc)
+
+خروجی یک دیکشنری قابل تبدیل به JSON است تا بین کامیت‌ها مقایسه شود.
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .fields_of_study import field_group_mask
+from .matching_algorithm import calculate_match_score, batch_scores_for_job, top_k_matches
+from .models import FieldOfStudy
+from .rebuild import score_shard, write_shard_scores
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'bench-'
+
+PLACES = [
+    ('تهران', 'تهران'), ('کرج', 'البرز'), ('اصفهان', 'اصفهان'), ('کاشان', 'اصفهان'),
+    ('شیراز', 'فارس'), ('مشهد', 'خراسان رضوی'), ('تبریز', 'آذربایجان شرقی'),
+    ('رشت', 'گیلان'), ('اهواز', 'خوزستان'), ('قم', 'قم'),
+]
+
+FIELDS = [
+    'مهندسی کامپیوتر', 'کامپیوتر', 'مهندسی نرم‌افزار', 'فناوری اطلاعات', 'IT',
+    'مهندسی برق', 'الکترونیک', 'مخابرات', 'مهندسی مکانیک', 'مهندسی صنایع',
+    'مدیریت بازرگانی', 'حسابداری', 'اقتصاد', 'روانشناسی', 'مشاوره', 'معماری',
+    'گرافیک', 'زبان انگلیسی',
+]
+
+SKILLS = [
+    'Python', 'Django', 'JavaScript', 'React', 'SQL', 'Java', 'Spring', 'C++', 'Docker',
+    'Linux', 'Git', 'Excel', 'Photoshop', 'AutoCAD', 'MATLAB', 'حسابداری', 'مذاکره',
+    'زبان انگلیسی', 'تحلیل داده', 'یادگیری ماشین', 'طراحی رابط کاربری', 'شبکه',
+]
+
+STUDENT_JOB_TYPES = ['internship', 'part_time', 'full_time', 'project', 'freelance']
+JOB_JOB_TYPES = ['internship', 'part_time', 'full_time', 'project']
+WORK_TYPES = ['remote', 'office', 'hybrid']
+
+
+def _skills(rnd, low, high):
+    return ', '.join(rnd.sample(SKILLS, rnd.randint(low, high)))
+
+
+def _place(rnd):
+    if rnd.random() < 0.1:
+        return None, None
+    return rnd.choice(PLACES)
+
+
+def _field(rnd, field_ids):
+    """رشته تصادفی به همراه شناسه نرمال شده و گروه‌های آن (bulk_create سیگنال ندارد)"""
+    field = rnd.choice(FIELDS)
+    name = field.lower()
+    if name not in field_ids:
+        field_ids[name] = FieldOfStudy.objects.get_or_create(
+            name=name, defaults={'group_mask': field_group_mask(name)}
+        )[0].pk
+    return field, field_ids[name], field_group_mask(field)
+
+
+def generate_population(size, seed=0, batch_size=1000):
+    """
+    ساخت جمعیت مصنوعی
+
+    Args:
+        size: تعداد درخواست‌های دانشجو؛ تعداد درخواست‌های شغلی size / 20 است
+        seed: seed مولد تصادفی
+
+    Returns:
+        dict: کاربر شرکت و دانشجوی نمونه برای اندازه‌گیری صفحه‌ها
+    """
+    from companies.models import CompanyProfile, JobRequest
+    from students.models import StudentRequest
+
+    rnd = random.Random(seed)
+    field_ids = {}
+    job_count = max(size // 20, 10)
+    company_count = max(job_count // 3, 1)
+
+    companies = User.objects.bulk_create(
+        [User(username=f'{USERNAME_PREFIX}company-{i}', user_type='company') for i in range(company_count)],
+        batch_size=batch_size,
+    )
+    CompanyProfile.objects.bulk_create(
+        [
+            CompanyProfile(
+                user=company,
+                company_name=f'شرکت {i}',
+                company_type=rnd.choice(['startup', 'small', 'medium', 'large']),
+                industry='فناوری',
+                company_size=rnd.choice(['1-10', '11-50', '51-200']),
+                city=_place(rnd)[0],
+            )
+            for i, company in enumerate(companies)
+        ],
+        batch_size=batch_size,
+    )
+
+    job_requests = []
+    for i in range(job_count):
+        field, field_id, mask = _field(rnd, field_ids)
+        city, province = _place(rnd)
+        min_salary = rnd.choice([None, 10, 15, 20, 30]) if rnd.random() < 0.8 else None
+        job_requests.append(JobRequest(
+            company=companies[i % company_count],
+            title=f'موقعیت {i}',
+            field_of_study=field,
+            canonical_field_id=field_id,
+            field_group_mask=mask,
+            job_type=rnd.choice(JOB_JOB_TYPES),
+            work_type=rnd.choice(WORK_TYPES),
+            city=city,
+            province=province,
+            required_skills=_skills(rnd, 1, 5),
+            min_salary=min_salary and min_salary * 1000000,
+            max_salary=min_salary and rnd.choice([None, min_salary * 2000000]),
+            description='توضیحات',
+        ))
+    JobRequest.objects.bulk_create(job_requests, batch_size=batch_size)
+
+    students = User.objects.bulk_create(
+        [User(username=f'{USERNAME_PREFIX}student-{i}', user_type='student') for i in range(size)],
+        batch_size=batch_size,
+    )
+    student_requests = []
+    for student in students:
+        field, field_id, mask = _field(rnd, field_ids)
+        city, province = _place(rnd)
+        expected_salary = rnd.choice([None, 8, 12, 20, 25, 40])
+        student_requests.append(StudentRequest(
+            user=student,
+            field_of_study=field,
+            canonical_field_id=field_id,
+            field_group_mask=mask,
+            job_type=rnd.choice(STUDENT_JOB_TYPES),
+            work_type=rnd.choice(WORK_TYPES),
+            city=city,
+            province=province,
+            skills=_skills(rnd, 1, 8),
+            expected_salary=expected_salary and expected_salary * 1000000,
+        ))
+    StudentRequest.objects.bulk_create(student_requests, batch_size=batch_size)
+
+    return {'company': companies[0], 'student': students[0]}
+
+
+def clear_population():
+    """حذف جمعیت مصنوعی"""
+    User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+
+def _timed(function):
+    """اجرای تابع و بازگرداندن (نتیجه، ثانیه‌ها)"""
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def _peak_memory(function):
+    """بیشینه حافظه اجرای تابع به بایت؛ جدا از زمان‌سنجی چون tracemalloc اجرا را کند می‌کند"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _throughput(function, pairs):
+    _, elapsed = _timed(function)
+    return {'pairs': pairs, 'pairs_per_sec': pairs / elapsed, 'peak_memory': _peak_memory(function)}
+
+
+def _percentile(samples, percent):
+    samples = sorted(samples)
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
+
+
+def benchmark_scoring(sample_pairs=20000):
+    """جفت در ثانیه برای روش‌های مختلف امتیازدهی یک درخواست شغلی در برابر همه دانشجویان"""
+    from companies.models import JobRequest
+    from students.models import StudentRequest
+
+    job_request = JobRequest.objects.filter(is_active=True).order_by('id').first()
+    student_requests = list(StudentRequest.objects.filter(is_active=True))
+    sample = student_requests[:sample_pairs]
+    # بارگذاری numpy و حافظه‌های نهان در زمان‌سنجی حساب نمی‌شود
+    batch_scores_for_job(job_request, sample[:1])
+
+    return {
+        'per_pair': _throughput(lambda: [calculate_match_score(s, job_request) for s in sample], len(sample)),
+        'batch': _throughput(lambda: batch_scores_for_job(job_request, student_requests), len(student_requests)),
+        'top_k': _throughput(
+            lambda: top_k_matches(((s, job_request) for s in student_requests), 12, min_score=0.5),
+            len(student_requests),
+        ),
+    }
+
+
+def benchmark_view(user, repeat=20):
+    """زمان پاسخ، تعداد کوئری و بیشینه حافظه صفحه مچینگ برای یک کاربر (بدون رندر قالب)"""
+    client = Client()
+    client.force_login(user)
+    url = reverse('matching:algorithm')
+    latencies = []
+    queries = []
+    with mock.patch('matching.views.render', return_value=HttpResponse()):
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                _, elapsed = _timed(lambda: client.get(url))
+            latencies.append(elapsed)
+            queries.append(len(context))
+        peak = _peak_memory(lambda: client.get(url))
+    return {
+        'p50': _percentile(latencies, 50),
+        'p95': _percentile(latencies, 95),
+        'queries': max(queries),
+        'peak_memory': peak,
+    }
+
+
+def run_benchmark(sizes, seed=0, repeat=20):
+    """
+    اجرای بنچمارک برای هر اندازه جمعیت
+
+    باید روی پایگاه داده آزمایشی اجرا شود؛ جمعیت هر اندازه پس از
+    اندازه‌گیری حذف می‌شود.
+    """
+    results = []
+    for size in sizes:
+        clear_population()
+        users, generate_seconds = _timed(lambda: generate_population(size, seed))
+        result = {'size': size, 'seed': seed, 'generate_seconds': generate_seconds}
+
+        result['scoring'] = benchmark_scoring()
+
+        # جدول امتیازها فقط برای درخواست‌های شرکت نمونه پر می‌شود
+        job_ids = list(users['company'].job_requests.values_list('id', flat=True))
+        def store_shard():
+            _, scores = score_shard(job_ids)
+            write_shard_scores(job_ids, scores)
+            return len(scores)
+
+        stored, elapsed = _timed(store_shard)
+        result['store'] = {'jobs': len(job_ids), 'stored_scores': stored, 'seconds': elapsed}
+
+        result['company_view'] = benchmark_view(users['company'], repeat)
+        result['student_view'] = benchmark_view(users['student'], repeat)
+        results.append(result)
+    clear_population()
+    return results
@@ -0,0 +1,121 @@
+"""
+نرمال‌سازی رشته‌های تحصیلی
+
+هر رشته تحصیلی آزاد به یک شناسه رشته نرمال شده (FieldOfStudy) و یک
+bitset از گروه‌های مشابه (FieldGroup) نگاشت می‌شود. نتیجه برای هر رشته
+یکتا در حافظه نگهداری و هنگام ذخیره روی StudentRequest و JobRequest
+ثبت می‌شود، پس تشخیص رشته یکسان یا مشابه یک مقایسه عددی است. تغییر
+گروه‌ها با نسخه‌ای در کش مشترک به پردازه‌های دیگر اعلام می‌شود.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import FieldGroup, FieldOfStudy
+
+# نسخه گروه‌ها در کش مشترک؛ تغییر آن حافظه همه پردازه‌ها را باطل می‌کند
+GROUPS_VERSION_KEY = 'matching:field_groups:version'
+# فاصله بررسی نسخه (ثانیه) تا محاسبه‌های پشت سر هم به کش مراجعه نکنند
+VERSION_CHECK_INTERVAL = 5
+
+# کلیدواژه‌های گروه‌ها: [(mask گروه، کلیدواژه‌ها)]؛ با اولین استفاده بارگذاری می‌شود
+_groups = None
+
+# رشته نرمال شده -> bitset گروه‌ها
+_mask_cache = {}
+
+_groups_version = None
+_version_checked_at = None
+
+
+def _reset(version):
+    global _groups, _groups_version, _version_checked_at
+    _groups = None
+    _groups_version = version
+    _version_checked_at = time.monotonic()
+    _mask_cache.clear()
+
+
+def _check_version():
+    """پاک کردن حافظه اگر پردازه دیگری گروه‌ها را تغییر داده باشد"""
+    global _version_checked_at
+    now = time.monotonic()
+    if _version_checked_at is not None and now - _version_checked_at < VERSION_CHECK_INTERVAL:
+        return
+    _version_checked_at = now
+    version = cache.get(GROUPS_VERSION_KEY)
+    if version != _groups_version:
+        _reset(version)
+
+
+def _load_groups():
+    global _groups
+    if _groups is None:
+        _groups = [(group.mask, group.keyword_list()) for group in FieldGroup.objects.all()]
+    return _groups
+
+
+def clear_cache():
+    """
+    پاک کردن حافظه نرمال‌ساز؛ پس از تغییر گروه‌ها
+
+    حافظه همین پردازه بلافاصله پاک می‌شود و نسخه تازه پس از ثبت تراکنش در
+    کش مشترک نوشته می‌شود تا پردازه‌های دیگر گروه‌های ثبت شده را بخوانند.
+    """
+    version = uuid.uuid4().hex
+    _reset(version)
+    transaction.on_commit(lambda: cache.set(GROUPS_VERSION_KEY, version, None))
+
+
+def normalize_field_name(field_of_study):
+    """شکل نرمال رشته تحصیلی؛ مانند مقایسه بدون حساسیت به حروف در الگوریتم مچینگ"""
+    return field_of_study.lower()
+
+
+def field_group_mask(field_of_study):
+    """bitset گروه‌هایی که رشته تحصیلی شامل یکی از کلیدواژه‌های آن‌هاست"""
+    if not field_of_study:
+        return 0
+    _check_version()
+    name = normalize_field_name(field_of_study)
+    mask = _mask_cache.get(name)
+    if mask is None:
+        mask = 0
+        for bit, keywords in _load_groups():
+            if any(keyword in name for keyword in keywords):
+                mask |= bit
+        _mask_cache[name] = mask
+    return mask
+
+
+def canonical_field_id(field_of_study):
+    """شناسه FieldOfStudy رشته تحصیلی؛ در صورت نیاز ایجاد می‌شود"""
+    if not field_of_study:
+        return None
+    name = normalize_field_name(field_of_study)
+    field, _ = FieldOfStudy.objects.get_or_create(
+        name=name, defaults={'group_mask': field_group_mask(name)}
+    )
+    return field.pk
+
+
+def assign_field(instance):
+    """ثبت رشته نرمال شده و گروه‌های آن روی درخواست دانشجو یا شرکت"""
+    instance.canonical_field_id = canonical_field_id(instance.field_of_study)
+    instance.field_group_mask = field_group_mask(instance.field_of_study)
+
+
+def refresh_group_masks():
+    """محاسبه مجدد گروه‌های همه رشته‌ها و درخواست‌ها پس از تغییر FieldGroup"""
+    from companies.models import JobRequest
+    from students.models import StudentRequest
+
+    clear_cache()
+    for field in FieldOfStudy.objects.iterator():
+        mask = field_group_mask(field.name)
+        if mask != field.group_mask:
+            FieldOfStudy.objects.filter(pk=field.pk).update(group_mask=mask)
+            StudentRequest.objects.filter(canonical_field=field).update(field_group_mask=mask)
+            JobRequest.objects.filter(canonical_field=field).update(field_group_mask=mask)
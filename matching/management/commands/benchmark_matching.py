@@ -0,0 +1,47 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from matching.benchmark import run_benchmark
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'بنچمارک الگوریتم و صفحه مچینگ روی داده مصنوعی در پایگاه داده آزمایشی'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='تعداد درخواست‌های دانشجو')
+        parser.add_argument('--seed', type=int, default=0, help='seed مولد داده')
+        parser.add_argument('--repeat', type=int, default=20, help='تعداد درخواست‌های هر صفحه')
+        parser.add_argument('--output', help='مسیر فایل JSON خروجی (پیش‌فرض: خروجی استاندارد)')
+
+    def handle(self, *args, **options):
+        # داده مصنوعی هرگز در پایگاه داده اصلی نوشته نمی‌شود
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_benchmark(options['sizes'], seed=options['seed'], repeat=options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = json.dumps({'commit': _git_commit(), 'results': results}, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(report + '\n')
+            self.stdout.write(self.style.SUCCESS(f'نتایج در {options["output"]} ذخیره شد'))
+        else:
+            self.stdout.write(report)
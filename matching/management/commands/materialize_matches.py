@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from matching.models import MatchScore
+from matching.score_store import BATCH_SIZE, MIN_STORED_SCORE, materialize_matches
+
+
+class Command(BaseCommand):
+    help = 'ذخیره امتیازهای محاسبه شده مچینگ در مدل Match'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='تعداد ردیف‌ها در هر bulk_create')
+        parser.add_argument('--min-score', type=float, default=MIN_STORED_SCORE, help='حداقل امتیاز (0 تا 1)')
+
+    def handle(self, *args, **options):
+        scores = MatchScore.objects.filter(score__gte=options['min_score'])
+        created, updated = materialize_matches(scores, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{created} مچ ایجاد و {updated} مچ به‌روزرسانی شد'))
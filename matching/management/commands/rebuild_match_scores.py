@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from matching.rebuild import rebuild_scores
+from matching.score_store import BATCH_SIZE
+from matching.skill_index import rebuild_skill_index
+
+
+class Command(BaseCommand):
+    help = 'بازسازی کامل جدول امتیازهای مچینگ با چند پردازه'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='تعداد پردازه‌ها (پیش‌فرض: تعداد هسته‌ها، 0: همین پردازه)')
+        parser.add_argument('--shard-size', type=int, default=50, help='تعداد درخواست‌های شغلی هر بخش')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='تعداد درخواست‌های دانشجو در هر کار و اندازه دسته نوشتن')
+        parser.add_argument('--resume', action='store_true', help='ادامه بخش‌های تکمیل نشده برنامه بازسازی قبلی')
+        parser.add_argument('--reindex', action='store_true', help='بازسازی نمایه مهارت‌ها پیش از امتیازدهی')
+
+    def handle(self, *args, **options):
+        if options['reindex']:
+            rebuild_skill_index()
+
+        def progress(done, total, pairs, elapsed):
+            rate = pairs / elapsed if elapsed else 0
+            self.stdout.write(f'بخش {done}/{total} - {pairs} جفت - {rate:.0f} جفت در ثانیه')
+
+        pairs = rebuild_scores(
+            workers=options['workers'],
+            shard_size=options['shard_size'],
+            batch_size=options['batch_size'],
+            resume=options['resume'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'بازسازی کامل شد: {pairs} جفت امتیازدهی شد'))
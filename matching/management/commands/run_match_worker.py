@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from matching.tasks import process_pending_tasks
+
+
+class Command(BaseCommand):
+    help = 'اجرای پردازشگر صف محاسبه مجدد امتیازهای مچینگ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='تعداد وظایف در هر دور')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='فاصله بررسی صف خالی (ثانیه)')
+        parser.add_argument('--once', action='store_true', help='فقط یک بار صف را خالی کن و خارج شو')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            processed = process_pending_tasks(batch_size)
+            if processed:
+                self.stdout.write(f'{processed} وظیفه پردازش شد')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
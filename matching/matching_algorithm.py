@@ -1,3 +1,17 @@
+import heapq
+import operator
+
+from .fields_of_study import field_group_mask, normalize_field_name
+
+# وزن مؤلفه‌های امتیاز مچینگ
+FIELD_WEIGHT = 0.3
+JOB_TYPE_WEIGHT = 0.2
+WORK_TYPE_WEIGHT = 0.15
+SKILLS_WEIGHT = 0.2
+LOCATION_WEIGHT = 0.1
+SALARY_WEIGHT = 0.05
+
+
 def calculate_match_score(student_request, company_or_job_request):
     """
     محاسبه امتیاز مچینگ بین درخواست دانشجو و شرکت
@@ -15,52 +29,44 @@ def calculate_match_score(student_request, company_or_job_request):
     # اگر company_or_job_request یک کاربر شرکت است، درخواست شغلی آن را بگیر
     if hasattr(company_or_job_request, "job_requests"):
         # این یک کاربر شرکت است
-        job_requests = company_or_job_request.job_requests.filter(is_active=True)
-        if not job_requests.exists():
+        job_request = company_or_job_request.job_requests.filter(is_active=True).first()  # اولین درخواست فعال
+        if job_request is None:
             return 0.0
-        job_request = job_requests.first()  # اولین درخواست فعال
     else:
         # این یک درخواست شغلی است
         job_request = company_or_job_request
     
     # 1. تطبیق رشته تحصیلی (وزن: 0.3)
-    if student_request.field_of_study and job_request.field_of_study:
-        if student_request.field_of_study.lower() == job_request.field_of_study.lower():
-            score += 0.3
-        else:
-            # بررسی شباهت رشته‌ها
-            similar_fields = check_similar_fields(student_request.field_of_study, job_request.field_of_study)
-            if similar_fields:
-                score += 0.2
-    total_weight += 0.3
+    score += calculate_field_match(student_request, job_request)
+    total_weight += FIELD_WEIGHT
     
     # 2. تطبیق نوع شغل (وزن: 0.2)
     if student_request.job_type == job_request.job_type:
-        score += 0.2
-    total_weight += 0.2
+        score += JOB_TYPE_WEIGHT
+    total_weight += JOB_TYPE_WEIGHT
     
     # 3. تطبیق نوع کار (وزن: 0.15)
     if student_request.work_type == job_request.work_type:
-        score += 0.15
-    total_weight += 0.15
+        score += WORK_TYPE_WEIGHT
+    total_weight += WORK_TYPE_WEIGHT
     
     # 4. تطبیق مهارت‌ها (وزن: 0.2)
     skills_match = calculate_skills_match(student_request.skills, job_request.required_skills)
-    score += skills_match * 0.2
-    total_weight += 0.2
+    score += skills_match * SKILLS_WEIGHT
+    total_weight += SKILLS_WEIGHT
     
     # 5. تطبیق موقعیت جغرافیایی (وزن: 0.1)
     if job_request.work_type != "remote":  # فقط برای کارهای غیردورکاری
         location_match = calculate_location_match(student_request, job_request)
-        score += location_match * 0.1
+        score += location_match * LOCATION_WEIGHT
     else:
-        score += 0.1  # برای کارهای دورکاری، امتیاز کامل
-    total_weight += 0.1
+        score += LOCATION_WEIGHT  # برای کارهای دورکاری، امتیاز کامل
+    total_weight += LOCATION_WEIGHT
     
     # 6. تطبیق حقوق (وزن: 0.05)
     salary_match = calculate_salary_match(student_request, job_request)
-    score += salary_match * 0.05
-    total_weight += 0.05
+    score += salary_match * SALARY_WEIGHT
+    total_weight += SALARY_WEIGHT
     
     # محاسبه امتیاز نهایی
     if total_weight > 0:
@@ -71,25 +77,49 @@ def calculate_match_score(student_request, company_or_job_request):
     return min(final_score, 1.0)  # حداکثر امتیاز 1
 
 
+def max_score_without_overlap():
+    """
+    بیشترین امتیاز جفتی که نه رشته یکسان یا مشابه و نه مهارت مشترکی دارد
+
+    همه مؤلفه‌های دیگر کامل فرض و با همان ترتیب جمع calculate_match_score
+    محاسبه می‌شوند، پس نتیجه دقیقاً بزرگ‌ترین امتیازی است که چنین جفتی
+    می‌گیرد (با حساب دقیق (1 - وزن رشته - وزن مهارت) = 0.5).
+    """
+    score = 0.0 + 0.0 + JOB_TYPE_WEIGHT + WORK_TYPE_WEIGHT + 0.0 * SKILLS_WEIGHT + LOCATION_WEIGHT + 1.0 * SALARY_WEIGHT
+    total_weight = 0.0 + FIELD_WEIGHT + JOB_TYPE_WEIGHT + WORK_TYPE_WEIGHT + SKILLS_WEIGHT + LOCATION_WEIGHT + SALARY_WEIGHT
+    return min(score / total_weight, 1.0)
+
+
 def check_similar_fields(field1, field2):
     """بررسی شباهت رشته‌های تحصیلی"""
-    field1 = field1.lower()
-    field2 = field2.lower()
+    return (field_group_mask(field1) & field_group_mask(field2)) != 0
+
+
+def calculate_field_match(student_request, job_request):
+    """
+    امتیاز تطبیق رشته تحصیلی: 0.3 برای رشته یکسان و 0.2 برای رشته مشابه
     
-    # لیست رشته‌های مشابه
-    similar_groups = [
-        ["کامپیوتر", "نرم‌افزار", "برنامه‌نویسی", "it", "فناوری اطلاعات"],
-        ["برق", "الکترونیک", "کنترل", "مخابرات"],
-        ["مکانیک", "صنایع", "تولید"],
-        ["مدیریت", "بازرگانی", "اقتصاد", "حسابداری"],
-        ["روانشناسی", "مشاوره", "اجتماعی"],
-    ]
+    برای درخواست‌های ذخیره شده، شناسه رشته نرمال شده و گروه‌های آن هنگام
+    ذخیره ثبت شده‌اند و مقایسه عددی است.
+    """
+    if not student_request.field_of_study or not job_request.field_of_study:
+        return 0.0
     
-    for group in similar_groups:
-        if any(field in field1 for field in group) and any(field in field2 for field in group):
-            return True
+    student_field_id = getattr(student_request, 'canonical_field_id', None)
+    job_field_id = getattr(job_request, 'canonical_field_id', None)
+    if student_field_id is not None and job_field_id is not None:
+        same_field = student_field_id == job_field_id
+        similar_fields = (student_request.field_group_mask & job_request.field_group_mask) != 0
+    else:
+        same_field = (normalize_field_name(student_request.field_of_study)
+                      == normalize_field_name(job_request.field_of_study))
+        similar_fields = check_similar_fields(student_request.field_of_study, job_request.field_of_study)
     
-    return False
+    if same_field:
+        return 0.3
+    if similar_fields:
+        return 0.2
+    return 0.0
 
 
 def calculate_skills_match(student_skills, required_skills):
@@ -152,3 +182,313 @@ def calculate_salary_match(student_request, job_request):
         return 0.3
     
     return 0.5
+
+
+# ---------------------------------------------------------------------------
+# انتخاب K مچ برتر
+#
+# به‌جای ساختن لیست کامل مچ‌ها و مرتب‌سازی آن، یک heap با حداکثر K عضو
+# نگه داشته می‌شود. برای هر جفت ابتدا مؤلفه‌های ارزان (نوع شغل، نوع کار،
+# موقعیت و حقوق) محاسبه و حد بالای امتیاز با فرض بیشترین امتیاز رشته (0.3)
+# و مهارت‌ها (0.2) تخمین زده می‌شود؛ اگر این حد از K-امین امتیاز فعلی
+# بیشتر نباشد، مقایسه‌های رشته‌ای پرهزینه انجام نمی‌شود.
+# ---------------------------------------------------------------------------
+
+# حاشیه اطمینان برای خطای گرد کردن در جمع مؤلفه‌ها با ترتیب متفاوت
+_BOUND_EPSILON = 1e-9
+
+
+def _cheap_score(student_request, job_request):
+    """مجموع مؤلفه‌های ارزان امتیاز: نوع شغل، نوع کار، موقعیت و حقوق"""
+    score = 0.0
+    if student_request.job_type == job_request.job_type:
+        score += 0.2
+    if student_request.work_type == job_request.work_type:
+        score += 0.15
+    if job_request.work_type != "remote":
+        score += calculate_location_match(student_request, job_request) * 0.1
+    else:
+        score += 0.1
+    score += calculate_salary_match(student_request, job_request) * 0.05
+    return score
+
+
+def _can_qualify(bound, heap, full, min_score):
+    """آیا جفتی با این حد بالای امتیاز می‌تواند وارد K مچ برتر شود"""
+    bound += _BOUND_EPSILON
+    if full:
+        return bound > heap[0][0]
+    return bound >= min_score
+
+
+def top_k_matches(pairs, k, min_score=0.0):
+    """
+    K مچ برتر از میان جفت‌های (درخواست دانشجو، درخواست شغلی)
+    
+    Args:
+        pairs: جفت‌های (درخواست دانشجو، درخواست شغلی)
+        k: حداکثر تعداد نتایج
+        min_score: حداقل امتیاز قابل قبول
+    
+    Returns:
+        list: سه‌تایی‌های (امتیاز، درخواست دانشجو، درخواست شغلی) به ترتیب نزولی امتیاز
+    """
+    heap = []  # (امتیاز، -ترتیب ورود، درخواست دانشجو، درخواست شغلی)
+    if k <= 0:
+        return []
+    
+    for order, (student_request, job_request) in enumerate(pairs):
+        full = len(heap) >= k
+        
+        cheap = _cheap_score(student_request, job_request)
+        if not _can_qualify(cheap + 0.3 + 0.2, heap, full, min_score):
+            continue
+        
+        field = calculate_field_match(student_request, job_request)
+        if not _can_qualify(cheap + field + 0.2, heap, full, min_score):
+            continue
+        
+        score = calculate_match_score(student_request, job_request)
+        if score < min_score:
+            continue
+        
+        entry = (score, -order, student_request, job_request)
+        if not full:
+            heapq.heappush(heap, entry)
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+    
+    heap.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+    return [(score, student_request, job_request) for score, _, student_request, job_request in heap]
+
+
+# ---------------------------------------------------------------------------
+# محاسبه دسته‌ای امتیازها
+#
+# توابع زیر همان امتیاز calculate_match_score را برای یک درخواست در برابر
+# مجموعه‌ای از کاندیداها به‌صورت آرایه‌های NumPy محاسبه می‌کنند. رشته‌ها فقط
+# یک بار برای هر مقدار یکتا پردازش و به کد عددی یا bitset تبدیل می‌شوند و
+# مقایسه جفت‌ها روی این کدها انجام می‌شود. ترتیب جمع مؤلفه‌ها عیناً مانند
+# calculate_match_score است تا نتیجه بیت به بیت یکسان باشد.
+# ---------------------------------------------------------------------------
+
+_TOTAL_WEIGHT = FIELD_WEIGHT + JOB_TYPE_WEIGHT + WORK_TYPE_WEIGHT + SKILLS_WEIGHT + LOCATION_WEIGHT + SALARY_WEIGHT
+
+
+def batch_scores_for_job(job_request, student_requests):
+    """
+    محاسبه امتیاز یک درخواست شغلی در برابر مجموعه‌ای از درخواست‌های دانشجو
+    
+    Args:
+        job_request: درخواست شغلی (مدل یا دیکشنری حاصل از values())
+        student_requests: درخواست‌های دانشجو (مدل یا دیکشنری)
+    
+    Returns:
+        numpy.ndarray: امتیاز هر درخواست دانشجو به همان ترتیب ورودی
+    """
+    return _batch_match_scores(list(student_requests), [job_request])
+
+
+def batch_scores_for_student(student_request, job_requests):
+    """
+    محاسبه امتیاز یک درخواست دانشجو در برابر مجموعه‌ای از درخواست‌های شغلی
+    
+    Args:
+        student_request: درخواست دانشجو (مدل یا دیکشنری حاصل از values())
+        job_requests: درخواست‌های شغلی (مدل یا دیکشنری)
+    
+    Returns:
+        numpy.ndarray: امتیاز هر درخواست شغلی به همان ترتیب ورودی
+    """
+    return _batch_match_scores([student_request], list(job_requests))
+
+
+STUDENT_SCORE_FIELDS = (
+    'field_of_study', 'job_type', 'work_type', 'skills', 'city', 'province', 'expected_salary',
+)
+
+JOB_SCORE_FIELDS = (
+    'field_of_study', 'job_type', 'work_type', 'required_skills', 'city', 'province',
+    'min_salary', 'max_salary',
+)
+
+
+def _columns(requests, names):
+    """استخراج ستون‌های لازم از مدل‌ها یا دیکشنری‌ها"""
+    if requests and isinstance(requests[0], dict):
+        getter = operator.itemgetter(*names)
+    else:
+        getter = operator.attrgetter(*names)
+    rows = [getter(obj) for obj in requests]
+    return dict(zip(names, zip(*rows)))
+
+
+def _encode(np, values, encode):
+    """تبدیل ستون به آرایه عددی؛ encode برای هر مقدار یکتا فقط یک بار اجرا می‌شود"""
+    codes = {value: encode(value) for value in set(values)}
+    return np.fromiter(map(codes.__getitem__, values), dtype=np.int64, count=len(values))
+
+
+class _Vocabulary(dict):
+    """واژگان رشته‌ها؛ هر رشته یکتا یک کد عددی می‌گیرد"""
+    
+    def code(self, value):
+        return self.setdefault(value, len(self))
+    
+    def lowered_code(self, value):
+        """کد بدون حساسیت به حروف؛ مقادیر خالی کد -1 می‌گیرند"""
+        if not value:
+            return -1
+        return self.code(value.lower())
+
+
+def _tokenize_skills(np, skills_column, vocabulary):
+    """
+    تبدیل رشته مهارت‌ها به کد توکن‌ها
+
+    Returns:
+        tuple: (کد توکن‌ها پشت سر هم، شماره ردیف هر توکن، ماسک ردیف‌های دارای مهارت)
+    """
+    cache = {}
+    tokens = []
+    owners = []
+    valid = np.zeros(len(skills_column), dtype=bool)
+    for row, skills in enumerate(skills_column):
+        if not skills:
+            continue
+        valid[row] = True
+        if skills not in cache:
+            cache[skills] = [
+                vocabulary.code(skill.strip().lower()) for skill in skills.split(",")
+            ]
+        row_tokens = cache[skills]
+        tokens.extend(row_tokens)
+        owners.extend([row] * len(row_tokens))
+    return np.asarray(tokens, dtype=np.intp), np.asarray(owners, dtype=np.intp), valid
+
+
+def _skills_matches(np, student_skills, required_skills, n):
+    """
+    محاسبه دسته‌ای calculate_skills_match
+
+    هر مهارت یکتا فقط یک بار با هر مهارت مورد نیاز یکتا مقایسه می‌شود و
+    نتیجه در یک ماتریس بولی نگهداری می‌شود؛ پوشش مهارت‌های هر دانشجو با
+    OR ستون‌های این ماتریس به دست می‌آید.
+    """
+    student_vocabulary = _Vocabulary()
+    required_vocabulary = _Vocabulary()
+    s_tokens, s_owners, s_valid = _tokenize_skills(np, student_skills, student_vocabulary)
+    r_tokens, r_owners, r_valid = _tokenize_skills(np, required_skills, required_vocabulary)
+    
+    result = np.zeros(n, dtype=np.float64)
+    valid = np.broadcast_to(s_valid, (n,)) & np.broadcast_to(r_valid, (n,))
+    if not valid.any():
+        return result
+    
+    # ماتریس تطبیق مهارت‌های یکتا: مورد نیاز × دانشجو
+    token_match = np.zeros((len(required_vocabulary), len(student_vocabulary)), dtype=bool)
+    for required_skill, r in required_vocabulary.items():
+        for student_skill, s in student_vocabulary.items():
+            if required_skill in student_skill or student_skill in required_skill:
+                token_match[r, s] = True
+    
+    # پوشش مهارت‌های مورد نیاز برای هر دانشجو: مورد نیاز × دانشجو
+    coverage = np.zeros((len(required_vocabulary), len(student_skills)), dtype=bool)
+    np.logical_or.at(coverage.T, s_owners, token_match[:, s_tokens].T)
+    
+    # هر رخداد مهارت مورد نیاز به جفت (دانشجو، درخواست شغلی) متناظرش نگاشت می‌شود
+    if len(required_skills) == 1:
+        pairs = np.repeat(np.arange(n), len(r_tokens))
+        occurrence_tokens = np.tile(r_tokens, n)
+    else:
+        pairs = r_owners
+        occurrence_tokens = r_tokens
+    students = pairs if len(student_skills) > 1 else np.zeros_like(pairs)
+    
+    hits = coverage[occurrence_tokens, students]
+    matched = np.bincount(pairs, weights=hits, minlength=n)
+    required_count = np.bincount(pairs, minlength=n)
+    
+    result[valid] = matched[valid] / required_count[valid]
+    return result
+
+
+def _batch_match_scores(student_requests, job_requests):
+    """
+    محاسبه امتیاز جفت‌های (دانشجو، درخواست شغلی)
+
+    یکی از دو لیست می‌تواند تک‌عضوی باشد و در برابر همه اعضای لیست دیگر
+    سنجیده شود؛ در غیر این صورت دو لیست هم‌طول جفت به جفت سنجیده می‌شوند.
+    """
+    import numpy as np
+    
+    n = max(len(student_requests), len(job_requests))
+    if not student_requests or not job_requests:
+        return np.zeros(0, dtype=np.float64)
+    
+    student = _columns(student_requests, STUDENT_SCORE_FIELDS)
+    job = _columns(job_requests, JOB_SCORE_FIELDS)
+    
+    fields = _Vocabulary()
+    places = _Vocabulary()
+    choices = _Vocabulary()
+    
+    # 1. تطبیق رشته تحصیلی (وزن: 0.3)
+    s_field = _encode(np, student['field_of_study'], fields.lowered_code)
+    j_field = _encode(np, job['field_of_study'], fields.lowered_code)
+    s_group = _encode(np, student['field_of_study'], field_group_mask)
+    j_group = _encode(np, job['field_of_study'], field_group_mask)
+    has_fields = (s_field >= 0) & (j_field >= 0)
+    same_field = has_fields & (s_field == j_field)
+    similar_field = has_fields & ~same_field & ((s_group & j_group) != 0)
+    field_score = np.where(same_field, 0.3, np.where(similar_field, 0.2, 0.0))
+    
+    # 2. تطبیق نوع شغل (وزن: 0.2)
+    s_job_type = _encode(np, student['job_type'], choices.code)
+    j_job_type = _encode(np, job['job_type'], choices.code)
+    job_type_score = np.where(s_job_type == j_job_type, 0.2, 0.0)
+    
+    # 3. تطبیق نوع کار (وزن: 0.15)
+    s_work_type = _encode(np, student['work_type'], choices.code)
+    j_work_type = _encode(np, job['work_type'], choices.code)
+    work_type_score = np.where(s_work_type == j_work_type, 0.15, 0.0)
+    
+    # 4. تطبیق مهارت‌ها (وزن: 0.2)
+    skills_score = _skills_matches(np, student['skills'], job['required_skills'], n) * 0.2
+    
+    # 5. تطبیق موقعیت جغرافیایی (وزن: 0.1)
+    s_city = _encode(np, student['city'], places.lowered_code)
+    j_city = _encode(np, job['city'], places.lowered_code)
+    s_province = _encode(np, student['province'], places.lowered_code)
+    j_province = _encode(np, job['province'], places.lowered_code)
+    has_cities = (s_city >= 0) & (j_city >= 0)
+    same_province = (s_province >= 0) & (s_province == j_province)
+    location_match = np.where(
+        ~has_cities, 0.5,
+        np.where(s_city == j_city, 1.0, np.where(same_province, 0.7, 0.0))
+    )
+    remote = j_work_type == choices.code("remote")
+    location_score = np.where(remote, 0.1, location_match * 0.1)
+    
+    # 6. تطبیق حقوق (وزن: 0.05)
+    expected = _encode(np, student['expected_salary'], lambda value: value or 0)
+    min_salary = _encode(np, job['min_salary'], lambda value: value or 0)
+    max_salary = _encode(np, job['max_salary'], lambda value: value or 0)
+    max_salary = np.where(max_salary != 0, max_salary, min_salary * 2)
+    salary_match = np.where(
+        (expected == 0) | (min_salary == 0), 0.5,
+        np.where((min_salary <= expected) & (expected <= max_salary), 1.0,
+                 np.where(expected < min_salary, 0.8, 0.3))
+    )
+    salary_score = salary_match * 0.05
+    
+    # جمع مؤلفه‌ها به همان ترتیب calculate_match_score
+    score = np.zeros(n, dtype=np.float64)
+    score += field_score
+    score += job_type_score
+    score += work_type_score
+    score += skills_score
+    score += location_score
+    score += salary_score
+    
+    return np.minimum(score / _TOTAL_WEIGHT, 1.0)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('matching', '0001_initial'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='امتیاز')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاریخ به\u200cروزرسانی')),
+                ('job_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='companies.jobrequest', verbose_name='درخواست شغلی')),
+                ('student_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='students.studentrequest', verbose_name='درخواست دانشجو')),
+            ],
+            options={
+                'verbose_name': 'امتیاز مچینگ',
+                'verbose_name_plural': 'امتیازهای مچینگ',
+                'indexes': [models.Index(fields=['job_request', '-score'], name='matchscore_job_score_idx'), models.Index(fields=['student_request', '-score'], name='matchscore_student_score_idx')],
+                'unique_together': {('student_request', 'job_request')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:57
+
+from django.db import migrations, models
+
+
+def build_skill_index(apps, schema_editor):
+    from matching.skill_index import normalize_skills
+
+    Skill = apps.get_model('matching', 'Skill')
+    StudentRequest = apps.get_model('students', 'StudentRequest')
+    JobRequest = apps.get_model('companies', 'JobRequest')
+
+    for model, skills_field in ((StudentRequest, 'skills'), (JobRequest, 'required_skills')):
+        for instance in model.objects.iterator():
+            names = normalize_skills(getattr(instance, skills_field))
+            Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True)
+            instance.skill_set.set(Skill.objects.filter(name__in=names))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('matching', '0002_matchscore'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(unique=True, verbose_name='نام مهارت')),
+                ('job_requests', models.ManyToManyField(blank=True, related_name='skill_set', to='companies.jobrequest', verbose_name='درخواست\u200cهای شغلی')),
+                ('student_requests', models.ManyToManyField(blank=True, related_name='skill_set', to='students.studentrequest', verbose_name='درخواست\u200cهای دانشجو')),
+            ],
+            options={
+                'verbose_name': 'مهارت',
+                'verbose_name_plural': 'مهارت\u200cها',
+            },
+        ),
+        migrations.RunPython(build_skill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0003_skill'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchRecomputeTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('student_request', 'درخواست دانشجو'), ('job_request', 'درخواست شغلی')], max_length=20, verbose_name='نوع درخواست')),
+                ('entity_id', models.PositiveBigIntegerField(verbose_name='شناسه درخواست')),
+                ('requested_at', models.DateTimeField(verbose_name='زمان درخواست')),
+            ],
+            options={
+                'verbose_name': 'وظیفه محاسبه مچینگ',
+                'verbose_name_plural': 'وظایف محاسبه مچینگ',
+                'indexes': [models.Index(fields=['requested_at'], name='recompute_requested_idx')],
+                'unique_together': {('entity_type', 'entity_id')},
+            },
+        ),
+    ]
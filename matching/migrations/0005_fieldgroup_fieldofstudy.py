@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+# گروه‌های اولیه؛ همان لیست ثابت قبلی check_similar_fields
+SIMILAR_FIELD_GROUPS = [
+    ('کامپیوتر', ["کامپیوتر", "نرم‌افزار", "برنامه‌نویسی", "it", "فناوری اطلاعات"]),
+    ('برق', ["برق", "الکترونیک", "کنترل", "مخابرات"]),
+    ('مکانیک', ["مکانیک", "صنایع", "تولید"]),
+    ('مدیریت', ["مدیریت", "بازرگانی", "اقتصاد", "حسابداری"]),
+    ('روانشناسی', ["روانشناسی", "مشاوره", "اجتماعی"]),
+]
+
+
+def create_field_groups(apps, schema_editor):
+    FieldGroup = apps.get_model('matching', 'FieldGroup')
+    for name, keywords in SIMILAR_FIELD_GROUPS:
+        FieldGroup.objects.create(name=name, keywords=', '.join(keywords))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0004_matchrecomputetask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='نام گروه')),
+                ('keywords', models.TextField(help_text='کلیدواژه\u200cها با کاما جدا شوند', verbose_name='کلیدواژه\u200cها')),
+            ],
+            options={
+                'verbose_name': 'گروه رشته تحصیلی',
+                'verbose_name_plural': 'گروه\u200cهای رشته تحصیلی',
+            },
+        ),
+        migrations.CreateModel(
+            name='FieldOfStudy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(unique=True, verbose_name='نام رشته')),
+                ('group_mask', models.BigIntegerField(default=0, verbose_name='گروه\u200cها')),
+            ],
+            options={
+                'verbose_name': 'رشته تحصیلی',
+                'verbose_name_plural': 'رشته\u200cهای تحصیلی',
+            },
+        ),
+        migrations.RunPython(create_field_groups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def assign_canonical_fields(apps, schema_editor):
+    FieldGroup = apps.get_model('matching', 'FieldGroup')
+    FieldOfStudy = apps.get_model('matching', 'FieldOfStudy')
+    StudentRequest = apps.get_model('students', 'StudentRequest')
+    JobRequest = apps.get_model('companies', 'JobRequest')
+
+    groups = [
+        (1 << (group.pk - 1), [keyword.strip().lower() for keyword in group.keywords.split(",") if keyword.strip()])
+        for group in FieldGroup.objects.all()
+    ]
+
+    for model in (StudentRequest, JobRequest):
+        for instance in model.objects.exclude(field_of_study='').exclude(field_of_study__isnull=True).iterator():
+            name = instance.field_of_study.lower()
+            mask = 0
+            for bit, keywords in groups:
+                if any(keyword in name for keyword in keywords):
+                    mask |= bit
+            field, _ = FieldOfStudy.objects.get_or_create(name=name, defaults={'group_mask': mask})
+            model.objects.filter(pk=instance.pk).update(canonical_field=field, field_group_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_jobrequest_canonical_field_and_more'),
+        ('matching', '0005_fieldgroup_fieldofstudy'),
+        ('students', '0002_studentprofile_additional_info_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_canonical_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0006_assign_canonical_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchRebuildShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_job_request_id', models.PositiveBigIntegerField(verbose_name='اولین درخواست شغلی')),
+                ('last_job_request_id', models.PositiveBigIntegerField(verbose_name='آخرین درخواست شغلی')),
+                ('pairs_scored', models.PositiveBigIntegerField(default=0, verbose_name='تعداد جفت\u200cهای امتیازدهی شده')),
+                ('completed_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ تکمیل')),
+            ],
+            options={
+                'verbose_name': 'بخش بازسازی امتیازها',
+                'verbose_name_plural': 'بخش\u200cهای بازسازی امتیازها',
+                'unique_together': {('first_job_request_id', 'last_job_request_id')},
+            },
+        ),
+    ]
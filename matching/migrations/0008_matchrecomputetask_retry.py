@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0007_matchrebuildshard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchrecomputetask',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='تعداد تلاش\u200cهای ناموفق'),
+        ),
+        migrations.AddField(
+            model_name='matchrecomputetask',
+            name='run_after',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='اجرا پس از'),
+        ),
+        migrations.AddIndex(
+            model_name='matchrecomputetask',
+            index=models.Index(fields=['attempts', 'run_after'], name='recompute_due_idx'),
+        ),
+    ]
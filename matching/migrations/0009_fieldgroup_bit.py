@@ -0,0 +1,49 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+def assign_bits(apps, schema_editor):
+    FieldGroup = apps.get_model('matching', 'FieldGroup')
+
+    # گروه‌های موجود همان بیت (id - 1) قبلی را نگه می‌دارند تا maskهای ذخیره شده معتبر بمانند
+    used = set()
+    overflow = []
+    for group in FieldGroup.objects.order_by('pk'):
+        if group.pk <= 63:
+            group.bit = group.pk - 1
+            group.save(update_fields=['bit'])
+            used.add(group.bit)
+        else:
+            overflow.append(group)
+
+    free = (bit for bit in range(63) if bit not in used)
+    for group in overflow:
+        group.bit = next(free, None)
+        if group.bit is None:
+            raise RuntimeError('بیش از 63 گروه رشته تحصیلی وجود دارد')
+        group.save(update_fields=['bit'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0008_matchrecomputetask_retry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fieldgroup',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='شماره بیت'),
+        ),
+        migrations.RunPython(assign_bits, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='fieldgroup',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, unique=True, validators=[django.core.validators.MaxValueValidator(62)], verbose_name='شماره بیت'),
+        ),
+        migrations.AddConstraint(
+            model_name='fieldgroup',
+            constraint=models.CheckConstraint(condition=models.Q(('bit__lt', 63)), name='fieldgroup_bit_range'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0009_fieldgroup_bit'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='matchrecomputetask',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='تعداد تلاش\u200cها'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+def mark_suggested(apps, schema_editor):
+    Match = apps.get_model('matching', 'Match')
+
+    # مچ‌های در انتظاری که materialize_matches ساخته و شرکت هنوز انتخاب نکرده است
+    Match.objects.filter(
+        status='pending', history__message='مچینگ به‌صورت خودکار ایجاد شد'
+    ).exclude(
+        history__message='شرکت کاندیدا را انتخاب کرد'
+    ).update(status='suggested')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0010_matchrecomputetask_attempts_label'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='match',
+            name='status',
+            field=models.CharField(choices=[('suggested', 'پیشنهاد سیستم'), ('pending', 'در انتظار'), ('accepted', 'پذیرفته شده'), ('rejected', 'رد شده'), ('expired', 'منقضی شده')], default='pending', max_length=20, verbose_name='وضعیت'),
+        ),
+        migrations.RunPython(mark_suggested, migrations.RunPython.noop),
+    ]
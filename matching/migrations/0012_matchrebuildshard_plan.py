@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:04
+
+from django.db import migrations, models
+
+
+def drop_old_progress(apps, schema_editor):
+    # بخش‌های قبلی فقط بازه شناسه‌ها را داشتند و قابل ادامه نیستند
+    apps.get_model('matching', 'MatchRebuildShard').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0011_match_suggested_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_old_progress, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='matchrebuildshard',
+            options={'ordering': ['id'], 'verbose_name': 'بخش بازسازی امتیازها', 'verbose_name_plural': 'بخش\u200cهای بازسازی امتیازها'},
+        ),
+        migrations.AlterUniqueTogether(
+            name='matchrebuildshard',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='matchrebuildshard',
+            name='job_request_ids',
+            field=models.JSONField(default=list, verbose_name='درخواست\u200cهای شغلی'),
+        ),
+        migrations.AlterField(
+            model_name='matchrebuildshard',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='تاریخ تکمیل'),
+        ),
+    ]
@@ -1,14 +1,22 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
 
+# field_group_mask یک BigIntegerField علامت‌دار است؛ بیت 63 آن را منفی می‌کند
+MAX_FIELD_GROUPS = 63
+
 
 class Match(models.Model):
     """مچینگ بین دانشجو و شرکت"""
     
     STATUS_CHOICES = [
+        # ساخته شده توسط materialize_matches؛ هنوز توسط شرکت انتخاب نشده
+        ('suggested', 'پیشنهاد سیستم'),
         ('pending', 'در انتظار'),
         ('accepted', 'پذیرفته شده'),
         ('rejected', 'رد شده'),
@@ -163,3 +171,254 @@ class MatchHistory(models.Model):
     
     def __str__(self):
         return f"{self.match} - {self.get_action_display()}"
+
+
+class MatchScore(models.Model):
+    """امتیاز از پیش محاسبه شده بین درخواست دانشجو و درخواست شغلی"""
+    
+    student_request = models.ForeignKey(
+        'students.StudentRequest',
+        on_delete=models.CASCADE,
+        related_name='match_scores',
+        verbose_name='درخواست دانشجو'
+    )
+    
+    job_request = models.ForeignKey(
+        'companies.JobRequest',
+        on_delete=models.CASCADE,
+        related_name='match_scores',
+        verbose_name='درخواست شغلی'
+    )
+    
+    score = models.FloatField(
+        verbose_name='امتیاز'
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='تاریخ به‌روزرسانی'
+    )
+    
+    class Meta:
+        verbose_name = 'امتیاز مچینگ'
+        verbose_name_plural = 'امتیازهای مچینگ'
+        unique_together = ['student_request', 'job_request']
+        indexes = [
+            models.Index(fields=['job_request', '-score'], name='matchscore_job_score_idx'),
+            models.Index(fields=['student_request', '-score'], name='matchscore_student_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.student_request_id} - {self.job_request_id}: {self.score:.2f}"
+
+
+class Skill(models.Model):
+    """مهارت نرمال شده؛ نمایه معکوس مهارت به درخواست‌های دانشجو و شرکت"""
+    
+    name = models.TextField(
+        unique=True,
+        verbose_name='نام مهارت'
+    )
+    
+    student_requests = models.ManyToManyField(
+        'students.StudentRequest',
+        blank=True,
+        related_name='skill_set',
+        verbose_name='درخواست‌های دانشجو'
+    )
+    
+    job_requests = models.ManyToManyField(
+        'companies.JobRequest',
+        blank=True,
+        related_name='skill_set',
+        verbose_name='درخواست‌های شغلی'
+    )
+    
+    class Meta:
+        verbose_name = 'مهارت'
+        verbose_name_plural = 'مهارت‌ها'
+    
+    def __str__(self):
+        return self.name
+
+
+class MatchRecomputeTask(models.Model):
+    """
+    صف محاسبه مجدد امتیازهای مچینگ
+    
+    برای هر درخواست حداکثر یک ردیف وجود دارد؛ ذخیره‌های پشت سر هم فقط زمان
+    درخواست را به‌روز می‌کنند و در یک بار محاسبه ادغام می‌شوند. وظیفه در حال
+    اجرا تا run_after اجاره شده و فقط پس از اجرای موفق حذف می‌شود؛ وظایف
+    ناموفق با تأخیر تصاعدی دوباره اجرا و پس از MAX_ATTEMPTS تلاش کنار
+    گذاشته می‌شوند.
+    """
+    
+    ENTITY_TYPE_CHOICES = [
+        ('student_request', 'درخواست دانشجو'),
+        ('job_request', 'درخواست شغلی'),
+    ]
+    
+    entity_type = models.CharField(
+        max_length=20,
+        choices=ENTITY_TYPE_CHOICES,
+        verbose_name='نوع درخواست'
+    )
+    
+    entity_id = models.PositiveBigIntegerField(
+        verbose_name='شناسه درخواست'
+    )
+    
+    requested_at = models.DateTimeField(
+        verbose_name='زمان درخواست'
+    )
+    
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='تعداد تلاش‌ها'
+    )
+    
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='اجرا پس از'
+    )
+    
+    class Meta:
+        verbose_name = 'وظیفه محاسبه مچینگ'
+        verbose_name_plural = 'وظایف محاسبه مچینگ'
+        unique_together = ['entity_type', 'entity_id']
+        indexes = [
+            models.Index(fields=['requested_at'], name='recompute_requested_idx'),
+            models.Index(fields=['attempts', 'run_after'], name='recompute_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_entity_type_display()} {self.entity_id}"
+
+
+class FieldGroup(models.Model):
+    """
+    گروه رشته‌های تحصیلی مشابه
+    
+    رشته‌ای که شامل یکی از کلیدواژه‌های گروه باشد عضو آن گروه است. هر گروه
+    یک بیت از field_group_mask را اشغال می‌کند؛ گروه تازه کوچک‌ترین بیت آزاد
+    را می‌گیرد، پس بیت گروه‌های حذف شده دوباره استفاده می‌شود و حداکثر
+    MAX_FIELD_GROUPS گروه هم‌زمان پشتیبانی می‌شود. پس از تغییر گروه‌ها
+    امتیازها با دستور rebuild_match_scores بازسازی شوند.
+    """
+    
+    name = models.CharField(
+        max_length=100,
+        verbose_name='نام گروه'
+    )
+    
+    keywords = models.TextField(
+        help_text='کلیدواژه‌ها با کاما جدا شوند',
+        verbose_name='کلیدواژه‌ها'
+    )
+    
+    bit = models.PositiveSmallIntegerField(
+        unique=True,
+        editable=False,
+        validators=[MaxValueValidator(MAX_FIELD_GROUPS - 1)],
+        verbose_name='شماره بیت'
+    )
+    
+    class Meta:
+        verbose_name = 'گروه رشته تحصیلی'
+        verbose_name_plural = 'گروه‌های رشته تحصیلی'
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(bit__lt=MAX_FIELD_GROUPS),
+                name='fieldgroup_bit_range',
+            ),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    def clean(self):
+        if self.bit is None and self.free_bit() is None:
+            raise ValidationError(f'حداکثر {MAX_FIELD_GROUPS} گروه رشته تحصیلی پشتیبانی می‌شود')
+    
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            self.bit = self.free_bit()
+            if self.bit is None:
+                raise ValidationError(f'حداکثر {MAX_FIELD_GROUPS} گروه رشته تحصیلی پشتیبانی می‌شود')
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def free_bit(cls):
+        """کوچک‌ترین بیت بدون گروه؛ None اگر همه بیت‌ها اشغال باشند"""
+        used = set(cls.objects.values_list('bit', flat=True))
+        return next((bit for bit in range(MAX_FIELD_GROUPS) if bit not in used), None)
+    
+    @property
+    def mask(self):
+        return 1 << self.bit
+    
+    def keyword_list(self):
+        return [keyword.strip().lower() for keyword in self.keywords.split(",") if keyword.strip()]
+
+
+class FieldOfStudy(models.Model):
+    """رشته تحصیلی نرمال شده (حروف کوچک) به همراه گروه‌های مشابه آن"""
+    
+    name = models.TextField(
+        unique=True,
+        verbose_name='نام رشته'
+    )
+    
+    group_mask = models.BigIntegerField(
+        default=0,
+        verbose_name='گروه‌ها'
+    )
+    
+    class Meta:
+        verbose_name = 'رشته تحصیلی'
+        verbose_name_plural = 'رشته‌های تحصیلی'
+    
+    def __str__(self):
+        return self.name
+
+
+class MatchRebuildShard(models.Model):
+    """
+    بخش برنامه بازسازی کامل امتیازها
+    
+    برنامه (شناسه درخواست‌های شغلی هر بخش) در شروع بازسازی ذخیره می‌شود تا
+    ادامه بازسازی پس از توقف، حتی اگر درخواست‌هایی در این فاصله فعال یا
+    غیرفعال شده باشند، همان بخش‌ها را ادامه دهد.
+    """
+    
+    first_job_request_id = models.PositiveBigIntegerField(
+        verbose_name='اولین درخواست شغلی'
+    )
+    
+    last_job_request_id = models.PositiveBigIntegerField(
+        verbose_name='آخرین درخواست شغلی'
+    )
+    
+    job_request_ids = models.JSONField(
+        default=list,
+        verbose_name='درخواست‌های شغلی'
+    )
+    
+    pairs_scored = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='تعداد جفت‌های امتیازدهی شده'
+    )
+    
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='تاریخ تکمیل'
+    )
+    
+    class Meta:
+        verbose_name = 'بخش بازسازی امتیازها'
+        verbose_name_plural = 'بخش‌های بازسازی امتیازها'
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.first_job_request_id}-{self.last_job_request_id}"
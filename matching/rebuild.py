@@ -0,0 +1,217 @@
+"""
+بازسازی کامل و موازی جدول امتیازهای مچینگ
+
+درخواست‌های شغلی فعال به بخش‌هایی (shard) و درخواست‌های دانشجوی فعال به
+بازه‌های شناسه تقسیم می‌شوند و هر جفت (بخش، بازه) یک کار برای پردازه‌های
+ProcessPoolExecutor است. هر کار امتیازها را با موتور دسته‌ای محاسبه و فقط
+نتیجه همان بازه را برمی‌گرداند، پس حجم هر نتیجه محدود است؛ همه نوشتن‌ها در
+پردازه اصلی و در دسته‌های کوچک انجام می‌شوند تا پردازه‌ها روی قفل نوشتن
+پایگاه داده (به‌ویژه SQLite) منتظر هم نمانند. برنامه بخش‌ها در شروع
+بازسازی در MatchRebuildShard ذخیره می‌شود تا بازسازی متوقف شده با همان
+بخش‌ها ادامه یابد.
+"""
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+
+from django.db import connections
+from django.utils import timezone
+
+from .matching_algorithm import JOB_SCORE_FIELDS, STUDENT_SCORE_FIELDS, batch_scores_for_job
+from .models import MatchRebuildShard, MatchScore
+from .score_store import BATCH_SIZE, MIN_STORED_SCORE
+
+
+def plan_shards(shard_size):
+    """تقسیم شناسه درخواست‌های شغلی فعال به بخش‌های مرتب"""
+    from companies.models import JobRequest
+
+    job_ids = list(JobRequest.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+    return [job_ids[i:i + shard_size] for i in range(0, len(job_ids), shard_size)]
+
+
+def plan_student_ranges(batch_size):
+    """
+    بازه‌های (کمینه، بیشینه) شناسه درخواست‌های دانشجوی فعال با حداکثر batch_size درخواست
+
+    اولین و آخرین بازه باز هستند تا درخواست‌های تازه هم پوشش داده شوند.
+    """
+    from students.models import StudentRequest
+
+    ids = list(StudentRequest.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+    starts = ids[batch_size::batch_size]
+    lows = [None] + starts
+    highs = [start - 1 for start in starts] + [None]
+    return list(zip(lows, highs))
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+class _InlineExecutor:
+    """اجرای کارها در همین پردازه (workers=0)؛ برای آزمون‌ها و اشکال‌زدایی"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def score_shard(job_ids, student_range=(None, None), batch_size=BATCH_SIZE):
+    """
+    محاسبه امتیازهای یک بخش از درخواست‌های شغلی در برابر یک بازه از درخواست‌های دانشجو
+
+    در پردازه فرزند اجرا می‌شود و چیزی نمی‌نویسد.
+
+    Returns:
+        tuple: (تعداد جفت‌های امتیازدهی شده، لیست (شناسه درخواست دانشجو، شناسه درخواست شغلی، امتیاز))
+    """
+    from companies.models import JobRequest
+    from students.models import StudentRequest
+
+    jobs = list(JobRequest.objects.filter(id__in=job_ids, is_active=True).values('id', *JOB_SCORE_FIELDS))
+    students = StudentRequest.objects.filter(is_active=True)
+    low, high = student_range
+    if low is not None:
+        students = students.filter(id__gte=low)
+    if high is not None:
+        students = students.filter(id__lte=high)
+    students = students.order_by('id').values('id', *STUDENT_SCORE_FIELDS)
+
+    pairs = 0
+    scores = []
+    chunk = []
+    for student in students.iterator(chunk_size=batch_size):
+        chunk.append(student)
+        if len(chunk) >= batch_size:
+            pairs += _score_chunk(jobs, chunk, scores)
+            chunk = []
+    if chunk:
+        pairs += _score_chunk(jobs, chunk, scores)
+    return pairs, scores
+
+
+def _score_chunk(jobs, students, scores):
+    for job in jobs:
+        job_scores = batch_scores_for_job(job, students)
+        for student, score in zip(students, job_scores.tolist()):
+            if score >= MIN_STORED_SCORE:
+                scores.append((student['id'], job['id'], score))
+    return len(jobs) * len(students)
+
+
+def write_scores(scores, batch_size=BATCH_SIZE):
+    """upsert امتیازها در دسته‌های batch_size، هر دسته در تراکنش کوتاه خود"""
+    for start in range(0, len(scores), batch_size):
+        MatchScore.objects.bulk_create(
+            [
+                MatchScore(student_request_id=student_request_id, job_request_id=job_request_id, score=score)
+                for student_request_id, job_request_id, score in scores[start:start + batch_size]
+            ],
+            update_conflicts=True,
+            unique_fields=['student_request', 'job_request'],
+            update_fields=['score', 'updated_at'],
+        )
+
+
+def remove_stale_scores(job_ids, before):
+    """حذف امتیازهای بخش که از before به بعد نوشته نشده‌اند (دیگر بالای حد نصاب نیستند)"""
+    MatchScore.objects.filter(job_request_id__in=job_ids, updated_at__lt=before).delete()
+
+
+def write_shard_scores(job_ids, scores, batch_size=BATCH_SIZE):
+    """
+    ذخیره همه امتیازهای یک بخش و حذف امتیازهای قدیمی آن
+
+    امتیازهای بخش هیچ‌وقت به‌طور کامل خالی نمی‌شوند.
+    """
+    started_at = timezone.now()
+    write_scores(scores, batch_size)
+    remove_stale_scores(job_ids, started_at)
+
+
+def _plan(shard_size, resume):
+    """بخش‌های تکمیل نشده برنامه قبلی، یا برنامه تازه"""
+    if resume:
+        pending = list(MatchRebuildShard.objects.filter(completed_at__isnull=True))
+        if pending:
+            return pending
+
+    MatchRebuildShard.objects.all().delete()
+    return MatchRebuildShard.objects.bulk_create([
+        MatchRebuildShard(first_job_request_id=shard[0], last_job_request_id=shard[-1], job_request_ids=shard)
+        for shard in plan_shards(shard_size)
+    ])
+
+
+def rebuild_scores(workers=None, shard_size=50, batch_size=BATCH_SIZE, resume=False, progress=None):
+    """
+    بازسازی کامل امتیازها با چند پردازه
+
+    با resume بخش‌های تکمیل نشده برنامه ذخیره شده ادامه می‌یابند؛ درخواست‌های
+    شغلی که پس از شروع برنامه فعال شده‌اند توسط صف run_match_worker امتیاز
+    می‌گیرند.
+
+    Args:
+        workers: تعداد پردازه‌ها؛ پیش‌فرض تعداد هسته‌ها و 0 برای اجرا در همین پردازه
+        shard_size: تعداد درخواست‌های شغلی هر بخش
+        batch_size: تعداد درخواست‌های دانشجو در هر کار و دسته و ردیف‌ها در هر bulk_create
+        resume: ادامه بازسازی قبلی و رد شدن از بخش‌های تکمیل شده
+        progress: تابعی که پس از هر بخش با (بخش‌های تکمیل شده، کل بخش‌ها، جفت‌ها، ثانیه‌ها) فراخوانی می‌شود
+
+    Returns:
+        int: تعداد جفت‌های امتیازدهی شده در این اجرا
+    """
+    started_at = timezone.now()
+    MatchScore.objects.exclude(job_request__is_active=True, student_request__is_active=True).delete()
+
+    shards = _plan(shard_size, resume)
+    student_ranges = plan_student_ranges(batch_size)
+
+    if workers == 0:
+        executor = _InlineExecutor()
+    else:
+        # پردازه‌های فرزند باید اتصال پایگاه داده خود را باز کنند
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+    started = time.monotonic()
+    total_pairs = 0
+    done = 0
+    with executor:
+        futures = {
+            executor.submit(score_shard, shard.job_request_ids, student_range, batch_size): shard
+            for shard in shards
+            for student_range in student_ranges
+        }
+        remaining = Counter(shard.pk for shard in futures.values())
+        for future in as_completed(futures):
+            shard = futures.pop(future)
+            pairs, scores = future.result()
+            write_scores(scores, batch_size)
+            shard.pairs_scored += pairs
+            total_pairs += pairs
+
+            remaining[shard.pk] -= 1
+            if remaining[shard.pk]:
+                continue
+            # همه بازه‌های بخش نوشته شده‌اند؛ امتیازهای قدیمی بخش حذف می‌شوند
+            remove_stale_scores(shard.job_request_ids, started_at)
+            shard.completed_at = timezone.now()
+            shard.save(update_fields=['pairs_scored', 'completed_at'])
+            done += 1
+            if progress:
+                progress(done, len(shards), total_pairs, time.monotonic() - started)
+    return total_pairs
@@ -0,0 +1,178 @@
+"""
+جدول امتیازهای از پیش محاسبه شده مچینگ
+
+به‌جای محاسبه امتیاز همه جفت‌های (دانشجو، درخواست شغلی) در هر بار
+نمایش صفحه، امتیازها در مدل MatchScore نگهداری می‌شوند و فقط ردیف‌های
+مربوط به درخواستی که ایجاد، ویرایش یا غیرفعال شده به‌روزرسانی می‌شوند.
+"""
+from django.db import transaction
+
+from .matching_algorithm import calculate_match_score
+from .models import Match, MatchHistory, MatchScore
+from .skill_index import candidate_job_requests, candidate_student_requests
+
+# هیچ‌کدام از صفحات مچینگ امتیاز کمتر از 50٪ را نمایش نمی‌دهند
+MIN_STORED_SCORE = 0.5
+
+BATCH_SIZE = 1000
+
+
+def _replace_scores(existing, score_objects, other_field):
+    """
+    جایگزینی امتیازهای یک درخواست با امتیازهای تازه
+
+    ردیف‌هایی از existing که در score_objects نیستند (دیگر بالای حد نصاب
+    نیستند) حذف و بقیه با یک bulk upsert درج یا به‌روزرسانی می‌شوند.
+    """
+    kept_ids = [getattr(obj, other_field) for obj in score_objects]
+    with transaction.atomic():
+        existing.exclude(**{f'{other_field}__in': kept_ids}).delete()
+        MatchScore.objects.bulk_create(
+            score_objects,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['student_request', 'job_request'],
+            update_fields=['score', 'updated_at'],
+        )
+
+
+def refresh_student_request_scores(student_request):
+    """به‌روزرسانی امتیازهای یک درخواست دانشجو در برابر درخواست‌های شغلی فعال کاندیدا"""
+    if not student_request.is_active:
+        MatchScore.objects.filter(student_request=student_request).delete()
+        return
+
+    score_objects = []
+    for job_request in candidate_job_requests(student_request, MIN_STORED_SCORE).iterator():
+        score = calculate_match_score(student_request, job_request)
+        if score >= MIN_STORED_SCORE:
+            score_objects.append(MatchScore(
+                student_request=student_request,
+                job_request=job_request,
+                score=score,
+            ))
+
+    _replace_scores(
+        MatchScore.objects.filter(student_request=student_request),
+        score_objects,
+        'job_request_id',
+    )
+
+
+def refresh_job_request_scores(job_request):
+    """به‌روزرسانی امتیازهای یک درخواست شغلی در برابر درخواست‌های دانشجوی فعال کاندیدا"""
+    if not job_request.is_active:
+        MatchScore.objects.filter(job_request=job_request).delete()
+        return
+
+    score_objects = []
+    for student_request in candidate_student_requests(job_request, MIN_STORED_SCORE).iterator():
+        score = calculate_match_score(student_request, job_request)
+        if score >= MIN_STORED_SCORE:
+            score_objects.append(MatchScore(
+                student_request=student_request,
+                job_request=job_request,
+                score=score,
+            ))
+
+    _replace_scores(
+        MatchScore.objects.filter(job_request=job_request),
+        score_objects,
+        'student_request_id',
+    )
+
+
+def materialize_matches(scores=None, batch_size=BATCH_SIZE):
+    """
+    ذخیره امتیازهای جدول MatchScore در مدل Match
+    
+    برای هر (دانشجو، درخواست شغلی) بهترین امتیاز میان درخواست‌های دانشجو با
+    bulk upsert روی کلید یکتای Match ذخیره می‌شود؛ مچ‌های تازه وضعیت
+    'suggested' می‌گیرند تا با انتخاب‌های واقعی شرکت ('pending') اشتباه
+    نشوند و وضعیت و پیام‌های مچ‌های موجود دست نمی‌خورد. برای مچ‌های تازه یک
+    رکورد 'created' در تاریخچه ثبت می‌شود.
+    
+    Args:
+        scores: زیرمجموعه‌ای از MatchScore؛ پیش‌فرض همه امتیازها
+        batch_size: تعداد ردیف‌ها در هر bulk_create
+    
+    Returns:
+        tuple: (تعداد مچ‌های ایجاد شده، تعداد مچ‌های به‌روز شده)
+    """
+    if scores is None:
+        scores = MatchScore.objects.all()
+    rows = scores.order_by(
+        'student_request__user_id', 'job_request_id', '-score'
+    ).values_list(
+        'student_request_id', 'student_request__user_id', 'job_request_id', 'job_request__company_id', 'score'
+    )
+
+    created = updated = 0
+    batch = []
+    last_key = None
+    for student_request_id, student_id, job_request_id, company_id, score in rows.iterator(chunk_size=batch_size):
+        # ردیف‌های هر کلید پشت سر هم و به ترتیب نزولی امتیاز می‌آیند
+        if (student_id, job_request_id) == last_key:
+            continue
+        last_key = (student_id, job_request_id)
+        batch.append(Match(
+            student_id=student_id,
+            company_id=company_id,
+            job_request_id=job_request_id,
+            student_request_id=student_request_id,
+            match_score=score,
+            status='suggested',
+        ))
+        if len(batch) >= batch_size:
+            batch_created, batch_updated = _upsert_matches(batch, batch_size)
+            created += batch_created
+            updated += batch_updated
+            batch = []
+
+    if batch:
+        batch_created, batch_updated = _upsert_matches(batch, batch_size)
+        created += batch_created
+        updated += batch_updated
+    return created, updated
+
+
+def _upsert_matches(matches, batch_size):
+    student_ids = {match.student_id for match in matches}
+    job_request_ids = {match.job_request_id for match in matches}
+
+    def existing_ids():
+        return {
+            (student_id, job_request_id): match_id
+            for match_id, student_id, job_request_id in Match.objects.filter(
+                student_id__in=student_ids, job_request_id__in=job_request_ids
+            ).values_list('id', 'student_id', 'job_request_id')
+        }
+
+    with transaction.atomic():
+        before = existing_ids()
+        Match.objects.bulk_create(
+            matches,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['student', 'job_request'],
+            update_fields=['student_request', 'match_score', 'updated_at'],
+        )
+        new_matches = [
+            match for match in matches
+            if (match.student_id, match.job_request_id) not in before
+        ]
+        if new_matches:
+            after = existing_ids()
+            MatchHistory.objects.bulk_create(
+                [
+                    MatchHistory(
+                        match_id=after[(match.student_id, match.job_request_id)],
+                        action='created',
+                        user_id=match.company_id,
+                        message='مچینگ به‌صورت خودکار ایجاد شد',
+                    )
+                    for match in new_matches
+                ],
+                batch_size=batch_size,
+            )
+    return len(new_matches), len(matches) - len(new_matches)
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from companies.models import JobRequest
+from students.models import StudentRequest
+from .fields_of_study import assign_field, refresh_group_masks
+from .models import FieldGroup
+from .skill_index import index_job_request, index_student_request
+from .tasks import enqueue_job_request, enqueue_student_request
+
+
+@receiver(pre_save, sender=StudentRequest)
+@receiver(pre_save, sender=JobRequest)
+def normalize_field_of_study(sender, instance, **kwargs):
+    """ثبت رشته تحصیلی نرمال شده و گروه‌های آن پیش از ذخیره"""
+    assign_field(instance)
+
+
+@receiver(post_save, sender=FieldGroup)
+@receiver(post_delete, sender=FieldGroup)
+def field_groups_changed(sender, **kwargs):
+    """به‌روزرسانی گروه‌های رشته‌ها پس از تغییر گروه‌های مشابه"""
+    refresh_group_masks()
+
+
+@receiver(post_save, sender=StudentRequest)
+def update_student_request_scores(sender, instance, **kwargs):
+    """به‌روزرسانی نمایه مهارت و ثبت محاسبه مجدد امتیازها پس از ذخیره درخواست دانشجو"""
+    index_student_request(instance)
+    enqueue_student_request(instance)
+
+
+@receiver(post_save, sender=JobRequest)
+def update_job_request_scores(sender, instance, **kwargs):
+    """به‌روزرسانی نمایه مهارت و ثبت محاسبه مجدد امتیازها پس از ذخیره درخواست شغلی"""
+    index_job_request(instance)
+    enqueue_job_request(instance)
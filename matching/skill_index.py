@@ -0,0 +1,119 @@
+"""
+نمایه معکوس مهارت‌ها برای انتخاب کاندیداها پیش از امتیازدهی
+
+کاندیدایی که هیچ مهارت مشترکی (با همان منطق زیررشته‌ای
+calculate_skills_match) و رشته تحصیلی یکسان یا مشابهی ندارد حداکثر
+امتیاز max_score_without_overlap را می‌گیرد؛ تا وقتی این حد از حد نصاب
+ذخیره کمتر است فقط کاندیداهای بازگردانده شده از این نمایه امتیازدهی
+می‌شوند و در غیر این صورت همه کاندیداهای فعال.
+"""
+from django.db.models import F, Q
+
+from .matching_algorithm import max_score_without_overlap
+from .models import Skill
+
+# حداکثر تعداد مقادیر در هر کوئری name__in
+LOOKUP_BATCH_SIZE = 500
+
+
+def normalize_skills(skills):
+    """تبدیل رشته مهارت‌ها به مجموعه مهارت‌های نرمال شده، مطابق calculate_skills_match"""
+    if not skills:
+        return set()
+    return {skill.strip().lower() for skill in skills.split(",")}
+
+
+def _index_skills(skill_set, skills):
+    names = normalize_skills(skills)
+    Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True)
+    skill_set.set(Skill.objects.filter(name__in=names))
+
+
+def index_student_request(student_request):
+    """به‌روزرسانی نمایه مهارت‌های یک درخواست دانشجو"""
+    _index_skills(student_request.skill_set, student_request.skills)
+
+
+def index_job_request(job_request):
+    """به‌روزرسانی نمایه مهارت‌های یک درخواست شغلی"""
+    _index_skills(job_request.skill_set, job_request.required_skills)
+
+
+def rebuild_skill_index():
+    """بازسازی کامل نمایه مهارت‌ها"""
+    from companies.models import JobRequest
+    from students.models import StudentRequest
+
+    for student_request in StudentRequest.objects.iterator():
+        index_student_request(student_request)
+    for job_request in JobRequest.objects.iterator():
+        index_job_request(job_request)
+
+
+def _substrings(name):
+    return {name[start:end] for start in range(len(name)) for end in range(start + 1, len(name) + 1)}
+
+
+def _overlapping_skill_ids(skills):
+    """
+    شناسه مهارت‌هایی از واژگان که با یکی از مهارت‌های داده شده تطبیق دارند
+
+    تطبیق مانند calculate_skills_match زیررشته‌ای است: مهارت‌هایی از واژگان
+    که زیررشته یکی از مهارت‌ها هستند با name__in روی زیررشته‌های آن و
+    مهارت‌هایی که یکی از مهارت‌ها را در بر دارند با name__contains پیدا
+    می‌شوند؛ واژگان هرگز به‌طور کامل خوانده نمی‌شود.
+    """
+    names = normalize_skills(skills)
+    if not names:
+        return []
+
+    candidates = sorted({''}.union(*map(_substrings, names)))
+    skill_ids = set()
+    for start in range(0, len(candidates), LOOKUP_BATCH_SIZE):
+        skill_ids.update(Skill.objects.filter(
+            name__in=candidates[start:start + LOOKUP_BATCH_SIZE]
+        ).values_list('id', flat=True))
+
+    containing = Q(pk__in=[])
+    for name in names:
+        containing |= Q(name__contains=name)
+    skill_ids.update(Skill.objects.filter(containing).values_list('id', flat=True))
+    return list(skill_ids)
+
+
+def _filter_candidates(queryset, request, skills, min_score):
+    """
+    کاندیداهای فعال با حداقل یک مهارت مشترک یا رشته تحصیلی یکسان یا مشابه
+
+    رشته یکسان و مشابه با شناسه رشته نرمال شده و bitset گروه‌ها که هنگام
+    ذخیره ثبت شده‌اند سنجیده می‌شود.
+    """
+    queryset = queryset.filter(is_active=True)
+    if max_score_without_overlap() >= min_score:
+        # با این وزن‌ها کاندیدای بدون اشتراک هم به حد نصاب می‌رسد
+        return queryset
+
+    condition = Q(pk__in=[])
+    if request.canonical_field_id is not None:
+        condition |= Q(canonical_field_id=request.canonical_field_id)
+    if request.field_group_mask:
+        queryset = queryset.alias(shared_field_groups=F('field_group_mask').bitand(request.field_group_mask))
+        condition |= Q(shared_field_groups__gt=0)
+    skill_ids = _overlapping_skill_ids(skills)
+    if skill_ids:
+        condition |= Q(skill_set__in=skill_ids)
+    return queryset.filter(condition).distinct()
+
+
+def candidate_student_requests(job_request, min_score):
+    """درخواست‌های دانشجوی فعالی که ممکن است امتیازشان به min_score برسد"""
+    from students.models import StudentRequest
+
+    return _filter_candidates(StudentRequest.objects.all(), job_request, job_request.required_skills, min_score)
+
+
+def candidate_job_requests(student_request, min_score):
+    """درخواست‌های شغلی فعالی که ممکن است امتیازشان به min_score برسد"""
+    from companies.models import JobRequest
+
+    return _filter_candidates(JobRequest.objects.all(), student_request, student_request.skills, min_score)
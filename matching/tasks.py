@@ -0,0 +1,142 @@
+"""
+صف محلی محاسبه مجدد امتیازهای مچینگ
+
+ذخیره درخواست دانشجو یا درخواست شغلی فقط یک وظیفه در جدول
+MatchRecomputeTask ثبت می‌کند و محاسبه امتیازها خارج از چرخه
+درخواست/پاسخ توسط دستور run_match_worker انجام می‌شود. صف روی همان
+پایگاه داده است و به broker خارجی نیازی ندارد.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MatchRecomputeTask
+from .score_store import refresh_job_request_scores, refresh_student_request_scores
+
+logger = logging.getLogger(__name__)
+
+# پس از این تعداد تلاش ناموفق وظیفه کنار گذاشته می‌شود تا ذخیره بعدی درخواست
+MAX_ATTEMPTS = 5
+# تأخیر تلاش اول؛ هر خطای بعدی آن را دو برابر می‌کند
+RETRY_DELAY = timedelta(seconds=30)
+# مدت اجاره وظیفه برداشته شده؛ اگر worker در این مدت وظیفه را تمام نکند
+# (مثلاً متوقف شود) وظیفه دوباره قابل برداشت است. باید از طولانی‌ترین
+# محاسبه بیشتر باشد.
+LEASE_DURATION = timedelta(minutes=10)
+
+
+def _enqueue(entity_type, entity_id):
+    # upsert روی (entity_type, entity_id): درخواست‌های تکراری در یک ردیف ادغام
+    # می‌شوند و هر ذخیره تازه شمارنده خطاهای وظیفه را صفر می‌کند
+    now = timezone.now()
+    MatchRecomputeTask.objects.bulk_create(
+        [MatchRecomputeTask(entity_type=entity_type, entity_id=entity_id, requested_at=now, run_after=now)],
+        update_conflicts=True,
+        unique_fields=['entity_type', 'entity_id'],
+        update_fields=['requested_at', 'attempts', 'run_after'],
+    )
+
+
+def _claim():
+    """
+    برداشتن قدیمی‌ترین وظیفه آماده با اجاره
+
+    ردیف حذف نمی‌شود؛ run_after به پایان اجاره منتقل و یک تلاش شمرده
+    می‌شود. به‌روزرسانی شرطی روی run_after تضمین می‌کند که دو worker یک
+    وظیفه را برندارند، حتی روی SQLite که select_for_update ندارد.
+    """
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            task = MatchRecomputeTask.objects.select_for_update(skip_locked=True).filter(
+                attempts__lt=MAX_ATTEMPTS, run_after__lte=now
+            ).order_by('requested_at').first()
+            if task is None:
+                return None
+            lease = now + LEASE_DURATION
+            claimed = MatchRecomputeTask.objects.filter(
+                pk=task.pk, run_after=task.run_after, attempts=task.attempts
+            ).update(attempts=F('attempts') + 1, run_after=lease)
+        if claimed:
+            task.attempts += 1
+            task.run_after = lease
+            return task
+
+
+def _complete(task):
+    # اگر در حین اجرا درخواست تازه‌ای ثبت شده باشد requested_at تغییر کرده
+    # و وظیفه برای اجرای دوباره می‌ماند
+    MatchRecomputeTask.objects.filter(pk=task.pk, requested_at=task.requested_at).delete()
+
+
+def _retry(task):
+    if task.attempts >= MAX_ATTEMPTS:
+        logger.error('وظیفه %s پس از %d تلاش ناموفق کنار گذاشته شد', task, task.attempts)
+    MatchRecomputeTask.objects.filter(pk=task.pk, requested_at=task.requested_at).update(
+        run_after=timezone.now() + RETRY_DELAY * 2 ** (task.attempts - 1)
+    )
+
+
+def enqueue_student_request(student_request):
+    """ثبت وظیفه محاسبه مجدد امتیازهای یک درخواست دانشجو"""
+    _enqueue('student_request', student_request.pk)
+
+
+def enqueue_job_request(job_request):
+    """ثبت وظیفه محاسبه مجدد امتیازهای یک درخواست شغلی"""
+    _enqueue('job_request', job_request.pk)
+
+
+def _run_task(task):
+    from companies.models import JobRequest
+    from students.models import StudentRequest
+
+    if task.entity_type == 'student_request':
+        instance = StudentRequest.objects.filter(pk=task.entity_id).first()
+        refresh = refresh_student_request_scores
+    else:
+        instance = JobRequest.objects.filter(pk=task.entity_id).first()
+        refresh = refresh_job_request_scores
+
+    # درخواست حذف شده؛ امتیازهایش با CASCADE پاک شده‌اند
+    if instance is None:
+        return
+
+    # فقط امتیازها به‌روز می‌شوند؛ ساخت Match با انتخاب شرکت یا دستور
+    # materialize_matches انجام می‌شود
+    refresh(instance)
+
+
+def process_pending_tasks(limit=100):
+    """
+    اجرای قدیمی‌ترین وظایف صف
+    
+    هر وظیفه با اجاره برداشته و فقط پس از اجرای موفق حذف می‌شود؛ اگر worker
+    در حین اجرا متوقف شود، وظیفه پس از پایان اجاره دوباره اجرا می‌شود. ثبت
+    مجدد در حین اجرا requested_at را تغییر می‌دهد و وظیفه را فوراً آماده
+    می‌کند، پس هیچ تغییری از دست نمی‌رود.
+    
+    وظیفه ناموفق با تأخیر تصاعدی دوباره اجرا می‌شود و پس از MAX_ATTEMPTS
+    تلاش تا ذخیره بعدی درخواست اجرا نمی‌شود.
+    
+    Returns:
+        int: تعداد وظایف اجرا شده
+    """
+    processed = 0
+    for _ in range(limit):
+        task = _claim()
+        if task is None:
+            break
+
+        try:
+            _run_task(task)
+        except Exception:
+            logger.exception('محاسبه مجدد مچینگ برای %s ناموفق بود', task)
+            _retry(task)
+            continue
+        _complete(task)
+        processed += 1
+    return processed
@@ -1,3 +1,410 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.http import HttpResponse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from companies.models import CompanyProfile, JobRequest
+from notifications.models import Notification
+from students.models import StudentRequest
+
+from . import fields_of_study
+from .matching_algorithm import (
+    FIELD_WEIGHT, SKILLS_WEIGHT, _TOTAL_WEIGHT, batch_scores_for_job, batch_scores_for_student, calculate_match_score,
+    max_score_without_overlap,
+)
+from .models import FieldGroup, Match, MatchHistory, MatchRebuildShard, MatchRecomputeTask, MatchScore, Skill
+from .rebuild import plan_shards, plan_student_ranges, rebuild_scores, score_shard, write_shard_scores
+from .score_store import MIN_STORED_SCORE, materialize_matches
+from .skill_index import _overlapping_skill_ids
+from .tasks import MAX_ATTEMPTS, _enqueue, process_pending_tasks
+
+User = get_user_model()
+
+
+class StudentMatchingQueryCountTests(TestCase):
+    """تعداد کوئری‌های صفحه مچینگ دانشجو نباید با تعداد درخواست‌های شغلی رشد کند"""
+    
+    def setUp(self):
+        self.student = User.objects.create_user('student', password='pass', user_type='student')
+        StudentRequest.objects.create(
+            user=self.student,
+            job_type='internship',
+            work_type='remote',
+            skills='Python, Django',
+            field_of_study='کامپیوتر',
+        )
+        self.client.force_login(self.student)
+    
+    def create_job_requests(self, count):
+        for _ in range(count):
+            company = User.objects.create_user(f'company{User.objects.count()}', password='pass', user_type='company')
+            CompanyProfile.objects.create(
+                user=company,
+                company_name='شرکت',
+                company_type='startup',
+                industry='فناوری',
+                company_size='1-10',
+            )
+            JobRequest.objects.create(
+                company=company,
+                title='برنامه‌نویس',
+                field_of_study='کامپیوتر',
+                job_type='internship',
+                work_type='remote',
+                required_skills='python',
+                description='توضیحات',
+            )
+    
+    def count_queries(self):
+        with mock.patch('matching.views.render', return_value=HttpResponse()) as render:
+            with CaptureQueriesContext(connection) as context:
+                self.client.get('/matching/')
+        # دسترسی قالب به شرکت هر درخواست نباید کوئری جدیدی بسازد
+        with CaptureQueriesContext(connection) as template_context:
+            for match in render.call_args[0][2]['matches']:
+                match['job_request'].company.company_profile.company_name
+        self.assertEqual(len(template_context), 0)
+        return len(context)
+    
+    def test_query_count_is_constant_in_job_count(self):
+        self.create_job_requests(2)
+        few = self.count_queries()
+        self.create_job_requests(10)
+        many = self.count_queries()
+        self.assertEqual(few, many)
+
+
+class MatchRecomputeQueueTests(TestCase):
+    """امتیازهای ذخیره شده توسط صف محاسبه باید با محاسبه مستقیم الگوریتم یکسان باشند"""
+    
+    FIELDS = ['کامپیوتر', 'مهندسی کامپیوتر', 'نرم‌افزار', 'برق', 'حسابداری', '']
+    SKILLS = ['python, Django', 'java, sql', 'javascript, react', 'excel', 'c++, python', '']
+    CITIES = ['تهران', 'اصفهان', '']
+    
+    def setUp(self):
+        company = User.objects.create_user('company', password='pass', user_type='company')
+        CompanyProfile.objects.create(
+            user=company,
+            company_name='شرکت',
+            company_type='startup',
+            industry='فناوری',
+            company_size='1-10',
+        )
+        for i in range(12):
+            JobRequest.objects.create(
+                company=company,
+                title='برنامه‌نویس',
+                field_of_study=self.FIELDS[i % len(self.FIELDS)],
+                job_type=('internship', 'full_time')[i % 2],
+                work_type=('remote', 'office')[i % 2],
+                required_skills=self.SKILLS[i % len(self.SKILLS)],
+                city=self.CITIES[i % len(self.CITIES)],
+                description='توضیحات',
+            )
+        for i in range(18):
+            student = User.objects.create_user(f'student{i}', password='pass', user_type='student')
+            StudentRequest.objects.create(
+                user=student,
+                job_type=('internship', 'full_time')[i % 2],
+                work_type=('remote', 'office')[i % 3 == 0],
+                skills=self.SKILLS[(i + 1) % len(self.SKILLS)],
+                field_of_study=self.FIELDS[(i + 2) % len(self.FIELDS)],
+                city=self.CITIES[i % len(self.CITIES)],
+            )
+    
+    def expected_scores(self):
+        scores = {}
+        for student_request in StudentRequest.objects.filter(is_active=True):
+            for job_request in JobRequest.objects.filter(is_active=True):
+                score = calculate_match_score(student_request, job_request)
+                if score >= MIN_STORED_SCORE:
+                    scores[(student_request.id, job_request.id)] = score
+        return scores
+    
+    def stored_scores(self):
+        return {
+            (score.student_request_id, score.job_request_id): score.score
+            for score in MatchScore.objects.all()
+        }
+    
+    def test_worker_scores_match_algorithm(self):
+        self.assertEqual(MatchRecomputeTask.objects.count(), 30)
+        while process_pending_tasks(10):
+            pass
+        self.assertFalse(MatchRecomputeTask.objects.exists())
+        expected = self.expected_scores()
+        self.assertTrue(expected)
+        self.assertEqual(self.stored_scores(), expected)
+    
+    def test_changes_are_recomputed(self):
+        process_pending_tasks(100)
+        for job_request in JobRequest.objects.all()[:4]:
+            job_request.required_skills = 'python'
+            job_request.save()
+        for student_request in StudentRequest.objects.all()[:4]:
+            student_request.is_active = False
+            student_request.save()
+            # درخواست تکراری نباید وظیفه جدیدی بسازد
+            student_request.save()
+        self.assertEqual(MatchRecomputeTask.objects.count(), 8)
+        process_pending_tasks(100)
+        self.assertEqual(self.stored_scores(), self.expected_scores())
+    
+    def test_batch_scores_match_algorithm(self):
+        # حقوق و استان متفاوت تا همه شاخه‌های امتیاز حقوق و موقعیت پوشش داده شوند
+        for i, job_request in enumerate(JobRequest.objects.order_by('id')):
+            JobRequest.objects.filter(pk=job_request.pk).update(
+                min_salary=(None, 10, 20)[i % 3], max_salary=(None, 30)[i % 2], province=('تهران', '')[i % 2]
+            )
+        for i, student_request in enumerate(StudentRequest.objects.order_by('id')):
+            StudentRequest.objects.filter(pk=student_request.pk).update(
+                expected_salary=(None, 5, 15, 25, 50)[i % 5], province=('تهران', 'فارس', '')[i % 3]
+            )
+        students = list(StudentRequest.objects.order_by('id'))
+        jobs = list(JobRequest.objects.order_by('id'))
+        
+        for job_request in jobs:
+            scores = batch_scores_for_job(job_request, students)
+            for student_request, score in zip(students, scores):
+                self.assertAlmostEqual(score, calculate_match_score(student_request, job_request), places=12)
+        for student_request in students:
+            scores = batch_scores_for_student(student_request, jobs)
+            for job_request, score in zip(jobs, scores):
+                self.assertAlmostEqual(score, calculate_match_score(student_request, job_request), places=12)
+    
+    def test_stopped_worker_task_is_retried_after_lease(self):
+        # worker در میانه اجرای وظیفه متوقف می‌شود
+        with mock.patch('matching.tasks._run_task', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                process_pending_tasks()
+        self.assertEqual(MatchRecomputeTask.objects.count(), 30)
+        leased = MatchRecomputeTask.objects.get(attempts=1)
+        self.assertGreater(leased.run_after, timezone.now())
+        
+        # در مدت اجاره worker دیگری آن را برنمی‌دارد
+        while process_pending_tasks(10):
+            pass
+        self.assertEqual(list(MatchRecomputeTask.objects.values_list('pk', flat=True)), [leased.pk])
+        
+        # پایان اجاره
+        MatchRecomputeTask.objects.update(run_after=timezone.now())
+        self.assertEqual(process_pending_tasks(), 1)
+        self.assertFalse(MatchRecomputeTask.objects.exists())
+        self.assertEqual(self.stored_scores(), self.expected_scores())
+    
+    def test_failing_task_backs_off_and_is_parked(self):
+        MatchRecomputeTask.objects.exclude(pk=MatchRecomputeTask.objects.earliest('requested_at').pk).delete()
+        with mock.patch('matching.tasks._run_task', side_effect=RuntimeError), self.assertLogs('matching.tasks'):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                self.assertEqual(process_pending_tasks(), 0)
+                task = MatchRecomputeTask.objects.get()
+                self.assertEqual(task.attempts, attempt)
+                self.assertGreater(task.run_after, timezone.now())
+                # پیش از رسیدن زمان تلاش بعدی اجرا نمی‌شود
+                self.assertEqual(process_pending_tasks(), 0)
+                self.assertEqual(MatchRecomputeTask.objects.get().attempts, attempt)
+                MatchRecomputeTask.objects.update(run_after=timezone.now())
+        
+        # وظیفه کنار گذاشته شده دیگر برداشته نمی‌شود
+        with mock.patch('matching.tasks._run_task') as run_task:
+            process_pending_tasks()
+        run_task.assert_not_called()
+        
+        # ذخیره دوباره درخواست شمارنده را صفر می‌کند
+        task = MatchRecomputeTask.objects.get()
+        _enqueue(task.entity_type, task.entity_id)
+        self.assertEqual(process_pending_tasks(), 1)
+        self.assertFalse(MatchRecomputeTask.objects.exists())
+
+    
+    def test_plan_shards(self):
+        job_ids = list(JobRequest.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(plan_shards(5), [job_ids[:5], job_ids[5:10], job_ids[10:]])
+        
+        ranges = plan_student_ranges(5)
+        self.assertEqual(len(ranges), 4)
+        self.assertIsNone(ranges[0][0])
+        self.assertIsNone(ranges[-1][1])
+        # بازه‌ها پشت سر هم هستند و هر کدام حداکثر 5 درخواست دارند
+        for (_, high), (low, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(high + 1, low)
+        pairs = [score_shard(job_ids, student_range, 5)[0] for student_range in ranges]
+        self.assertEqual(pairs, [12 * 5, 12 * 5, 12 * 5, 12 * 3])
+    
+    def test_write_shard_scores_removes_stale_scores(self):
+        job_ids = list(JobRequest.objects.order_by('id').values_list('id', flat=True))[:5]
+        other_job_id = JobRequest.objects.exclude(id__in=job_ids).values_list('id', flat=True).first()
+        student_ids = list(StudentRequest.objects.order_by('id').values_list('id', flat=True))[:2]
+        MatchScore.objects.create(student_request_id=student_ids[0], job_request_id=job_ids[0], score=0.9)
+        MatchScore.objects.create(student_request_id=student_ids[1], job_request_id=job_ids[0], score=0.9)
+        MatchScore.objects.create(student_request_id=student_ids[1], job_request_id=other_job_id, score=0.9)
+        
+        write_shard_scores(job_ids, [(student_ids[0], job_ids[0], 0.5), (student_ids[0], job_ids[1], 0.6)], batch_size=1)
+        self.assertEqual(self.stored_scores(), {
+            (student_ids[0], job_ids[0]): 0.5,
+            (student_ids[0], job_ids[1]): 0.6,
+            # امتیازهای بخش‌های دیگر دست نمی‌خورند
+            (student_ids[1], other_job_id): 0.9,
+        })
+    
+    def test_rebuild_resumes_saved_plan(self):
+        class Stop(Exception):
+            pass
+        
+        def stop(done, total, pairs, elapsed):
+            raise Stop
+        
+        with self.assertRaises(Stop):
+            rebuild_scores(workers=0, shard_size=5, batch_size=5, progress=stop)
+        plan = list(MatchRebuildShard.objects.values_list('id', 'job_request_ids'))
+        self.assertEqual([job_ids for _, job_ids in plan], plan_shards(5))
+        self.assertEqual(MatchRebuildShard.objects.filter(completed_at__isnull=False).count(), 1)
+        
+        # درخواستی از یک بخش تکمیل نشده پیش از ادامه غیرفعال می‌شود
+        pending = MatchRebuildShard.objects.filter(completed_at__isnull=True).first()
+        JobRequest.objects.filter(pk=pending.job_request_ids[0]).update(is_active=False)
+        
+        progress = []
+        rebuild_scores(
+            workers=0, shard_size=5, batch_size=5, resume=True,
+            progress=lambda done, total, pairs, elapsed: progress.append((done, total)),
+        )
+        self.assertEqual(progress, [(1, 2), (2, 2)])
+        # برنامه ذخیره شده ادامه یافته و از نو ساخته نشده است
+        self.assertEqual(list(MatchRebuildShard.objects.values_list('id', 'job_request_ids')), plan)
+        self.assertFalse(MatchRebuildShard.objects.filter(completed_at__isnull=True).exists())
+        self.assertEqual(self.stored_scores(), self.expected_scores())
+
+
+class SelectCandidateTests(TestCase):
+    """انتخاب کاندیدا باید روی مچ‌های از پیش ساخته شده هم اعمال شود"""
+    
+    def setUp(self):
+        self.company = User.objects.create_user('company', password='pass', user_type='company')
+        CompanyProfile.objects.create(
+            user=self.company,
+            company_name='شرکت',
+            company_type='startup',
+            industry='فناوری',
+            company_size='1-10',
+        )
+        JobRequest.objects.create(
+            company=self.company,
+            title='برنامه‌نویس',
+            field_of_study='کامپیوتر',
+            job_type='internship',
+            work_type='remote',
+            required_skills='python',
+            description='توضیحات',
+        )
+        self.student = User.objects.create_user('student', password='pass', user_type='student')
+        StudentRequest.objects.create(
+            user=self.student,
+            job_type='internship',
+            work_type='remote',
+            skills='Python, Django',
+            field_of_study='کامپیوتر',
+        )
+        process_pending_tasks(100)
+        self.client.force_login(self.company)
+    
+    def select(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(f'/matching/select-candidate/{self.student.id}/')
+        return response.json()
+    
+    def test_worker_does_not_create_matches(self):
+        self.assertTrue(MatchScore.objects.exists())
+        self.assertFalse(Match.objects.exists())
+    
+    def test_materialized_match_is_only_a_suggestion(self):
+        materialize_matches()
+        self.assertEqual(Match.objects.get().status, 'suggested')
+        with mock.patch('matching.views.render', return_value=HttpResponse()) as render:
+            self.client.get('/matching/matches/')
+        self.assertFalse(render.call_args[0][2]['matches'].exists())
+        
+        self.assertTrue(self.select()['success'])
+        self.assertEqual(Match.objects.get().status, 'pending')
+    
+    def test_select_reopens_materialized_match(self):
+        materialize_matches()
+        Match.objects.update(status='rejected')
+        
+        self.assertTrue(self.select()['success'])
+        match = Match.objects.get()
+        self.assertEqual(match.status, 'pending')
+        self.assertTrue(MatchHistory.objects.filter(match=match, user=self.company, action='created').exists())
+        self.assertTrue(Notification.objects.filter(user=self.student, notification_type='match').exists())
+    
+    def test_select_keeps_accepted_match(self):
+        materialize_matches()
+        Match.objects.update(status='accepted')
+        
+        self.assertFalse(self.select()['success'])
+        self.assertEqual(Match.objects.get().status, 'accepted')
+        self.assertFalse(Notification.objects.filter(user=self.student).exists())
+
+
+class FieldGroupTests(TestCase):
+    """بیت گروه‌های رشته تحصیلی و باطل شدن حافظه نرمال‌ساز"""
+    
+    def setUp(self):
+        # گروه‌های پیش‌فرض migration
+        FieldGroup.objects.all().delete()
+    
+    def test_deleted_group_bit_is_reused(self):
+        groups = [FieldGroup.objects.create(name=f'گروه {i}', keywords=f'کلید{i}') for i in range(3)]
+        self.assertEqual([group.bit for group in groups], [0, 1, 2])
+        groups[1].delete()
+        self.assertEqual(FieldGroup.objects.create(name='تازه', keywords='تازه').bit, 1)
+    
+    def test_group_limit(self):
+        FieldGroup.objects.bulk_create(
+            FieldGroup(name=f'گروه {bit}', keywords=f'کلید{bit}', bit=bit) for bit in range(63)
+        )
+        self.assertIsNone(FieldGroup.free_bit())
+        with self.assertRaises(ValidationError):
+            FieldGroup(name='اضافه', keywords='اضافه').full_clean()
+    
+    def test_change_in_other_process_clears_masks(self):
+        FieldGroup.objects.create(name='کامپیوتر', keywords='کامپیوتر')
+        self.assertEqual(fields_of_study.field_group_mask('مهندسی برق'), 0)
+        
+        # پردازه دیگری گروه را تغییر داده و نسخه را عوض کرده است؛ سیگنال این پردازه اجرا نمی‌شود
+        FieldGroup.objects.update(keywords='کامپیوتر, برق')
+        cache.set(fields_of_study.GROUPS_VERSION_KEY, 'other-process')
+        self.assertEqual(fields_of_study.field_group_mask('مهندسی برق'), 0)
+        
+        with mock.patch.object(fields_of_study, 'VERSION_CHECK_INTERVAL', 0):
+            self.assertEqual(fields_of_study.field_group_mask('مهندسی برق'), 1)
+
 
-# Create your tests here.
+class SkillIndexTests(TestCase):
+    """انتخاب کاندیدا با نمایه مهارت‌ها"""
+    
+    def test_no_overlap_bound_is_below_threshold(self):
+        # بهترین جفت ممکن بدون رشته و مهارت مشترک
+        student_request = StudentRequest(
+            job_type='internship', work_type='remote', skills='', field_of_study='', expected_salary=15,
+        )
+        job_request = JobRequest(
+            job_type='internship', work_type='remote', required_skills='python', field_of_study='', min_salary=10,
+        )
+        bound = max_score_without_overlap()
+        self.assertEqual(calculate_match_score(student_request, job_request), bound)
+        self.assertAlmostEqual(bound, (_TOTAL_WEIGHT - FIELD_WEIGHT - SKILLS_WEIGHT) / _TOTAL_WEIGHT, places=12)
+        # هرس کاندیداها فقط با این شرط معتبر است
+        self.assertLess(bound, MIN_STORED_SCORE)
+    
+    def test_overlapping_skills_use_substring_match(self):
+        skills = {name: Skill.objects.create(name=name).id for name in ['python', 'py', 'django', 'java']}
+        self.assertEqual(set(_overlapping_skill_ids('Python3')), {skills['python'], skills['py']})
+        self.assertEqual(set(_overlapping_skill_ids('jav, pyt')), {skills['java'], skills['python'], skills['py']})
+        self.assertEqual(_overlapping_skill_ids(''), [])
@@ -2,8 +2,13 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from .models import Match, MatchCriteria, MatchHistory
-from .matching_algorithm import calculate_match_score
+from .models import Match, MatchCriteria, MatchHistory, MatchScore
+from .matching_algorithm import top_k_matches
+from .score_store import MIN_STORED_SCORE
+from notifications.delivery import notify
+import math
+
+MATCHES_PER_PAGE = 12
 
 
 @login_required
@@ -11,7 +16,6 @@ def matching_algorithm(request):
     """الگوریتم مچینگ"""
     if request.user.user_type == 'company':
         # برای شرکت‌ها، دانشجویان مناسب را نمایش می‌دهیم
-        from students.models import StudentRequest
         from companies.models import JobRequest
         from django.core.paginator import Paginator
         
@@ -27,63 +31,77 @@ def matching_algorithm(request):
         city_filter = request.GET.get('city')
         score_filter = request.GET.get('score')
         
-        # دریافت درخواست‌های دانشجویان با فیلتر
-        student_requests = StudentRequest.objects.filter(is_active=True)
+        # امتیازها از جدول از پیش محاسبه شده و مرتب شده خوانده می‌شوند
+        min_score = int(score_filter) / 100 if score_filter else MIN_STORED_SCORE
+        scores = MatchScore.objects.filter(
+            job_request__in=company_job_requests,
+            student_request__is_active=True,
+            score__gte=min_score,
+        )
         
         if field_filter:
-            student_requests = student_requests.filter(field_of_study__icontains=field_filter)
+            scores = scores.filter(student_request__field_of_study__icontains=field_filter)
         if job_type_filter:
-            student_requests = student_requests.filter(job_type=job_type_filter)
+            scores = scores.filter(student_request__job_type=job_type_filter)
         if city_filter:
-            student_requests = student_requests.filter(city__icontains=city_filter)
-        
-        # محاسبه امتیاز مچینگ برای هر دانشجو
-        matches = []
-        for student_request in student_requests:
-            for job_request in company_job_requests:
-                match_score = calculate_match_score(student_request, job_request)
-                min_score = int(score_filter) if score_filter else 50
-                
-                if match_score >= min_score:
-                    matches.append({
-                        'student': student_request.user,
-                        'student_request': student_request,
-                        'job_request': job_request,
-                        'match_score': match_score
-                    })
-        
-        # مرتب‌سازی بر اساس امتیاز
-        matches.sort(key=lambda x: x['match_score'], reverse=True)
+            scores = scores.filter(student_request__city__icontains=city_filter)
+        
+        scores = scores.select_related('student_request__user', 'job_request').order_by('-score', 'id')
         
         # صفحه‌بندی
-        paginator = Paginator(matches, 12)
+        paginator = Paginator(scores, MATCHES_PER_PAGE)
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
+        page_obj.object_list = [
+            {
+                'student': match_score.student_request.user,
+                'student_request': match_score.student_request,
+                'job_request': match_score.job_request,
+                'match_score': match_score.score
+            }
+            for match_score in page_obj.object_list
+        ]
         
         return render(request, 'companies/matching.html', {
             'candidates': page_obj,
-            'total_matches': len(matches)
+            'total_matches': paginator.count
         })
     
     else:
         # برای دانشجویان، شرکت‌های مناسب را نمایش می‌دهیم
         from companies.models import JobRequest
-        job_requests = JobRequest.objects.filter(is_active=True)
-        
-        # محاسبه امتیاز مچینگ برای هر شرکت
-        matches = []
-        for job_request in job_requests:
-            score = calculate_match_score(request.user.student_requests.first(), job_request.company)
-            if score > 0.5:
-                matches.append({
-                    'job_request': job_request,
-                    'score': score
-                })
-        
-        # مرتب‌سازی بر اساس امتیاز
-        matches.sort(key=lambda x: x['score'], reverse=True)
-        
-        return render(request, 'matching/student_matching.html', {'matches': matches})
+        # همه درخواست‌های شغلی فعال با یک کوئری؛ شرکت و پروفایل آن برای قالب
+        job_requests = JobRequest.objects.filter(is_active=True).select_related('company__company_profile')
+        student_request = request.user.student_requests.first()
+        
+        try:
+            page_number = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page_number = 1
+        
+        # فقط K مچ برتر تا انتهای صفحه جاری نگه داشته می‌شود؛ یک مورد اضافه
+        # برای تشخیص وجود صفحه بعد
+        top_matches = []
+        if student_request:
+            top_matches = top_k_matches(
+                ((student_request, job_request) for job_request in job_requests),
+                page_number * MATCHES_PER_PAGE + 1,
+                min_score=math.nextafter(0.5, 1.0),  # امتیاز بیشتر از 0.5
+            )
+        
+        matches = [
+            {
+                'job_request': job_request,
+                'score': score
+            }
+            for score, _, job_request in top_matches[(page_number - 1) * MATCHES_PER_PAGE:page_number * MATCHES_PER_PAGE]
+        ]
+        
+        return render(request, 'matching/student_matching.html', {
+            'matches': matches,
+            'page_number': page_number,
+            'has_next': len(top_matches) > page_number * MATCHES_PER_PAGE
+        })
 
 
 @login_required
@@ -94,6 +112,12 @@ def matches(request):
     else:
         matches = Match.objects.filter(student=request.user)
     
+    # پیشنهادهای خودکار تا انتخاب شرکت نمایش داده نمی‌شوند
+    # امتیازها از قبل در Match ذخیره شده‌اند
+    matches = matches.exclude(status='suggested').select_related(
+        'student', 'company__company_profile', 'job_request'
+    ).order_by('-match_score', '-created_at')
+    
     return render(request, 'matching/matches.html', {'matches': matches})
 
 
@@ -128,8 +152,7 @@ def accept_match(request, match_id):
         )
         
         # ارسال نوتیفیکیشن به دانشجو
-        from notifications.models import Notification
-        Notification.objects.create(
+        notify(
             user=match.student,
             title='مچینگ پذیرفته شد',
             message=f'شرکت {match.company.company_profile.company_name} مچینگ شما را پذیرفت',
@@ -151,8 +174,7 @@ def accept_match(request, match_id):
         )
         
         # ارسال نوتیفیکیشن به شرکت
-        from notifications.models import Notification
-        Notification.objects.create(
+        notify(
             user=match.company,
             title='مچینگ پذیرفته شد',
             message=f'دانشجو {match.student.get_full_name()} مچینگ شما را پذیرفت',
@@ -212,17 +234,44 @@ def select_candidate(request, candidate_id):
     try:
         candidate = User.objects.get(id=candidate_id, user_type='student')
         
-        # ایجاد مچینگ جدید
-        match = Match.objects.create(
+        # بهترین امتیاز ذخیره شده کاندیدا در برابر درخواست‌های شغلی شرکت
+        match_score = MatchScore.objects.filter(
+            student_request__user=candidate,
+            job_request__company=request.user,
+            job_request__is_active=True,
+        ).order_by('-score').first()
+        if match_score is None:
+            return JsonResponse({'success': False, 'message': 'کاندیدا با هیچ درخواست شغلی فعالی مچ نیست'})
+        
+        # ایجاد مچینگ جدید یا استفاده از مچ ذخیره شده
+        match, created = Match.objects.get_or_create(
             student=candidate,
-            company=request.user,
-            match_score=0,  # امتیاز بعداً محاسبه می‌شود
-            status='pending'
+            job_request=match_score.job_request,
+            defaults={
+                'company': request.user,
+                'student_request': match_score.student_request,
+                'match_score': match_score.score,
+                'status': 'pending',
+            }
+        )
+        if not created:
+            # مچ از قبل (مثلاً توسط materialize_matches) وجود دارد
+            if match.status == 'accepted':
+                return JsonResponse({'success': False, 'message': 'کاندیدا قبلاً این درخواست را پذیرفته است'})
+            match.company = request.user
+            match.student_request = match_score.student_request
+            match.match_score = match_score.score
+            match.status = 'pending'
+            match.save(update_fields=['company', 'student_request', 'match_score', 'status', 'updated_at'])
+        MatchHistory.objects.create(
+            match=match,
+            action='created',
+            user=request.user,
+            message='شرکت کاندیدا را انتخاب کرد'
         )
         
         # ارسال نوتیفیکیشن به دانشجو
-        from notifications.models import Notification
-        Notification.objects.create(
+        notify(
             user=candidate,
             title='درخواست شغلی جدید',
             message=f'شرکت {request.user.company_profile.company_name} به شما درخواست شغلی داده است.',
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification, Message
+from .models import Notification, Message, Conversation, ConversationParticipant
 
 
 @admin.register(Notification)
@@ -16,3 +16,20 @@ class MessageAdmin(admin.ModelAdmin):
     list_filter = ('message_type', 'is_read', 'created_at')
     search_fields = ('sender__first_name', 'sender__last_name', 'receiver__first_name', 'receiver__last_name', 'subject')
     readonly_fields = ('created_at',)
+
+
+class ConversationParticipantInline(admin.TabularInline):
+    model = ConversationParticipant
+    fk_name = 'conversation'
+    readonly_fields = ('user', 'peer', 'unread_count', 'last_activity')
+    extra = 0
+    can_delete = False
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('first_user', 'second_user', 'last_activity', 'created_at')
+    search_fields = ('first_user__first_name', 'first_user__last_name', 'second_user__first_name', 'second_user__last_name')
+    readonly_fields = ('last_message', 'last_activity', 'created_at')
+    raw_id_fields = ('first_user', 'second_user')
+    inlines = [ConversationParticipantInline]
@@ -0,0 +1,129 @@
+"""
+انتشار رویدادهای نوتیفیکیشن برای استریم real-time
+
+پس از ثبت هر نوتیفیکیشن، رویداد آن برای کاربر منتشر می‌شود و
+اتصال‌های SSE همان کاربر بیدار می‌شوند؛ دیگر نیازی به پرس‌وجوی دوره‌ای
+پایگاه داده نیست.
+
+پیاده‌سازی با تنظیم NOTIFICATION_BROKER انتخاب می‌شود. InProcessBroker
+فقط مشترکان همان پردازه را مطلع می‌کند و برای یک پردازه ASGI یا محیط
+توسعه کافی است؛ برای چند پردازه می‌توان پیاده‌سازی دیگری (مثلاً روی
+Redis pub/sub) با همان رابط BaseBroker نوشت.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = 'notifications.broker.InProcessBroker'
+
+# حداکثر رویدادهای در انتظار هر اتصال؛ اتصال کند بسته می‌شود و مرورگر با
+# Last-Event-ID دوباره وصل شده و بقیه را از پایگاه داده می‌گیرد
+MAX_PENDING_EVENTS = 100
+
+
+def notification_event(notification):
+    """داده رویداد یک نوتیفیکیشن"""
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.notification_type,
+        'count': notification.count,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+class Subscription:
+    """اشتراک یک اتصال در رویدادهای یک کاربر؛ باید درون حلقه asyncio ساخته شود"""
+
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+
+    def deliver(self, event):
+        """تحویل رویداد؛ از هر نخی قابل فراخوانی است"""
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # حلقه اتصال بسته شده است
+            pass
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self, timeout=None):
+        """
+        رویداد بعدی
+
+        Returns:
+            dict: رویداد؛ None اگر رویدادها از دست رفته و اتصال باید بسته شود
+
+        Raises:
+            TimeoutError: اگر تا timeout رویدادی نرسد
+        """
+        event = await asyncio.wait_for(self._queue.get(), timeout)
+        if self.overflowed and event is not None:
+            return None
+        return event
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """رابط انتشار رویدادهای نوتیفیکیشن"""
+
+    def publish(self, user_id, event):
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """انتشار رویدادها به مشترکان همین پردازه"""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+
+@cache
+def get_broker():
+    """نمونه پیاده‌سازی انتخاب شده در NOTIFICATION_BROKER"""
+    return import_string(getattr(settings, 'NOTIFICATION_BROKER', DEFAULT_BROKER))()
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .unread import unread_count
+
+
+def unread_notifications(request):
+    """تعداد نوتیفیکیشن‌های خوانده نشده برای نشان نوار ناوبری؛ فقط در صورت استفاده خوانده می‌شود"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications_count': SimpleLazyObject(lambda: unread_count(user.pk))}
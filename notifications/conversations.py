@@ -0,0 +1,87 @@
+"""
+گفتگوهای بین کاربران
+
+هر جفت کاربر یک Conversation و برای هر شرکت‌کننده یک
+ConversationParticipant دارد. آخرین پیام، زمان آخرین فعالیت و تعداد
+پیام‌های خوانده نشده هر شرکت‌کننده هنگام ارسال و خواندن پیام در همان
+تراکنش به‌روزرسانی می‌شوند، پس صندوق پیام بدون شمارش یا جستجوی پیام‌ها
+با یک کوئری خوانده می‌شود.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import Conversation, ConversationParticipant, Message
+
+
+def get_conversation(user, other):
+    """گفتگوی دو کاربر؛ در صورت نیاز همراه با ردیف شرکت‌کنندگان ایجاد می‌شود"""
+    first_id, second_id = sorted([user.pk, other.pk])
+    with transaction.atomic():
+        conversation, created = Conversation.objects.get_or_create(
+            first_user_id=first_id, second_user_id=second_id
+        )
+        if created:
+            # پیام به خود یک شرکت‌کننده دارد
+            ConversationParticipant.objects.bulk_create([
+                ConversationParticipant(conversation=conversation, user_id=user_id, peer_id=peer_id)
+                for user_id, peer_id in {(first_id, second_id), (second_id, first_id)}
+            ])
+    return conversation
+
+
+def send(message):
+    """ذخیره پیام تازه و به‌روزرسانی گفتگوی آن"""
+    with transaction.atomic():
+        message.conversation = get_conversation(message.sender, message.receiver)
+        message.save()
+
+        Conversation.objects.filter(pk=message.conversation_id).update(
+            last_message=message, last_activity=message.created_at
+        )
+        ConversationParticipant.objects.filter(conversation_id=message.conversation_id).update(
+            last_activity=message.created_at
+        )
+        ConversationParticipant.objects.filter(
+            conversation_id=message.conversation_id, user_id=message.receiver_id
+        ).update(unread_count=F('unread_count') + 1)
+    return message
+
+
+def mark_read(message):
+    """علامت‌گذاری پیام به عنوان خوانده شده و کم کردن شمارنده گیرنده"""
+    with transaction.atomic():
+        # به‌روزرسانی شرطی تا خواندن هم‌زمان یک پیام دو بار شمرده نشود
+        updated = Message.objects.filter(pk=message.pk, is_read=False).update(is_read=True)
+        message.is_read = True
+        if updated and message.conversation_id:
+            ConversationParticipant.objects.filter(
+                conversation_id=message.conversation_id,
+                user_id=message.receiver_id,
+                unread_count__gt=0,
+            ).update(unread_count=F('unread_count') - 1)
+
+
+def mark_conversation_read(participant):
+    """
+    علامت‌گذاری همه پیام‌های دریافتی یک گفتگو به عنوان خوانده شده
+
+    پیام‌ها با یک UPDATE و شمارنده شرکت‌کننده با یک UPDATE دیگر صفر می‌شوند.
+    """
+    with transaction.atomic():
+        Message.objects.filter(
+            conversation_id=participant.conversation_id, receiver_id=participant.user_id, is_read=False
+        ).update(is_read=True)
+        ConversationParticipant.objects.filter(pk=participant.pk).update(unread_count=0)
+    participant.unread_count = 0
+
+
+def thread(conversation):
+    """پیام‌های یک گفتگو همراه با فرستنده"""
+    return Message.objects.filter(conversation=conversation).select_related('sender')
+
+
+def inbox(user):
+    """گفتگوهای کاربر به ترتیب آخرین فعالیت همراه با طرف گفتگو و آخرین پیام"""
+    return ConversationParticipant.objects.filter(user=user).select_related(
+        'peer', 'conversation__last_message'
+    ).order_by('-last_activity', '-id')
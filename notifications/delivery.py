@@ -0,0 +1,160 @@
+"""
+ارسال نوتیفیکیشن‌ها
+
+notify نوتیفیکیشن را در صف savepoint جاری می‌گذارد و نوتیفیکیشن‌های هر
+صف پس از ثبت تراکنش با یک bulk_create ذخیره می‌شوند؛ خارج از تراکنش
+بلافاصله ذخیره می‌شود. broadcast گیرندگان یک بخش از کاربران (مثلاً
+دانشجویان یک استان) را به‌صورت جریانی و در دسته‌ها می‌خواند.
+
+bulk_create سیگنال post_save ارسال نمی‌کند، پس انتشار برای استریم و
+بی‌اعتبار کردن شمارنده خوانده نشده‌ها اینجا انجام می‌شود.
+"""
+import threading
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .broker import get_broker, notification_event
+from .models import Notification
+from .unread import invalidate_unread_counts
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+# صف‌های تراکنش جاری هر نخ: alias اتصال -> {شناسه savepoint: _PendingFlush}
+_local = threading.local()
+
+
+def _flush(notifications):
+    """ذخیره دسته‌ای نوتیفیکیشن‌ها و انتشار آن‌ها پس از ثبت"""
+    if not notifications:
+        return
+    Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    transaction.on_commit(partial(_announce, notifications))
+
+
+def _announce(notifications):
+    broker = get_broker()
+    for notification in notifications:
+        broker.publish(notification.user_id, notification_event(notification))
+    invalidate_unread_counts({notification.user_id for notification in notifications})
+
+
+class _PendingFlush:
+    """تابع on_commit یک بلوک atomic همراه با صف نوتیفیکیشن‌های آن"""
+
+    def __init__(self):
+        self.notifications = []
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        _flush(self.notifications)
+
+
+def _pending():
+    """
+    صف savepoint جاری؛ برای هر savepoint یک flush در on_commit ثبت می‌شود
+
+    با rollback یک savepoint، Django تابع‌های on_commit ثبت شده در آن را کنار
+    می‌گذارد، پس نوتیفیکیشن‌های آن همراه صف خودش حذف می‌شوند و به صف
+    بلوک‌های بیرونی نمی‌رسند. صفی که flush آن دیگر در on_commit اتصال نیست
+    (تراکنش ثبت یا rollback شده) یا اجرا شده است کنار گذاشته می‌شود.
+    """
+    connection = transaction.get_connection()
+    # بلوک‌های atomic بدون savepoint با بلوک بیرونی خود rollback می‌شوند
+    savepoint = next((sid for sid in reversed(connection.savepoint_ids) if sid), None)
+
+    queues = getattr(_local, 'queues', None)
+    if queues is None:
+        queues = _local.queues = {}
+    savepoint_queues = queues.setdefault(connection.alias, {})
+    for sid in list(savepoint_queues):
+        if sid is not None and sid not in connection.savepoint_ids:
+            # savepoint آزاد یا rollback شده؛ flush آن (در صورت آزاد شدن) در on_commit می‌ماند
+            del savepoint_queues[sid]
+
+    flush = savepoint_queues.get(savepoint)
+    if flush is None or flush.done or not any(func is flush for _, func, _ in connection.run_on_commit):
+        flush = savepoint_queues[savepoint] = _PendingFlush()
+        transaction.on_commit(flush)
+    return flush.notifications
+
+
+def notify(user, title, message, notification_type, **fields):
+    """
+    ارسال نوتیفیکیشن به یک کاربر پس از ثبت تراکنش جاری
+
+    Args:
+        user: گیرنده
+        fields: فیلدهای اختیاری دیگر Notification (مانند related_object_id)
+    """
+    notification = Notification(
+        user=user,
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        **fields,
+    )
+    if transaction.get_connection().in_atomic_block:
+        _pending().append(notification)
+    else:
+        _flush([notification])
+
+
+def broadcast(recipients, title, message, notification_type, chunk_size=BATCH_SIZE, **fields):
+    """
+    ارسال یک نوتیفیکیشن به همه کاربران یک بخش
+
+    شناسه گیرندگان به‌صورت جریانی خوانده و هر دسته در تراکنش خود ذخیره
+    می‌شود؛ برای ده‌ها هزار گیرنده باید خارج از درخواست وب اجرا شود
+    (فرمان broadcast_notification).
+
+    Args:
+        recipients: queryset کاربران، مانند خروجی توابع بخش‌بندی زیر
+
+    Returns:
+        int: تعداد نوتیفیکیشن‌های ارسال شده
+    """
+    user_ids = recipients.order_by().values_list('id', flat=True).distinct()
+    sent = 0
+    chunk = []
+    for user_id in user_ids.iterator(chunk_size=chunk_size):
+        chunk.append(Notification(
+            user_id=user_id,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            **fields,
+        ))
+        if len(chunk) >= chunk_size:
+            with transaction.atomic():
+                _flush(chunk)
+            sent += len(chunk)
+            chunk = []
+    if chunk:
+        with transaction.atomic():
+            _flush(chunk)
+        sent += len(chunk)
+    return sent
+
+
+# بخش‌های کاربران برای broadcast
+
+def all_students():
+    return User.objects.filter(user_type='student', is_active=True)
+
+
+def students_in_province(province):
+    """دانشجویانی که درخواست فعالی در استان دارند"""
+    return all_students().filter(student_requests__province=province, student_requests__is_active=True)
+
+
+def all_companies():
+    return User.objects.filter(user_type='company', is_active=True)
+
+
+def verified_companies():
+    return all_companies().filter(company_profile__is_verified=True)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.delivery import (
+    BATCH_SIZE, all_companies, all_students, broadcast, students_in_province, verified_companies,
+)
+from notifications.models import Notification
+
+SEGMENTS = {
+    'students': all_students,
+    'companies': all_companies,
+    'verified-companies': verified_companies,
+}
+
+
+class Command(BaseCommand):
+    help = 'ارسال یک نوتیفیکیشن به همه کاربران یک بخش'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title', required=True, help='عنوان نوتیفیکیشن')
+        parser.add_argument('--message', required=True, help='متن نوتیفیکیشن')
+        parser.add_argument(
+            '--type', default='system',
+            choices=[choice for choice, _ in Notification.NOTIFICATION_TYPE_CHOICES],
+            help='نوع نوتیفیکیشن',
+        )
+        parser.add_argument('--segment', choices=list(SEGMENTS), help='بخش کاربران')
+        parser.add_argument('--province', help='فقط دانشجویان این استان')
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE, help='تعداد نوتیفیکیشن‌های هر دسته')
+
+    def handle(self, *args, **options):
+        if options['province']:
+            recipients = students_in_province(options['province'])
+        elif options['segment']:
+            recipients = SEGMENTS[options['segment']]()
+        else:
+            raise CommandError('یکی از --segment یا --province را مشخص کنید')
+
+        sent = broadcast(
+            recipients,
+            title=options['title'],
+            message=options['message'],
+            notification_type=options['type'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'{sent} نوتیفیکیشن ارسال شد'))
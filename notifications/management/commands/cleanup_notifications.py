@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.retention import BATCH_SIZE, archive_read_notifications, collapse_duplicate_unread
+
+
+class Command(BaseCommand):
+    help = 'بایگانی و حذف نوتیفیکیشن‌های خوانده شده قدیمی و ادغام نوتیفیکیشن‌های تکراری'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='سن نوتیفیکیشن‌های خوانده شده برای حذف (پیش‌فرض: NOTIFICATION_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='تعداد ردیف‌های هر دسته')
+        parser.add_argument('--archive-dir', default=None, help='پوشه فایل‌های بایگانی (پیش‌فرض: NOTIFICATION_ARCHIVE_DIR)')
+        parser.add_argument('--no-archive', action='store_true', help='حذف بدون بایگانی')
+        parser.add_argument('--interval', type=float, default=None, help='اجرای دوره‌ای با این فاصله (ثانیه)')
+
+    def handle(self, *args, **options):
+        while True:
+            deleted, path = archive_read_notifications(
+                older_than_days=options['days'],
+                archive_dir=options['archive_dir'],
+                batch_size=options['batch_size'],
+                archive=not options['no_archive'],
+            )
+            if path:
+                self.stdout.write(f'{deleted} نوتیفیکیشن در {path} بایگانی و حذف شد')
+            else:
+                self.stdout.write(f'{deleted} نوتیفیکیشن حذف شد')
+
+            collapsed = collapse_duplicate_unread(batch_size=options['batch_size'])
+            self.stdout.write(f'{collapsed} نوتیفیکیشن تکراری ادغام شد')
+
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:17
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def build_conversations(apps, schema_editor):
+    Message = apps.get_model('notifications', 'Message')
+    Conversation = apps.get_model('notifications', 'Conversation')
+    ConversationParticipant = apps.get_model('notifications', 'ConversationParticipant')
+
+    # (کاربر اول، کاربر دوم) -> [آخرین پیام، زمان آن، خوانده نشده‌های هر کاربر]
+    pairs = {}
+    messages = Message.objects.order_by('created_at', 'id').values_list(
+        'id', 'sender_id', 'receiver_id', 'created_at', 'is_read'
+    )
+    for message_id, sender_id, receiver_id, created_at, is_read in messages.iterator():
+        key = tuple(sorted([sender_id, receiver_id]))
+        state = pairs.setdefault(key, [None, None, defaultdict(int)])
+        state[0], state[1] = message_id, created_at
+        if not is_read:
+            state[2][receiver_id] += 1
+
+    for (first_id, second_id), (last_message_id, last_activity, unread) in pairs.items():
+        conversation = Conversation.objects.create(
+            first_user_id=first_id, second_user_id=second_id, last_message_id=last_message_id
+        )
+        ConversationParticipant.objects.bulk_create([
+            ConversationParticipant(
+                conversation=conversation, user_id=user_id, peer_id=peer_id, unread_count=unread[user_id]
+            )
+            for user_id, peer_id in {(first_id, second_id), (second_id, first_id)}
+        ])
+        # last_activity با auto_now_add پر شده است
+        Conversation.objects.filter(pk=conversation.pk).update(last_activity=last_activity)
+        ConversationParticipant.objects.filter(conversation=conversation).update(last_activity=last_activity)
+        Message.objects.filter(
+            models.Q(sender_id=first_id, receiver_id=second_id) | models.Q(sender_id=second_id, receiver_id=first_id)
+        ).update(conversation=conversation)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity', models.DateTimeField(auto_now_add=True, verbose_name='آخرین فعالیت')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('first_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='کاربر اول')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='notifications.message', verbose_name='آخرین پیام')),
+                ('second_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='کاربر دوم')),
+            ],
+            options={
+                'verbose_name': 'گفتگو',
+                'verbose_name_plural': 'گفتگوها',
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='notifications.conversation', verbose_name='گفتگو'),
+        ),
+        migrations.CreateModel(
+            name='ConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='پیام\u200cهای خوانده نشده')),
+                ('last_activity', models.DateTimeField(auto_now_add=True, verbose_name='آخرین فعالیت')),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='notifications.conversation', verbose_name='گفتگو')),
+                ('peer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='طرف گفتگو')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+            ],
+            options={
+                'verbose_name': 'شرکت\u200cکننده گفتگو',
+                'verbose_name_plural': 'شرکت\u200cکنندگان گفتگو',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.CheckConstraint(condition=models.Q(('first_user__lte', models.F('second_user'))), name='conversation_ordered_users'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversation',
+            unique_together={('first_user', 'second_user')},
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['user', '-last_activity', '-id'], name='participant_inbox_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversationparticipant',
+            unique_together={('conversation', 'user')},
+        ),
+        migrations.RunPython(build_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_conversation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='attachment_checksum',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='checksum ضمیمه (sha256)'),
+        ),
+    ]
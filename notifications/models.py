@@ -1,4 +1,5 @@
 from django.db import models
+from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
@@ -57,6 +58,12 @@ class Notification(models.Model):
         verbose_name='نوع شیء مرتبط'
     )
     
+    # تعداد نوتیفیکیشن‌های تکراری خوانده نشده‌ای که در این ردیف ادغام شده‌اند
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='تعداد'
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='تاریخ ایجاد'
@@ -66,6 +73,16 @@ class Notification(models.Model):
         verbose_name = 'نوتیفیکیشن'
         verbose_name_plural = 'نوتیفیکیشن‌ها'
         ordering = ['-created_at']
+        indexes = [
+            # لیست نوتیفیکیشن‌های کاربر
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created_idx'),
+            # نوتیفیکیشن‌های خوانده نشده و شمارش آن‌ها؛ فقط ردیف‌های خوانده نشده
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.title}"
@@ -94,6 +111,15 @@ class Message(models.Model):
         verbose_name='گیرنده'
     )
     
+    conversation = models.ForeignKey(
+        'Conversation',
+        on_delete=models.CASCADE,
+        related_name='messages',
+        null=True,
+        blank=True,
+        verbose_name='گفتگو'
+    )
+    
     subject = models.CharField(
         max_length=200,
         blank=True,
@@ -119,6 +145,13 @@ class Message(models.Model):
         verbose_name='ضمیمه'
     )
     
+    attachment_checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name='checksum ضمیمه (sha256)'
+    )
+    
     is_read = models.BooleanField(
         default=False,
         verbose_name='خوانده شده'
@@ -133,6 +166,113 @@ class Message(models.Model):
         verbose_name = 'پیام'
         verbose_name_plural = 'پیام‌ها'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['receiver', '-created_at', '-id'], name='message_receiver_created_idx'),
+            models.Index(fields=['sender', '-created_at', '-id'], name='message_sender_created_idx'),
+            models.Index(fields=['conversation', '-created_at', '-id'], name='message_conversation_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.get_full_name()} -> {self.receiver.get_full_name()}"
+    
+    def get_attachment_url(self):
+        return reverse('notifications:message_attachment', args=[self.pk]) if self.attachment else None
+
+
+class Conversation(models.Model):
+    """گفتگوی بین دو کاربر"""
+    
+    # شرکت‌کنندگان به ترتیب شناسه ذخیره می‌شوند تا هر جفت یک گفتگو داشته باشد
+    first_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='کاربر اول'
+    )
+    
+    second_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='کاربر دوم'
+    )
+    
+    last_message = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        verbose_name='آخرین پیام'
+    )
+    
+    last_activity = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='آخرین فعالیت'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='تاریخ ایجاد'
+    )
+    
+    class Meta:
+        verbose_name = 'گفتگو'
+        verbose_name_plural = 'گفتگوها'
+        unique_together = ['first_user', 'second_user']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(first_user__lte=models.F('second_user')),
+                name='conversation_ordered_users',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.first_user.get_full_name()} - {self.second_user.get_full_name()}"
+
+
+class ConversationParticipant(models.Model):
+    """وضعیت یک گفتگو برای یکی از دو شرکت‌کننده؛ یک ردیف در صندوق پیام کاربر"""
+    
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='participants',
+        verbose_name='گفتگو'
+    )
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='conversations',
+        verbose_name='کاربر'
+    )
+    
+    peer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='طرف گفتگو'
+    )
+    
+    unread_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='پیام‌های خوانده نشده'
+    )
+    
+    # کپی last_activity گفتگو تا صندوق پیام با یک ایندکس مرتب شود
+    last_activity = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='آخرین فعالیت'
+    )
+    
+    class Meta:
+        verbose_name = 'شرکت‌کننده گفتگو'
+        verbose_name_plural = 'شرکت‌کنندگان گفتگو'
+        unique_together = ['conversation', 'user']
+        indexes = [
+            models.Index(fields=['user', '-last_activity', '-id'], name='participant_inbox_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.peer.get_full_name()}"
@@ -0,0 +1,67 @@
+"""
+صفحه‌بندی keyset برای لیست نوتیفیکیشن‌ها، پیام‌ها و گفتگوها
+
+به‌جای OFFSET، هر صفحه از ردیف‌های قدیمی‌تر از (created_at, id) آخرین
+ردیف صفحه قبل شروع می‌شود؛ پس هزینه هر صفحه با عمق تاریخچه کاربر رشد
+نمی‌کند و با ایندکس‌های (کاربر، -created_at، -id) خوانده می‌شود. موقعیت
+به‌صورت یک cursor مبهم (base64) به کلاینت داده می‌شود.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+PAGE_SIZE = 20
+
+
+def encode_cursor(obj, field='created_at'):
+    """cursor صفحه بعد از obj"""
+    raw = f'{getattr(obj, field).isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    (زمان، id) موقعیت cursor
+
+    Raises:
+        ValueError: اگر cursor معتبر نباشد
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('cursor نامعتبر است') from e
+
+
+def keyset_page(queryset, cursor=None, page_size=PAGE_SIZE, field='created_at'):
+    """
+    یک صفحه از queryset به ترتیب نزولی (field, id)
+
+    Args:
+        queryset: نوتیفیکیشن‌ها، پیام‌ها یا گفتگوهای فیلتر شده
+        cursor: cursor صفحه قبل؛ None برای صفحه اول
+        field: فیلد زمانی مرتب‌سازی
+
+    Returns:
+        tuple: (ردیف‌های صفحه، cursor صفحه بعد یا None)
+
+    Raises:
+        ValueError: اگر cursor معتبر نباشد
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        # شرط lte جدا نوشته می‌شود تا ایندکس به‌صورت بازه خوانده شود
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': timestamp}) | Q(id__lt=pk),
+            **{f'{field}__lte': timestamp},
+        )
+
+    # یک ردیف اضافه برای تشخیص وجود صفحه بعد
+    items = list(queryset[:page_size + 1])
+    if len(items) > page_size:
+        items = items[:page_size]
+        return items, encode_cursor(items[-1], field)
+    return items, None
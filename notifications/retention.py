@@ -0,0 +1,143 @@
+"""
+نگهداری جدول نوتیفیکیشن‌ها
+
+- نوتیفیکیشن‌های خوانده شده قدیمی‌تر از NOTIFICATION_RETENTION_DAYS در
+  دسته‌ها در فایل JSONL فشرده (gzip) بایگانی و سپس حذف می‌شوند.
+- نوتیفیکیشن‌های خوانده نشده تکراری یک کاربر (نوع، عنوان و شیء مرتبط
+  یکسان) در جدیدترین ردیف با شمارنده count ادغام می‌شوند.
+
+سیگنال post_delete هر ردیف حذف شده شمارنده خوانده نشده‌های کاربر را
+بی‌اعتبار می‌کند؛ حذف‌ها در deferred_invalidation انجام می‌شوند تا این کار
+یک بار برای هر کاربر باشد.
+"""
+import gzip
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import Notification
+from .unread import deferred_invalidation
+
+BATCH_SIZE = 1000
+
+DEFAULT_RETENTION_DAYS = 90
+
+
+def _archive_record(notification):
+    return {
+        'id': notification['id'],
+        'user_id': notification['user_id'],
+        'title': notification['title'],
+        'message': notification['message'],
+        'notification_type': notification['notification_type'],
+        'related_object_id': notification['related_object_id'],
+        'related_object_type': notification['related_object_type'],
+        'count': notification['count'],
+        'created_at': notification['created_at'].isoformat(),
+    }
+
+
+def archive_read_notifications(older_than_days=None, archive_dir=None, batch_size=BATCH_SIZE, archive=True):
+    """
+    بایگانی و حذف نوتیفیکیشن‌های خوانده شده قدیمی
+
+    هر دسته پیش از حذف در فایل بایگانی نوشته می‌شود تا با توقف کار
+    ردیفی بدون بایگانی حذف نشود.
+
+    Args:
+        older_than_days: سن نوتیفیکیشن‌ها به روز؛ پیش‌فرض NOTIFICATION_RETENTION_DAYS
+        archive_dir: پوشه فایل‌های بایگانی؛ پیش‌فرض NOTIFICATION_ARCHIVE_DIR
+        archive: اگر False باشد فقط حذف می‌شود
+
+    Returns:
+        tuple: (تعداد حذف شده، مسیر فایل بایگانی یا None)
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by('id').values(
+        'id', 'user_id', 'title', 'message', 'notification_type',
+        'related_object_id', 'related_object_type', 'count', 'created_at',
+    )
+
+    path = None
+    archive_file = None
+    deleted = 0
+    last_id = 0
+    try:
+        while True:
+            batch = list(expired.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]['id']
+
+            if archive:
+                if archive_file is None:
+                    archive_dir = Path(archive_dir or settings.NOTIFICATION_ARCHIVE_DIR)
+                    archive_dir.mkdir(parents=True, exist_ok=True)
+                    path = archive_dir / f'notifications-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz'
+                    archive_file = gzip.open(path, 'at', encoding='utf-8')
+                for notification in batch:
+                    archive_file.write(json.dumps(_archive_record(notification), ensure_ascii=False) + '\n')
+                archive_file.flush()
+
+            with deferred_invalidation():
+                deleted += Notification.objects.filter(id__in=[n['id'] for n in batch]).delete()[0]
+    finally:
+        if archive_file is not None:
+            archive_file.close()
+    return deleted, path
+
+
+def collapse_duplicate_unread(batch_size=BATCH_SIZE):
+    """
+    ادغام نوتیفیکیشن‌های خوانده نشده تکراری
+
+    نوتیفیکیشن‌های خوانده نشده یک کاربر با نوع، عنوان و شیء مرتبط یکسان در
+    جدیدترین ردیف ادغام و تعدادشان در count جمع می‌شود. شیء مرتبط اختیاری
+    است و ردیف‌های بدون آن با هم مقایسه می‌شوند.
+
+    Returns:
+        int: تعداد ردیف‌های حذف شده
+    """
+    duplicates = (
+        Notification.objects.filter(is_read=False)
+        .values('user_id', 'notification_type', 'title', 'related_object_type', 'related_object_id')
+        .annotate(rows=Count('id'), total=Sum('count'), keep_id=Max('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+
+    # گروه‌های ادغام شده دیگر تکراری نیستند، پس هر بار دسته اول خوانده می‌شود
+    removed = 0
+    while True:
+        groups = list(duplicates[:batch_size])
+        if not groups:
+            break
+        collapsed = _collapse_groups(groups)
+        if not collapsed:
+            break
+        removed += collapsed
+    return removed
+
+
+def _collapse_groups(groups):
+    removed = 0
+    with transaction.atomic(), deferred_invalidation():
+        for group in groups:
+            Notification.objects.filter(id=group['keep_id']).update(count=group['total'])
+            removed += Notification.objects.filter(
+                user_id=group['user_id'],
+                notification_type=group['notification_type'],
+                title=group['title'],
+                related_object_type=group['related_object_type'],
+                related_object_id=group['related_object_id'],
+                is_read=False,
+                id__lt=group['keep_id'],
+            ).delete()[0]
+    return removed
@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .broker import get_broker, notification_event
+from .models import Notification
+from .unread import invalidate_unread_count
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, **kwargs):
+    """انتشار نوتیفیکیشن جدید برای استریم کاربر پس از ثبت تراکنش"""
+    if created:
+        event = notification_event(instance)
+        transaction.on_commit(lambda: get_broker().publish(instance.user_id, event))
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    """بی‌اعتبار کردن شمارنده خوانده نشده‌های کاربر"""
+    invalidate_unread_count(instance.user_id)
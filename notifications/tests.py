@@ -1,3 +1,257 @@
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import HttpResponse
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .conversations import send
+from .delivery import notify
+from .models import ConversationParticipant, Message, Notification
+from .retention import archive_read_notifications, collapse_duplicate_unread
+from .unread import unread_count
+
+User = get_user_model()
+
+
+class QueryPlanIndexTests(TestCase):
+    """لیست‌های نوتیفیکیشن و پیام باید از ایندکس‌های ترکیبی استفاده کنند"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user', password='pass', user_type='student')
+        cls.other = User.objects.create_user('other', password='pass', user_type='company')
+        for i in range(20):
+            Notification.objects.create(
+                user=cls.user if i % 2 else cls.other,
+                title='عنوان',
+                message='پیام',
+                notification_type='system',
+                is_read=i % 3 == 0,
+            )
+            Message.objects.create(sender=cls.user, receiver=cls.other, message='سلام')
+            Message.objects.create(sender=cls.other, receiver=cls.user, message='سلام')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # جدول‌های کوچک آزمایشی در غیر این صورت به‌صورت ترتیبی خوانده می‌شوند
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        # مرتب‌سازی باید از ترتیب ایندکس بیاید نه مرتب‌سازی جداگانه
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_notification_list(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user).order_by('-created_at', '-id'),
+            'notification_user_created_idx',
+        )
+
+    def test_notification_list_after_cursor(self):
+        last = Notification.objects.filter(user=self.user).order_by('-created_at', '-id')[4]
+        self.assertUsesIndex(
+            Notification.objects.filter(
+                Q(created_at__lt=last.created_at) | Q(id__lt=last.id),
+                user=self.user,
+                created_at__lte=last.created_at,
+            ).order_by('-created_at', '-id'),
+            'notification_user_created_idx',
+        )
+
+    def test_unread_notifications(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user, is_read=False).order_by('-created_at', '-id'),
+            'notification_unread_idx',
+        )
+
+    def test_received_messages(self):
+        self.assertUsesIndex(
+            Message.objects.filter(receiver=self.user).order_by('-created_at', '-id'),
+            'message_receiver_created_idx',
+        )
+
+    def test_sent_messages(self):
+        self.assertUsesIndex(
+            Message.objects.filter(sender=self.user).order_by('-created_at', '-id'),
+            'message_sender_created_idx',
+        )
+
+
+class ConversationThreadTests(TestCase):
+    """باز کردن گفتگو باید همه پیام‌های دریافتی آن را خوانده کند"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('user', password='pass', user_type='student')
+        self.other = User.objects.create_user('other', password='pass', user_type='company')
+        for _ in range(3):
+            send(Message(sender=self.other, receiver=self.user, message='سلام'))
+        send(Message(sender=self.user, receiver=self.other, message='سلام'))
+        self.participant = ConversationParticipant.objects.get(user=self.user)
+        self.url = reverse('notifications:conversation_detail', args=[self.participant.conversation_id])
+
+    def test_opening_thread_marks_all_read(self):
+        self.assertEqual(self.participant.unread_count, 3)
+        self.client.force_login(self.user)
+        with mock.patch('notifications.views.render', return_value=HttpResponse()) as render:
+            self.client.get(self.url)
+
+        self.assertEqual(len(render.call_args[0][2]['thread_messages']), 4)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.unread_count, 0)
+        self.assertFalse(Message.objects.filter(receiver=self.user, is_read=False).exists())
+        # پیام‌های ارسالی طرف مقابل دست نمی‌خورد
+        self.assertEqual(ConversationParticipant.objects.get(user=self.other).unread_count, 1)
+
+    def test_outsider_cannot_open_thread(self):
+        outsider = User.objects.create_user('outsider', password='pass', user_type='student')
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class DeliveryTests(TestCase):
+    """نوتیفیکیشن‌های یک تراکنش پس از ثبت با هم ذخیره می‌شوند"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('user', password='pass', user_type='student')
+
+    def notify(self, title):
+        notify(self.user, title, 'پیام', 'system')
+
+    def test_one_flush_per_block(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.notify('اول')
+            self.notify('دوم')
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(Notification.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            callbacks[0]()
+        self.assertEqual(set(Notification.objects.values_list('title', flat=True)), {'اول', 'دوم'})
+
+    def test_rolled_back_savepoint_is_discarded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.notify('برگشت خورده')
+                    raise RuntimeError
+            self.notify('ثبت شده')
+        self.assertEqual(list(Notification.objects.values_list('title', flat=True)), ['ثبت شده'])
+
+    def test_rolled_back_savepoint_after_outer_notification(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notify('بیرونی')
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.notify('برگشت خورده')
+                    raise RuntimeError
+            with transaction.atomic():
+                self.notify('savepoint ثبت شده')
+            self.notify('پایانی')
+        self.assertEqual(
+            set(Notification.objects.values_list('title', flat=True)),
+            {'بیرونی', 'savepoint ثبت شده', 'پایانی'},
+        )
+
+    def test_new_queue_after_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notify('اول')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notify('دوم')
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class UnreadCountTests(TestCase):
+    """نشان نوتیفیکیشن‌ها پس از اولین شمارش بدون کوئری خوانده می‌شود"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user', password='pass', user_type='student')
+
+    def test_cached_count_needs_no_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user.pk), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.user, 'عنوان', 'پیام', 'system')
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user.pk), 1)
+
+        notification = Notification.objects.get()
+        notification.is_read = True
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user.pk), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 0)
+
+
+class RetentionTests(TestCase):
+    """بایگانی نوتیفیکیشن‌های خوانده شده قدیمی و ادغام تکراری‌های خوانده نشده"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('user', password='pass', user_type='student')
+        self.other = User.objects.create_user('other', password='pass', user_type='student')
+
+    def create(self, user, title, is_read=False, days_ago=0, **fields):
+        notification = Notification.objects.create(
+            user=user, title=title, message='پیام', notification_type='match', is_read=is_read, **fields
+        )
+        Notification.objects.filter(pk=notification.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return notification
+
+    def test_archive_read_notifications(self):
+        old = [self.create(user, 'قدیمی', is_read=True, days_ago=100) for user in (self.user, self.user, self.other)]
+        recent = self.create(self.user, 'جدید', is_read=True, days_ago=10)
+        unread = self.create(self.user, 'خوانده نشده', days_ago=100)
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            with mock.patch('notifications.unread.cache') as unread_cache:
+                deleted, path = archive_read_notifications(older_than_days=90, archive_dir=archive_dir, batch_size=2)
+            with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+                archived = [json.loads(line) for line in archive_file]
+            self.assertEqual(Path(path).parent, Path(archive_dir))
+
+        self.assertEqual(deleted, 3)
+        self.assertEqual([record['id'] for record in archived], [notification.pk for notification in old])
+        self.assertEqual(archived[0]['title'], 'قدیمی')
+        self.assertEqual(set(Notification.objects.values_list('pk', flat=True)), {recent.pk, unread.pk})
+        # یک بی‌اعتبارسازی برای هر دسته، نه برای هر ردیف
+        self.assertEqual(unread_cache.delete_many.call_count, 2)
+        unread_cache.delete.assert_not_called()
+
+    def test_collapse_duplicate_unread(self):
+        for _ in range(3):
+            self.create(self.user, 'مچینگ جدید')
+        keep = self.create(self.user, 'مچینگ جدید', count=2)
+        other_title = self.create(self.user, 'پیشنهاد شغل')
+        read = self.create(self.user, 'مچینگ جدید', is_read=True)
+        other_user = [self.create(self.other, 'مچینگ جدید') for _ in range(2)]
+        related = [self.create(self.user, 'مچینگ جدید', related_object_id=7, related_object_type='match') for _ in range(2)]
 
-# Create your tests here.
+        with mock.patch('notifications.unread.cache') as unread_cache:
+            self.assertEqual(collapse_duplicate_unread(batch_size=1), 5)
+        self.assertEqual(
+            dict(Notification.objects.values_list('pk', 'count')),
+            {keep.pk: 5, other_title.pk: 1, read.pk: 1, other_user[1].pk: 2, related[1].pk: 2},
+        )
+        # یک بار برای هر کاربر در هر دسته
+        self.assertEqual(unread_cache.delete_many.call_count, 3)
+        unread_cache.delete.assert_not_called()
+        self.assertEqual(collapse_duplicate_unread(), 0)
@@ -0,0 +1,84 @@
+"""
+شمارنده نوتیفیکیشن‌های خوانده نشده هر کاربر
+
+تعداد در کش Django نگهداری می‌شود و با هر ذخیره یا حذف نوتیفیکیشن
+(سیگنال‌ها) و به‌روزرسانی‌های دسته‌ای بی‌اعتبار می‌شود؛ نشان نوار
+ناوبری و API تعداد در حالت عادی نوتیفیکیشن‌ها را نمی‌شمارند. اگر کش
+(CACHES) بین پردازه‌ها مشترک نباشد، بی‌اعتبارسازی worker‌ها و دستورات فقط پس از
+UNREAD_COUNT_TIMEOUT به نشان می‌رسد.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+# سقف عمر مقدار کش شده (ثانیه) در صورت از دست رفتن یک بی‌اعتبارسازی
+DEFAULT_UNREAD_COUNT_TIMEOUT = 60
+
+# کاربرانی که بی‌اعتبارسازی آن‌ها تا پایان deferred_invalidation عقب افتاده است
+_deferred = threading.local()
+
+
+def _cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    """تعداد نوتیفیکیشن‌های خوانده نشده کاربر"""
+    key = _cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, getattr(settings, 'UNREAD_COUNT_TIMEOUT', DEFAULT_UNREAD_COUNT_TIMEOUT))
+    return count
+
+
+def invalidate_unread_count(user_id):
+    """
+    بی‌اعتبار کردن شمارنده کاربر
+
+    پس از ثبت تراکنش هم دوباره پاک می‌شود تا مقداری که پیش از ثبت خوانده
+    و کش شده باقی نماند.
+    """
+    user_ids = getattr(_deferred, 'user_ids', None)
+    if user_ids is not None:
+        user_ids.add(user_id)
+        return
+    key = _cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_unread_counts(user_ids):
+    """بی‌اعتبار کردن شمارنده چند کاربر؛ مانند invalidate_unread_count"""
+    deferred = getattr(_deferred, 'user_ids', None)
+    if deferred is not None:
+        deferred.update(user_ids)
+        return
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@contextmanager
+def deferred_invalidation():
+    """
+    بی‌اعتبارسازی‌های داخل بلوک در پایان آن یک بار برای هر کاربر انجام می‌شوند
+
+    برای حذف‌های دسته‌ای که برای هر ردیف سیگنال post_delete می‌فرستند.
+    """
+    if getattr(_deferred, 'user_ids', None) is not None:
+        yield
+        return
+    _deferred.user_ids = set()
+    try:
+        yield
+    finally:
+        user_ids = _deferred.user_ids
+        _deferred.user_ids = None
+        if user_ids:
+            invalidate_unread_counts(user_ids)
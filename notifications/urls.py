@@ -9,6 +9,8 @@ urlpatterns = [
     path("messages/", views.messages_list, name="messages"),
     path("messages/send/", views.send_message, name="send_message"),
     path("messages/<int:message_id>/", views.message_detail, name="message_detail"),
+    path("conversations/<int:conversation_id>/", views.conversation_detail, name="conversation_detail"),
+    path("messages/<int:message_id>/attachment/", views.message_attachment, name="message_attachment"),
     
     # API endpoints
     path("mark-read/<int:notification_id>/", views.mark_notification_read_api, name="mark_read_api"),
@@ -16,4 +18,7 @@ urlpatterns = [
     path("delete/<int:notification_id>/", views.delete_notification_api, name="delete_notification_api"),
     path("unread-count/", views.unread_count_api, name="unread_count_api"),
     path("stream/", views.notification_stream, name="notification_stream"),
+    path("list/", views.notifications_api, name="notifications_api"),
+    path("messages/list/", views.messages_api, name="messages_api"),
+    path("messages/conversations/", views.conversations_api, name="conversations_api"),
 ]
@@ -1,25 +1,81 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from .models import Notification, Message
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.http import urlencode
+from .models import ConversationParticipant, Notification, Message
 from .forms import MessageForm
+from files.responses import send_file
+from files.uploads import file_checksum
+from .broker import get_broker, notification_event
+from .conversations import inbox, mark_conversation_read, mark_read, send, thread
+from .delivery import notify
+from .pagination import keyset_page
+from .unread import invalidate_unread_count, unread_count
+import json
+
+
+def _html_page(request, queryset, cursor_param, **kwargs):
+    """صفحه keyset برای صفحات HTML؛ cursor نامعتبر به صفحه اول برمی‌گردد"""
+    try:
+        return keyset_page(queryset, request.GET.get(cursor_param), **kwargs)
+    except ValueError:
+        return keyset_page(queryset, **kwargs)
+
+
+def _api_url(name, cursor, **params):
+    """آدرس صفحه بعد API برای اسکرول بی‌پایان"""
+    if not cursor:
+        return None
+    return f"{reverse(name)}?{urlencode({**params, 'cursor': cursor, 'html': 1})}"
 
 
 @login_required
 def notifications(request):
     """لیست نوتیفیکیشن‌ها"""
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    unread_notifications = notifications.filter(is_read=False)
-    unread_count = unread_notifications.count()
+    notifications = Notification.objects.filter(user=request.user)
+    page, next_cursor = _html_page(request, notifications, 'cursor')
+    unread_page, unread_next_cursor = _html_page(request, notifications.filter(is_read=False), 'unread_cursor')
     
     return render(request, 'notifications/notifications.html', {
-        'notifications': notifications,
-        'unread_notifications': unread_notifications,
-        'unread_count': unread_count
+        'notifications': page,
+        'next_url': _api_url('notifications:notifications_api', next_cursor),
+        'unread_notifications': unread_page,
+        'unread_next_url': _api_url('notifications:notifications_api', unread_next_cursor, unread=1),
+        'unread_count': unread_count(request.user.pk)
     })
 
 
+@login_required
+def notifications_api(request):
+    """API صفحه‌بندی شده نوتیفیکیشن‌ها با cursor"""
+    notifications = Notification.objects.filter(user=request.user)
+    unread_only = bool(request.GET.get('unread'))
+    if unread_only:
+        notifications = notifications.filter(is_read=False)
+    
+    try:
+        page, next_cursor = keyset_page(notifications, request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    data = {
+        'results': [
+            {**notification_event(notification), 'is_read': notification.is_read}
+            for notification in page
+        ],
+        'next_cursor': next_cursor,
+        'next_url': _api_url('notifications:notifications_api', next_cursor, **({'unread': 1} if unread_only else {})),
+    }
+    if request.GET.get('html'):
+        data['html'] = render_to_string(
+            'notifications/_notification_items.html', {'notifications': page}, request=request
+        )
+    return JsonResponse(data)
+
+
 @login_required
 def mark_as_read(request, notification_id):
     """علامت‌گذاری نوتیفیکیشن به عنوان خوانده شده"""
@@ -34,18 +90,118 @@ def mark_as_read(request, notification_id):
     return redirect('notifications:notifications')
 
 
+MESSAGE_BOXES = {
+    'received': 'receiver',
+    'sent': 'sender',
+}
+
+
+def _message_box(user, box):
+    return Message.objects.filter(**{MESSAGE_BOXES[box]: user}).select_related('sender', 'receiver')
+
+
 @login_required
 def messages_list(request):
-    """لیست پیام‌ها"""
-    received_messages = Message.objects.filter(receiver=request.user).order_by('-created_at')
-    sent_messages = Message.objects.filter(sender=request.user).order_by('-created_at')
+    """صندوق پیام: گفتگوهای کاربر به ترتیب آخرین فعالیت"""
+    conversations, next_cursor = _html_page(request, inbox(request.user), 'cursor', field='last_activity')
     
     return render(request, 'notifications/messages.html', {
-        'received_messages': received_messages,
-        'sent_messages': sent_messages
+        'conversations': conversations,
+        'next_url': _api_url('notifications:conversations_api', next_cursor),
+    })
+
+
+@login_required
+def conversation_detail(request, conversation_id):
+    """پیام‌های یک گفتگو؛ با باز شدن گفتگو همه پیام‌های دریافتی خوانده می‌شوند"""
+    participant = get_object_or_404(
+        ConversationParticipant.objects.select_related('peer', 'conversation'),
+        conversation_id=conversation_id,
+        user=request.user,
+    )
+    
+    page, next_cursor = _html_page(request, thread(participant.conversation), 'cursor')
+    if participant.unread_count:
+        mark_conversation_read(participant)
+    
+    return render(request, 'notifications/conversation_detail.html', {
+        'participant': participant,
+        # صفحه‌ها از جدید به قدیم خوانده و به ترتیب زمانی نمایش داده می‌شوند
+        'thread_messages': page[::-1],
+        'older_url': next_cursor and f"?{urlencode({'cursor': next_cursor})}",
     })
 
 
+@login_required
+def conversations_api(request):
+    """API صفحه‌بندی شده گفتگوهای کاربر با cursor"""
+    try:
+        page, next_cursor = keyset_page(inbox(request.user), request.GET.get('cursor'), field='last_activity')
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    data = {
+        'results': [
+            {
+                'id': participant.conversation_id,
+                'peer': participant.peer.get_full_name(),
+                'unread_count': participant.unread_count,
+                'last_activity': participant.last_activity.isoformat(),
+                'url': reverse('notifications:conversation_detail', args=[participant.conversation_id]),
+                'last_message': participant.conversation.last_message and {
+                    'id': participant.conversation.last_message.id,
+                    'message': participant.conversation.last_message.message,
+                    'sender_id': participant.conversation.last_message.sender_id,
+                },
+            }
+            for participant in page
+        ],
+        'next_cursor': next_cursor,
+        'next_url': _api_url('notifications:conversations_api', next_cursor),
+    }
+    if request.GET.get('html'):
+        data['html'] = render_to_string(
+            'notifications/_conversation_items.html', {'conversations': page}, request=request
+        )
+    return JsonResponse(data)
+
+
+@login_required
+def messages_api(request):
+    """API صفحه‌بندی شده پیام‌های دریافتی یا ارسالی با cursor"""
+    box = request.GET.get('box', 'received')
+    if box not in MESSAGE_BOXES:
+        return JsonResponse({'error': 'صندوق پیام نامعتبر است'}, status=400)
+    
+    try:
+        page, next_cursor = keyset_page(_message_box(request.user, box), request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    data = {
+        'results': [
+            {
+                'id': message.id,
+                'sender': message.sender.get_full_name(),
+                'receiver': message.receiver.get_full_name(),
+                'subject': message.subject,
+                'message': message.message,
+                'is_read': message.is_read,
+                'created_at': message.created_at.isoformat(),
+                'url': reverse('notifications:message_detail', args=[message.id]),
+            }
+            for message in page
+        ],
+        'next_cursor': next_cursor,
+        'next_url': _api_url('notifications:messages_api', next_cursor, box=box),
+    }
+    if request.GET.get('html'):
+        data['html'] = render_to_string(
+            'notifications/_message_items.html', {'message_list': page, 'box': box}, request=request
+        )
+    return JsonResponse(data)
+
+
 @login_required
 def send_message(request):
     """ارسال پیام"""
@@ -54,10 +210,12 @@ def send_message(request):
         if form.is_valid():
             message = form.save(commit=False)
             message.sender = request.user
-            message.save()
+            if message.attachment:
+                message.attachment_checksum = file_checksum(form.cleaned_data['attachment'])
+            send(message)
             
             # ارسال نوتیفیکیشن به گیرنده
-            Notification.objects.create(
+            notify(
                 user=message.receiver,
                 title='پیام جدید',
                 message=f'شما پیام جدیدی از {message.sender.get_full_name()} دریافت کردید',
@@ -75,7 +233,7 @@ def send_message(request):
 @login_required
 def message_detail(request, message_id):
     """جزئیات پیام"""
-    message = get_object_or_404(Message, id=message_id)
+    message = get_object_or_404(Message.objects.select_related('sender', 'receiver'), id=message_id)
     
     # بررسی دسترسی کاربر
     if request.user not in [message.sender, message.receiver]:
@@ -84,43 +242,78 @@ def message_detail(request, message_id):
     
     # علامت‌گذاری پیام به عنوان خوانده شده اگر گیرنده آن هستیم
     if request.user == message.receiver and not message.is_read:
-        message.is_read = True
-        message.save()
+        mark_read(message)
     
     return render(request, 'notifications/message_detail.html', {'message': message})
 
 
+@login_required
+def message_attachment(request, message_id):
+    """دانلود ضمیمه پیام برای فرستنده و گیرنده"""
+    message = get_object_or_404(Message, id=message_id)
+    if request.user.pk not in [message.sender_id, message.receiver_id] or not message.attachment:
+        raise Http404
+    return send_file(request, message.attachment, checksum=message.attachment_checksum)
+
+
 # Real-time notifications
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _last_event_id(request):
+    try:
+        return int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        return None
+
+
+def _format_event(event):
+    return f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+
 @login_required
-def notification_stream(request):
-    """استریم نوتیفیکیشن‌های real-time"""
-    from django.http import StreamingHttpResponse
-    import json
-    import time
-    
-    def event_stream():
-        while True:
-            # دریافت نوتیفیکیشن‌های جدید
-            new_notifications = Notification.objects.filter(
-                user=request.user,
-                is_read=False
-            ).order_by('-created_at')[:5]
-            
-            for notification in new_notifications:
-                data = {
-                    'id': notification.id,
-                    'title': notification.title,
-                    'message': notification.message,
-                    'type': notification.notification_type,
-                    'created_at': notification.created_at.isoformat()
-                }
-                yield f"data: {json.dumps(data)}\n\n"
+async def notification_stream(request):
+    """
+    استریم نوتیفیکیشن‌های real-time (SSE)
+    
+    اتصال فقط با انتشار نوتیفیکیشن جدید برای کاربر بیدار می‌شود و نخ یا
+    کوئری دوره‌ای نگه نمی‌دارد؛ باید روی ASGI (pysib_project.asgi) اجرا شود.
+    مرورگر هنگام اتصال مجدد Last-Event-ID را می‌فرستد و نوتیفیکیشن‌های
+    پس از آن از پایگاه داده ارسال می‌شوند.
+    """
+    user = await request.auser()
+    last_event_id = _last_event_id(request)
+    
+    async def event_stream():
+        # اشتراک پیش از خواندن نوتیفیکیشن‌های جاافتاده تا رویدادی گم نشود
+        subscription = get_broker().subscribe(user.pk)
+        last_id = last_event_id
+        try:
+            if last_id is not None:
+                missed = Notification.objects.filter(user_id=user.pk, id__gt=last_id).order_by('id')
+                async for notification in missed:
+                    last_id = notification.id
+                    yield _format_event(notification_event(notification))
             
-            time.sleep(5)  # بررسی هر 5 ثانیه
+            while True:
+                try:
+                    event = await subscription.get(STREAM_KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    # رویدادها از دست رفته؛ مرورگر با Last-Event-ID دوباره وصل می‌شود
+                    break
+                if last_id is not None and event['id'] <= last_id:
+                    continue
+                last_id = event['id']
+                yield _format_event(event)
+        finally:
+            subscription.close()
     
     response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
     response['Cache-Control'] = 'no-cache'
-    response['Connection'] = 'keep-alive'
+    response['X-Accel-Buffering'] = 'no'
     return response
 
 
@@ -139,6 +332,8 @@ def mark_notification_read_api(request, notification_id):
 def mark_all_read_api(request):
     """API برای علامت‌گذاری همه نوتیفیکیشن‌ها به عنوان خوانده شده"""
     Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    # update() سیگنال post_save ارسال نمی‌کند
+    invalidate_unread_count(request.user.pk)
     
     return JsonResponse({'success': True})
 
@@ -155,5 +350,4 @@ def delete_notification_api(request, notification_id):
 @login_required
 def unread_count_api(request):
     """API برای تعداد نوتیفیکیشن‌های خوانده نشده"""
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
-    return JsonResponse({'count': count})
+    return JsonResponse({'count': unread_count(request.user.pk)})
@@ -1,6 +1,10 @@
 import os
+import json
 import logging
+import sqlite3
+import sys
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import NetworkError, RetryAfter, TelegramError, TimedOut
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -10,11 +14,13 @@ from telegram.ext import (
     ContextTypes,
 )
 import random
-from datetime import datetime, timedelta
-import schedule
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+from sortedcontainers import SortedList
 import time
 import threading
 import asyncio
+from collections import defaultdict, deque
 
 # تنظیم لاگینگ
 logging.basicConfig(
@@ -22,15 +28,592 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 💾 ذخیره‌سازی وضعیت ربات
+# داده‌ها در حافظه (self.users و ...) نگه داشته می‌شوند و تغییرات هر چند
+# ثانیه یک بار به‌صورت دسته‌ای در پس‌زمینه نوشته می‌شوند (write-behind)؛
+# نوشتن روی دیسک در نخ جداگانه انجام می‌شود تا حلقه asyncio متوقف نشود.
+FLUSH_INTERVAL = 2  # ثانیه
+FLUSH_BATCH_SIZE = 500  # با این تعداد تغییر، ذخیره زودتر انجام می‌شود
+
+# فیلدهای موقت کاربر که ذخیره نمی‌شوند
+TRANSIENT_USER_FIELDS = {"report_temp"}
+
+# ویژگی‌های دیگر ربات که در جدول meta ذخیره می‌شوند
+META_FIELDS = ("challenges", "last_daily_check")
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_object(obj):
+    if len(obj) == 1 and "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def dump_json(data):
+    return json.dumps(data, default=_encode_value, ensure_ascii=False)
+
+
+def load_json(text):
+    return json.loads(text, object_hook=_decode_object)
+
+
+class StateStore:
+    # رابط ذخیره‌سازی؛ متدها blocking هستند و خارج از حلقه asyncio اجرا می‌شوند
+
+    def load(self):
+        # خروجی: {"users": {...}, "user_states": {...}, "meta": {key: value}}
+        raise NotImplementedError
+
+    def write(self, changes):
+        # changes: {"clear": bool, "users": [(user_id, json یا None)],
+        #           "user_states": [(user_id, state یا None)], "meta": {key: json}}
+        # None یعنی حذف ردیف
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryStateStore(StateStore):
+    # بدون ذخیره روی دیسک؛ برای توسعه و تست
+    def load(self):
+        return {"users": {}, "user_states": {}, "meta": {}}
+
+    def write(self, changes):
+        pass
+
+
+class SQLiteStateStore(StateStore):
+    def __init__(self, path):
+        self.path = path
+        # اتصال در نخ‌های پس‌زمینه استفاده می‌شود؛ نوشتن‌ها با قفل پشت سر هم انجام می‌شوند
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS user_states (user_id INTEGER PRIMARY KEY, state TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def load(self):
+        with self.lock:
+            users = {
+                user_id: load_json(data)
+                for user_id, data in self.connection.execute("SELECT user_id, data FROM users")
+            }
+            user_states = dict(self.connection.execute("SELECT user_id, state FROM user_states"))
+            meta = {key: load_json(value) for key, value in self.connection.execute("SELECT key, value FROM meta")}
+        return {
+            "users": users,
+            "user_states": user_states,
+            "meta": meta,
+        }
+
+    def write(self, changes):
+        with self.lock, self.connection:
+            cursor = self.connection.cursor()
+            if changes["clear"]:
+                cursor.execute("DELETE FROM users")
+                cursor.execute("DELETE FROM user_states")
+                cursor.execute("DELETE FROM meta")
+            cursor.executemany(
+                "INSERT INTO users (user_id, data) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data",
+                [(user_id, data) for user_id, data in changes["users"] if data is not None]
+            )
+            cursor.executemany(
+                "DELETE FROM users WHERE user_id = ?",
+                [(user_id,) for user_id, data in changes["users"] if data is None]
+            )
+            cursor.executemany(
+                "INSERT INTO user_states (user_id, state) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET state = excluded.state",
+                [(user_id, state) for user_id, state in changes["user_states"] if state is not None]
+            )
+            cursor.executemany(
+                "DELETE FROM user_states WHERE user_id = ?",
+                [(user_id,) for user_id, state in changes["user_states"] if state is None]
+            )
+            cursor.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                list(changes["meta"].items())
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class StatePersistence:
+    # ثبت تغییرات وضعیت ربات و ذخیره دسته‌ای آن‌ها در پس‌زمینه
+    def __init__(self, bot, store, flush_interval=FLUSH_INTERVAL, batch_size=FLUSH_BATCH_SIZE):
+        self.bot = bot
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dirty_users = set()
+        self.dirty_states = set()
+        self.dirty_meta = set()
+        self.cleared = False
+        self._wake = None
+        self._flush_lock = None
+        self._task = None
+
+    def load(self):
+        state = self.store.load()
+        self.bot.users = state["users"]
+        self.bot.user_states = state["user_states"]
+        self.bot.challenges = state["meta"].get("challenges", [])
+        self.bot.last_daily_check = state["meta"].get("last_daily_check")
+        logger.info(f"Loaded {len(self.bot.users)} users from storage")
+
+    # ثبت تغییرات؛ مقدار نهایی هنگام ذخیره از داده‌های ربات خوانده می‌شود
+    def mark_user(self, user_id):
+        self.dirty_users.add(user_id)
+        self._maybe_wake()
+
+    def mark_state(self, user_id):
+        self.dirty_states.add(user_id)
+        self._maybe_wake()
+
+    def mark_meta(self, key):
+        self.dirty_meta.add(key)
+
+    def clear(self):
+        self.cleared = True
+        self.dirty_users.clear()
+        self.dirty_states.clear()
+        self.dirty_meta.update(META_FIELDS)
+
+    def _maybe_wake(self):
+        if self._wake is not None and len(self.dirty_users) + len(self.dirty_states) >= self.batch_size:
+            self._wake.set()
+
+    def _collect(self):
+        # خواندن مقادیر در همان حلقه asyncio تا با هندلرها هم‌زمان تغییر نکنند
+        if not (self.cleared or self.dirty_users or self.dirty_states or self.dirty_meta):
+            return None
+        users = []
+        for user_id in self.dirty_users:
+            user_data = self.bot.users.get(user_id)
+            if user_data is not None:
+                user_data = dump_json({k: v for k, v in user_data.items() if k not in TRANSIENT_USER_FIELDS})
+            users.append((user_id, user_data))
+        changes = {
+            "clear": self.cleared,
+            "users": users,
+            "user_states": [(user_id, self.bot.user_states.get(user_id)) for user_id in self.dirty_states],
+            "meta": {key: dump_json(getattr(self.bot, key)) for key in self.dirty_meta},
+        }
+        self.dirty_users = set()
+        self.dirty_states = set()
+        self.dirty_meta = set()
+        self.cleared = False
+        return changes
+
+    def _restore(self, changes):
+        # ذخیره ناموفق؛ تغییرات در دور بعد دوباره نوشته می‌شوند
+        self.cleared = self.cleared or changes["clear"]
+        self.dirty_users.update(user_id for user_id, _ in changes["users"])
+        self.dirty_states.update(user_id for user_id, _ in changes["user_states"])
+        self.dirty_meta.update(changes["meta"])
+
+    async def flush(self):
+        async with self._flush_lock:
+            changes = self._collect()
+            if changes is None:
+                return
+            try:
+                await asyncio.to_thread(self.store.write, changes)
+            except Exception as e:
+                logger.error(f"Error saving state: {e}")
+                self._restore(changes)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def start(self, application=None):
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, application=None):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# 🏆 جدول امتیازات
+# کاربران به ترتیب امتیاز در یک SortedList نگه داشته می‌شوند؛ تغییر امتیاز
+# O(log n) است و نمایش صفحه‌ای، رتبه و همسایه‌ها بدون مرتب‌سازی کل کاربران
+SCOREBOARD_PAGE_SIZE = 20
+SCOREBOARD_NAME_LENGTH = 32  # تا هر صفحه در محدودیت 4096 کاراکتر تلگرام بماند
+SCOREBOARD_NEIGHBORS = 2
+
+
+class Leaderboard:
+    def __init__(self):
+        self.scores = {}  # userId -> score
+        self.ranking = SortedList()  # (-score, userId)
+
+    def __len__(self):
+        return len(self.ranking)
+
+    def rebuild(self, users):
+        self.scores = {user_id: user_data["score"] for user_id, user_data in users.items()}
+        self.ranking = SortedList((-score, user_id) for user_id, score in self.scores.items())
+
+    def update(self, user_id, score):
+        old_score = self.scores.get(user_id)
+        if old_score == score:
+            return
+        if old_score is not None:
+            self.ranking.remove((-old_score, user_id))
+        self.scores[user_id] = score
+        self.ranking.add((-score, user_id))
+
+    def remove(self, user_id):
+        score = self.scores.pop(user_id, None)
+        if score is not None:
+            self.ranking.remove((-score, user_id))
+
+    def clear(self):
+        self.scores.clear()
+        self.ranking.clear()
+
+    # لیست (رتبه، userId، امتیاز)؛ امتیازهای برابر رتبه یکسان دارند
+    def _entries(self, start, stop):
+        return [(self.rank(user_id), user_id, -neg_score) for neg_score, user_id in self.ranking[start:stop]]
+
+    def top(self, count, offset=0):
+        return self._entries(offset, offset + count)
+
+    def rank(self, user_id):
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return self.ranking.bisect_left((-score,)) + 1
+
+    def around(self, user_id, radius=SCOREBOARD_NEIGHBORS):
+        score = self.scores.get(user_id)
+        if score is None:
+            return []
+        index = self.ranking.index((-score, user_id))
+        return self._entries(max(0, index - radius), index + radius + 1)
+
+
+# 📤 صف پیام‌های خروجی
+# همه پیام‌ها از این صف ارسال می‌شوند تا از محدودیت‌های تلگرام (حدود 30 پیام
+# در ثانیه برای کل ربات، 1 پیام در ثانیه برای هر چت و 20 پیام در دقیقه برای
+# هر گروه) عبور نکنند. ترتیب پیام‌های هر چت حفظ می‌شود، با RetryAfter کل صف
+# به اندازه خواسته شده صبر می‌کند و گزارش‌های گروه در یک پنجره کوتاه در یک
+# پیام خلاصه ادغام می‌شوند.
+GLOBAL_RATE = 30  # پیام در ثانیه
+GLOBAL_BURST = 30
+CHAT_RATE = 1
+CHAT_BURST = 3
+GROUP_RATE = 20 / 60
+GROUP_BURST = 5
+DIGEST_WINDOW = 5  # ثانیه
+DIGEST_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+MAX_MESSAGE_LENGTH = 4096
+MAX_SEND_ATTEMPTS = 5
+SHUTDOWN_DRAIN_TIMEOUT = 10
+
+
+def is_group_chat(chat_id):
+    return str(chat_id).startswith("-")
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return now
+
+    # چند ثانیه تا آزاد شدن یک توکن
+    def delay(self):
+        now = self._refill()
+        wait = max(0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    # تقسیم متن بلند روی خط‌ها تا هر بخش در محدودیت تلگرام بماند
+    parts = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            parts.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+class OutboundQueue:
+    def __init__(self, transport):
+        # transport: هر شیئی با متد send_message مانند application.bot یا FakeBotTransport
+        self.transport = transport
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self.chat_buckets = {}
+        self.pending = {}  # chat_id -> deque پیام‌ها؛ هر چت با پیام در انتظار یک بار در ready است
+        self.digests = {}  # chat_id -> متن‌های در انتظار ادغام
+        self.ready = None
+        self.sent_count = 0
+        self.failed_count = 0
+        self._task = None
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if is_group_chat(chat_id):
+                bucket = TokenBucket(GROUP_RATE, GROUP_BURST)
+            else:
+                bucket = TokenBucket(CHAT_RATE, CHAT_BURST)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def send(self, chat_id, text, **kwargs):
+        self._enqueue(chat_id, {"chat_id": chat_id, "text": text, "kwargs": kwargs, "attempts": 0})
+
+    # متن در پنجره DIGEST_WINDOW با متن‌های دیگر همان چت در یک پیام ادغام می‌شود
+    async def send_digest(self, chat_id, text):
+        texts = self.digests.get(chat_id)
+        if texts is None:
+            self.digests[chat_id] = [text]
+            asyncio.get_running_loop().call_later(DIGEST_WINDOW, self._flush_digest, chat_id)
+        else:
+            texts.append(text)
+
+    def _flush_digest(self, chat_id):
+        texts = self.digests.pop(chat_id, None)
+        if not texts:
+            return
+        for part in split_message(DIGEST_SEPARATOR.join(texts)):
+            self._enqueue(chat_id, {"chat_id": chat_id, "text": part, "kwargs": {}, "attempts": 0})
+
+    def _enqueue(self, chat_id, message, front=False):
+        queue = self.pending.get(chat_id)
+        if queue is None:
+            queue = self.pending[chat_id] = deque()
+            # پیش از start پیام‌ها فقط نگه داشته می‌شوند
+            if self.ready is not None:
+                self.ready.put_nowait(chat_id)
+        if front:
+            queue.appendleft(message)
+        else:
+            queue.append(message)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            chat_id = await self.ready.get()
+            chat_bucket = self._chat_bucket(chat_id)
+            wait = chat_bucket.delay()
+            if wait > 0:
+                # بقیه چت‌ها منتظر این چت نمی‌مانند
+                loop.call_later(wait, self.ready.put_nowait, chat_id)
+                continue
+            wait = self.global_bucket.delay()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            chat_bucket.take()
+            self.global_bucket.take()
+
+            queue = self.pending[chat_id]
+            await self._deliver(queue.popleft())
+            if queue:
+                self.ready.put_nowait(chat_id)
+            else:
+                del self.pending[chat_id]
+
+    async def _deliver(self, message):
+        chat_id = message["chat_id"]
+        message["attempts"] += 1
+        try:
+            await self.transport.send_message(chat_id, message["text"], **message["kwargs"])
+            self.sent_count += 1
+        except RetryAfter as e:
+            retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+            logger.warning(f"Flood limit reached, retrying in {retry_after}s")
+            self.global_bucket.block(retry_after)
+            self._requeue(message)
+        except (TimedOut, NetworkError) as e:
+            logger.warning(f"Error sending message to {chat_id}: {e}")
+            self._requeue(message)
+        except TelegramError as e:
+            logger.error(f"Message to {chat_id} dropped: {e}")
+            self.failed_count += 1
+
+    def _requeue(self, message):
+        if message["attempts"] >= MAX_SEND_ATTEMPTS:
+            logger.error(f"Message to {message['chat_id']} dropped after {message['attempts']} attempts")
+            self.failed_count += 1
+            return
+        self._enqueue(message["chat_id"], message, front=True)
+
+    def has_pending(self):
+        return bool(self.pending or self.digests)
+
+    async def start(self):
+        self.ready = asyncio.Queue()
+        for chat_id in self.pending:
+            self.ready.put_nowait(chat_id)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout=SHUTDOWN_DRAIN_TIMEOUT):
+        # ارسال خلاصه‌ها و پیام‌های باقی‌مانده پیش از خاموش شدن
+        for chat_id in list(self.digests):
+            self._flush_digest(chat_id)
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class FakeBotTransport:
+    # جایگزین application.bot برای اندازه‌گیری گذردهی صف بدون اتصال به تلگرام؛
+    # اگر در یک پنجره زمانی بیش از مقدار مجاز سطل‌ها (burst + rate × پنجره)
+    # پیام برسد مانند تلگرام RetryAfter می‌دهد
+    def __init__(self, latency=0.01):
+        self.latency = latency
+        self.sent = []  # (زمان، chat_id، متن)
+        self.flood_errors = 0
+
+    def _count_since(self, since, chat_id=None):
+        return sum(1 for t, c, _ in self.sent if t > since and (chat_id is None or c == chat_id))
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        if is_group_chat(chat_id):
+            chat_window, chat_limit = 60, GROUP_BURST + GROUP_RATE * 60
+        else:
+            chat_window, chat_limit = 1, CHAT_BURST + CHAT_RATE
+        if (self._count_since(now - 1) >= GLOBAL_BURST + GLOBAL_RATE
+                or self._count_since(now - chat_window, chat_id) >= chat_limit):
+            self.flood_errors += 1
+            raise RetryAfter(1)
+        self.sent.append((now, chat_id, text))
+
+
+async def benchmark_outbound_queue(message_count=300, chat_count=50, report_count=40, group_chat_id=-1):
+    transport = FakeBotTransport()
+    outbox = OutboundQueue(transport)
+    await outbox.start()
+    started = time.monotonic()
+    for i in range(message_count):
+        await outbox.send(i % chat_count + 1, f"پیام {i}")
+    for i in range(report_count):
+        await outbox.send_digest(group_chat_id, f"گزارش کار {i}")
+    await outbox.stop(timeout=message_count)
+    elapsed = time.monotonic() - started
+    return {
+        "sent": outbox.sent_count,
+        "failed": outbox.failed_count,
+        "flood_errors": transport.flood_errors,
+        "group_messages": sum(1 for _, chat_id, _ in transport.sent if chat_id == group_chat_id),
+        "seconds": round(elapsed, 2),
+        "messages_per_second": round(outbox.sent_count / elapsed, 1),
+    }
+
+
+# ⏰ بررسی روزانه
+# در حلقه asyncio ربات با JobQueue اجرا می‌شود؛ ساعت بر اساس BOT_TIMEZONE است
+DAILY_CHECK_TIME = dtime(0, 0)
+DEFAULT_TIMEZONE = "Asia/Tehran"
+DATE_FORMAT = "%Y-%m-%d"
+PENALTY_CHUNK_SIZE = 500  # بین دسته‌ها کنترل به حلقه asyncio برمی‌گردد
+
+
 class HabitTrackerBot:
-    def __init__(self, token, group_chat_id):
+    def __init__(self, token, group_chat_id, store=None):
         self.ADMIN_PASSWORD = '919'
         self.GROUP_CHAT_ID = group_chat_id
+        self.timezone = ZoneInfo(os.getenv("BOT_TIMEZONE", DEFAULT_TIMEZONE))
         self.users = {}  # userId -> userData
         self.challenges = []
         self.user_states = {}  # userId -> current state
         self.temp_challenge = None
-        self.application = Application.builder().token(token).build()
+        self.last_daily_check = None  # آخرین روزی که جریمه‌های آن اعمال شده
+        self.daily_check_lock = asyncio.Lock()
+
+        # بارگذاری وضعیت ذخیره شده؛ پیش‌فرض SQLite در BOT_DB_PATH
+        if store is None:
+            store = SQLiteStateStore(os.getenv("BOT_DB_PATH", "habit_tracker.db"))
+        self.persistence = StatePersistence(self, store)
+        self.persistence.load()
+        self.leaderboard = Leaderboard()
+        self.leaderboard.rebuild(self.users)
+        # روز -> کاربرانی که برای آن روز گزارش (یا جریمه) دارند
+        self.reported_days = defaultdict(set)
+        self.rebuild_reported_days()
+
+        self.application = (
+            Application.builder()
+            .token(token)
+            .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
+            .build()
+        )
+        self.outbox = OutboundQueue(self.application.bot)
 
         # ثبت هندلرها
         self.initialize_bot()
@@ -44,6 +627,16 @@ class HabitTrackerBot:
         # برنامه‌ریزی بررسی روزانه
         self.schedule_daily_check()
 
+    async def post_init(self, application):
+        await self.persistence.start()
+        await self.outbox.start()
+        # جبران نیمه‌شب‌هایی که ربات خاموش بوده
+        await self.run_daily_check()
+
+    async def post_shutdown(self, application):
+        await self.outbox.stop()
+        await self.persistence.stop()
+
     # 🎨 UI Helpers
     def create_inline_keyboard(self, buttons):
         keyboard = [[InlineKeyboardButton(btn["text"], callback_data=btn["callback_data"]) for btn in row]
@@ -55,7 +648,9 @@ class HabitTrackerBot:
         return {"text": text, "callback_data": data}
 
     # 🌟 دیتابیس کاربر
+    # هر کاربری که خوانده شود ممکن است تغییر کند، پس برای ذخیره علامت می‌خورد
     def get_user_data(self, user_id):
+        self.persistence.mark_user(user_id)
         if user_id not in self.users:
             self.users[user_id] = {
                 "name": "",
@@ -67,13 +662,46 @@ class HabitTrackerBot:
                 "day_count": 1,
                 "username": ""
             }
+            self.leaderboard.update(user_id, 0)
         return self.users[user_id]
 
+    # همه تغییرات امتیاز از این متد می‌گذرند تا جدول امتیازات به‌روز بماند
+    def add_score(self, user_id, amount):
+        user_data = self.users[user_id]
+        user_data["score"] += amount
+        self.leaderboard.update(user_id, user_data["score"])
+        self.persistence.mark_user(user_id)
+
     def get_user_state(self, user_id):
         return self.user_states.get(user_id, "main")
 
     def set_user_state(self, user_id, state):
         self.user_states[user_id] = state
+        self.persistence.mark_state(user_id)
+
+    def today_date(self):
+        return datetime.now(self.timezone).date()
+
+    def today(self):
+        return self.today_date().strftime(DATE_FORMAT)
+
+    # 📋 گزارش‌های روزانه
+    # فقط روزهایی که هنوز ممکن است جریمه شوند در ایندکس نگه داشته می‌شوند
+    def rebuild_reported_days(self):
+        self.reported_days.clear()
+        for u_id, user_data in self.users.items():
+            for day_key in user_data["daily_reports"]:
+                if self.last_daily_check is None or day_key >= self.last_daily_check:
+                    self.reported_days[day_key].add(u_id)
+
+    def record_daily_report(self, user_id, day_key, report):
+        self.users[user_id]["daily_reports"][day_key] = report
+        self.reported_days[day_key].add(user_id)
+        self.persistence.mark_user(user_id)
+
+    def forget_reported_user(self, user_id):
+        for reported in self.reported_days.values():
+            reported.discard(user_id)
 
     # 📅 محاسبه روز کاربر
     def calculate_user_day(self, user_data):
@@ -131,7 +759,7 @@ class HabitTrackerBot:
                 [self.create_button("👑 ادمین", "admin")],
                 [self.create_button("🚪 خروج", "exit")]
             ])
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "🎉 به ربات مدیریت عادت‌های شخصی خوش اومدی!\n\n" +
                 "✨ اینجا می‌تونی عادت‌هات رو ثبت کنی و پیشرفتت رو ببینی\n" +
@@ -148,7 +776,7 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_start")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "✨ عالیه! بریم شروع کنیم\n\n" +
             "🎯 اسمت رو بگو تا بتونم صمیمی‌تر باهات حرف بزنم:",
@@ -162,7 +790,7 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_start")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"🎉 سلام {name} عزیز!\n\n" +
             "🌱 حالا عادت‌هایی که می‌خوای روشون کار کنی رو بگو\n" +
@@ -185,7 +813,7 @@ class HabitTrackerBot:
                 "\n".join(f"{i+1}. {h['name']}" for i, h in enumerate(user_data["habits"])) +
                 "\n\n🚀 حالا آماده‌ای که شروع کنی!"
             ) if user_data["habits"] else "🤔 هیچ عادتی اضافه نکردی!"
-            await self.application.bot.send_message(chat_id, message)
+            await self.outbox.send(chat_id, message)
             await self.show_main_menu(chat_id, user_id)
             return
 
@@ -196,7 +824,7 @@ class HabitTrackerBot:
             user_data["habits"].extend({"name": habit, "id": time.time() + random.random()} for habit in habits)
 
 
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             '📝 عادت بعدی رو بنویس یا بنویس "تموم":'
         )
@@ -211,7 +839,7 @@ class HabitTrackerBot:
             [self.create_button("🏆 امتیاز", "score"), self.create_button("🔥 چالش", "challenge")],
             [self.create_button("👑 ادمین", "admin"), self.create_button("🚪 خروج", "exit")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"🌟 سلام {user_data['name']} عزیز!\n\n" +
             f"📈 امتیاز فعلی: {user_data['score']}\n" +
@@ -224,10 +852,10 @@ class HabitTrackerBot:
     # 📊 گزارش روزانه
     async def show_daily_report(self, chat_id, user_id):
         user_data = self.get_user_data(user_id)
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.today()
 
         if today in user_data["daily_reports"] and user_data["daily_reports"][today].get("type") != "none":
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "✅ گزارش امروزت رو قبلاً ثبت کردی!"
             )
@@ -235,7 +863,7 @@ class HabitTrackerBot:
             return
 
         if not user_data["habits"]:
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "🤔 هنوز عادتی ثبت نکردی!"
             )
@@ -252,7 +880,7 @@ class HabitTrackerBot:
             "🎯 روی عادت‌هایی که انجام دادی، بزن:"
         )
 
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             message_text,
             reply_markup=keyboard
@@ -272,7 +900,7 @@ class HabitTrackerBot:
         
     async def handle_submit_daily_report(self, chat_id, user_id):
         user_data = self.get_user_data(user_id)
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.today()
         
         done_habits = [habit for habit in user_data['habits'] if user_data.get('report_temp', {}).get(habit['id'])]
         done_habits_ids = [habit['id'] for habit in done_habits]
@@ -289,7 +917,7 @@ class HabitTrackerBot:
         
         # if user had a 'none' report, we should first undo the score change
         if initial_report_was_none:
-            user_data["score"] += 10
+            self.add_score(user_id, 10)
         
         if len(done_habits) == total_habits:
             score_change = 10
@@ -323,27 +951,27 @@ class HabitTrackerBot:
             )
             
         # Update the score
-        user_data["score"] += score_change
+        self.add_score(user_id, score_change)
 
-        user_data["daily_reports"][today] = {
+        self.record_daily_report(user_id, today, {
             "type": report_type, 
             "score_change": score_change, 
             "date": datetime.now(),
             "completed_habits": done_habits_ids
-        }
+        })
         user_data.pop('report_temp', None)
         
         new_score = user_data["score"]
         day_num = self.calculate_user_day(user_data)
 
-        # Send a message to the group
-        await self.application.bot.send_message(
+        # Send a message to the group (merged with other reports in a digest)
+        await self.outbox.send_digest(
             self.GROUP_CHAT_ID,
             group_message
         )
         
         # Send a message to the user
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"🎉 گزارش روزانه‌ات ثبت شد!\n\n" +
             f"💬 {message_text}\n" +
@@ -370,7 +998,7 @@ class HabitTrackerBot:
             [self.create_button("📝 تغییر نام", "change_name")],
             [self.create_button("🔙 بازگشت", "back_to_main")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "⚙️ ویرایش اطلاعات شخصی\n\n" +
             "🎨 چی رو می‌خوای تغییر بدی؟",
@@ -382,7 +1010,7 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_edit_info")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "✨ نام جدیدت رو بگو:",
             reply_markup=keyboard
@@ -392,7 +1020,7 @@ class HabitTrackerBot:
         user_data = self.get_user_data(user_id)
         user_data["name"] = name
         self.set_user_state(user_id, "main")
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"✅ نامت به \"{name}\" تغییر کرد!"
         )
@@ -407,7 +1035,7 @@ class HabitTrackerBot:
             [self.create_button("🗑️ حذف عادت", "delete_habit")],
             [self.create_button("🔙 بازگشت", "back_to_main")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "🎯 مدیریت عادت‌ها\n\n" +
             "🔧 چی کار می‌خوای بکنی؟",
@@ -419,7 +1047,7 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_edit_habits")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "➕ اضافه کردن عادت جدید\n\n" +
             '📝 عادت‌های جدیدت رو خط به خط بنویس (برای تموم کردن بنویس "تموم"):\n\n' +
@@ -433,7 +1061,7 @@ class HabitTrackerBot:
         user_data = self.get_user_data(user_id)
 
         if not user_data["habits"]:
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "🤷‍♂️ هیچ عادتی ثبت نکردی!\n\n" +
                 "➕ اول برو عادت اضافه کن"
@@ -450,7 +1078,7 @@ class HabitTrackerBot:
         buttons.append([self.create_button("🔙 بازگشت", "back_to_edit_habits")])
         keyboard = self.create_inline_keyboard(buttons)
 
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"{action_emoji} {action_text} عادت\n\n" +
             f"📋 لطفاً شماره عادتی که می‌خواهید {action_text} شود را انتخاب کنید:\n\n" +
@@ -463,14 +1091,14 @@ class HabitTrackerBot:
         try:
             index = int(text) - 1
             if index < 0 or index >= len(user_data["habits"]):
-                await self.application.bot.send_message(
+                await self.outbox.send(
                     chat_id,
                     "❌ شماره عادت نامعتبره! دوباره امتحان کن یا بنویس \"بازگشت\""
                 )
                 return
             user_data["habits"][index]["name"] = text
             self.set_user_state(user_id, "main")
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 f"✏️ عادت به \"{text}\" تغییر کرد!\n\n" +
                 "📋 لیست عادت‌های فعلی:\n" +
@@ -481,7 +1109,7 @@ class HabitTrackerBot:
             if text.lower() == "بازگشت":
                 await self.show_edit_habits(chat_id, user_id)
             else:
-                await self.application.bot.send_message(
+                await self.outbox.send(
                     chat_id,
                     "❌ لطفاً یک شماره معتبر وارد کنید یا بنویس \"بازگشت\""
                 )
@@ -489,7 +1117,7 @@ class HabitTrackerBot:
     async def handle_habit_deletion(self, chat_id, user_id, habit_index):
         user_data = self.get_user_data(user_id)
         deleted_habit = user_data["habits"].pop(habit_index)
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"🗑️ عادت \"{deleted_habit['name']}\" حذف شد!\n\n" +
             "📋 لیست عادت‌های فعلی:\n" +
@@ -505,13 +1133,15 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_main")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"🏆 امتیاز {user_data['name']}\n\n" +
             f"💎 امتیاز فعلی: {user_data['score']}\n" +
             f"📅 روز فعالیت: {day_num}\n" +
-            f"📈 میانگین امتیاز: {user_data['score'] / day_num:.1f}\n\n" +
-            f"{self.get_score_message(user_data['score'])}",
+            f"📈 میانگین امتیاز: {user_data['score'] / day_num:.1f}\n" +
+            f"🏅 رتبه: {self.leaderboard.rank(user_id)} از {len(self.leaderboard)}\n\n" +
+            "\n".join(self.format_scoreboard_line(*entry) for entry in self.leaderboard.around(user_id)) +
+            f"\n\n{self.get_score_message(user_data['score'])}",
             reply_markup=keyboard
         )
 
@@ -530,7 +1160,7 @@ class HabitTrackerBot:
             keyboard = self.create_inline_keyboard([
                 [self.create_button("🔙 بازگشت", "back_to_main")]
             ])
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "🤷‍♂️ در حال حاضر چالشی فعال نیست!\n\n" +
                 "⏳ منتظر چالش‌های جدید باش!",
@@ -547,7 +1177,7 @@ class HabitTrackerBot:
                 [self.create_button("❌ نه", "decline_challenge")],
                 [self.create_button("🔙 بازگشت", "back_to_main")]
             ])
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 f"🔥 چالش فعال: {current_challenge['text']}\n\n" +
                 f"🎯 هدف: رسیدن به {current_challenge['target_score']} امتیاز\n" +
@@ -567,7 +1197,7 @@ class HabitTrackerBot:
         ])
         status_emoji = "🏆" if user_data["score"] >= challenge["target_score"] else "💪"
         status_text = "موفق شدی!" if user_data["score"] >= challenge["target_score"] else "ادامه بده!"
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"🔥 چالش: {challenge['text']}\n\n" +
             f"📅 روز ({days_elapsed}/{challenge['duration']})\n" +
@@ -584,7 +1214,7 @@ class HabitTrackerBot:
 
         challenge = self.challenges[0]
         if user_data["score"] >= challenge["target_score"]:
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 self.GROUP_CHAT_ID,
                 f"🎉 تبریک! {user_data['name']} در چالش \"{challenge['text']}\" موفق شد! 🏆"
             )
@@ -596,7 +1226,7 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_start")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "👑 ورود ادمین\n\n" +
             "🔐 رمز ادمین را وارد کنید:",
@@ -605,7 +1235,7 @@ class HabitTrackerBot:
 
     async def handle_admin_password(self, chat_id, user_id, password):
         if password != self.ADMIN_PASSWORD:
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "❌ رمز اشتباه است!\n\n" +
                 "🔒 دوباره تلاش کنید"
@@ -623,7 +1253,7 @@ class HabitTrackerBot:
             [self.create_button("🏆 جدول امتیازات", "admin_scoreboard")],
             [self.create_button("🔙 بازگشت", "back_to_start")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "👑 پنل مدیریت\n\n" +
             "🎮 چه کاری می‌خوای انجام بدی؟",
@@ -634,7 +1264,10 @@ class HabitTrackerBot:
         self.users.clear()
         self.challenges.clear()
         self.user_states.clear()
-        await self.application.bot.send_message(
+        self.leaderboard.clear()
+        self.reported_days.clear()
+        self.persistence.clear()
+        await self.outbox.send(
             chat_id,
             "🗑️ همه داده‌ها با موفقیت ریست شدند!"
         )
@@ -647,7 +1280,7 @@ class HabitTrackerBot:
         ]
         buttons.append([self.create_button("🔙 بازگشت", "back_to_admin")])
         keyboard = self.create_inline_keyboard(buttons)
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "👤 حذف کاربر خاص\n\n" +
             "📋 لطفاً کاربر موردنظر را انتخاب کنید:\n\n" +
@@ -659,15 +1292,21 @@ class HabitTrackerBot:
         user_data = self.users.get(target_user_id)
         if user_data:
             del self.users[target_user_id]
+            self.leaderboard.remove(target_user_id)
+            self.forget_reported_user(target_user_id)
             self.user_states.pop(target_user_id, None)
-            await self.application.bot.send_message(
+            self.persistence.mark_user(target_user_id)
+            self.persistence.mark_state(target_user_id)
+            await self.outbox.send(
                 chat_id,
                 f"🗑️ کاربر {user_data['name']} با موفقیت حذف شد!"
             )
         await self.show_admin_panel(chat_id, user_id)
 
     async def show_user_report(self, chat_id, user_id):
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.today()
+        # فقط نمایش؛ جریمه کاربرانی که گزارش نداده‌اند در run_daily_check اعمال می‌شود
+        not_reported = self.users.keys() - self.reported_days[today]
         report = "📊 گزارش امروز کاربران:\n\n"
         for u_id, user_data in self.users.items():
             day_num = self.calculate_user_day(user_data)
@@ -676,7 +1315,9 @@ class HabitTrackerBot:
             score_change = -10
             incomplete_habits = []
 
-            if today_report:
+            if u_id in not_reported:
+                incomplete_habits = [h['name'] for h in user_data["habits"]]
+            elif today_report:
                 if today_report["type"] == "complete":
                     status = "🟢 کامل انجام داد"
                     score_change = 10
@@ -692,10 +1333,6 @@ class HabitTrackerBot:
                 elif today_report["type"] == "rest":
                     status = "😴 استراحت کرد"
                     score_change = 0
-            else:
-                user_data["score"] -= 10
-                incomplete_habits = [h['name'] for h in user_data["habits"]]
-                user_data["daily_reports"][today] = {"type": "none", "score_change": -10, "date": datetime.now(), "completed_habits": []}
 
 
             report += f"👤 {user_data['name']} - روز {day_num}\n"
@@ -707,18 +1344,33 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_admin")]
         ])
-        await self.application.bot.send_message(chat_id, report, reply_markup=keyboard)
-
-    async def show_scoreboard(self, chat_id, user_id):
-        sorted_users = sorted(self.users.items(), key=lambda x: x[1]["score"], reverse=True)
-        scoreboard = "🏆 جدول امتیازات\n\n"
-        for i, (u_id, user_data) in enumerate(sorted_users):
-            medal = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else "🏅"
-            scoreboard += f"{medal} {user_data['name']}: {user_data['score']}\n"
-        keyboard = self.create_inline_keyboard([
-            [self.create_button("🔙 بازگشت", "back_to_admin")]
-        ])
-        await self.application.bot.send_message(chat_id, scoreboard, reply_markup=keyboard)
+        await self.outbox.send(chat_id, report, reply_markup=keyboard)
+
+    def format_scoreboard_line(self, rank, user_id, score):
+        medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else "🏅"
+        name = self.users[user_id]["name"] or "بی‌نام"
+        if len(name) > SCOREBOARD_NAME_LENGTH:
+            name = name[:SCOREBOARD_NAME_LENGTH - 1] + "…"
+        return f"{medal} {rank}. {name}: {score}"
+
+    async def show_scoreboard(self, chat_id, user_id, page=0):
+        total = len(self.leaderboard)
+        page_count = max(1, -(-total // SCOREBOARD_PAGE_SIZE))
+        page = min(max(page, 0), page_count - 1)
+        entries = self.leaderboard.top(SCOREBOARD_PAGE_SIZE, offset=page * SCOREBOARD_PAGE_SIZE)
+
+        scoreboard = f"🏆 جدول امتیازات (صفحه {page + 1} از {page_count})\n\n"
+        scoreboard += "\n".join(self.format_scoreboard_line(*entry) for entry in entries)
+
+        navigation = []
+        if page > 0:
+            navigation.append(self.create_button("◀️ قبلی", f"scoreboard_page_{page - 1}"))
+        if page < page_count - 1:
+            navigation.append(self.create_button("بعدی ▶️", f"scoreboard_page_{page + 1}"))
+        buttons = [navigation] if navigation else []
+        buttons.append([self.create_button("🔙 بازگشت", "back_to_admin")])
+        keyboard = self.create_inline_keyboard(buttons)
+        await self.outbox.send(chat_id, scoreboard, reply_markup=keyboard)
 
     # 🔥 مدیریت چالش
     async def show_create_challenge(self, chat_id, user_id):
@@ -726,7 +1378,7 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_admin")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "🔥 ایجاد چالش جدید\n\n" +
             "📝 متن چالش رو بنویس:",
@@ -739,7 +1391,7 @@ class HabitTrackerBot:
         keyboard = self.create_inline_keyboard([
             [self.create_button("🔙 بازگشت", "back_to_admin")]
         ])
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             "⏱️ مدت چالش رو بگو (به روز):\n\n" +
             "مثال: 30",
@@ -750,7 +1402,7 @@ class HabitTrackerBot:
         try:
             duration = int(text)
             if duration <= 0:
-                await self.application.bot.send_message(
+                await self.outbox.send(
                     chat_id,
                     "❌ لطفاً یک عدد معتبر وارد کنید"
                 )
@@ -760,14 +1412,14 @@ class HabitTrackerBot:
             keyboard = self.create_inline_keyboard([
                 [self.create_button("🔙 بازگشت", "back_to_admin")]
             ])
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "🎯 امتیاز هدف رو بگو:\n\n" +
                 "مثال: 100",
                 reply_markup=keyboard
             )
         except ValueError:
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "❌ لطفاً یک عدد معتبر وارد کنید"
             )
@@ -776,7 +1428,7 @@ class HabitTrackerBot:
         try:
             target_score = int(text)
             if target_score <= 0:
-                await self.application.bot.send_message(
+                await self.outbox.send(
                     chat_id,
                     "❌ لطفاً یک عدد معتبر وارد کنید"
                 )
@@ -785,14 +1437,15 @@ class HabitTrackerBot:
             self.temp_challenge["created_at"] = datetime.now()
             self.challenges = [self.temp_challenge]
             self.temp_challenge = None
+            self.persistence.mark_meta("challenges")
             self.set_user_state(user_id, "admin_main")
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "🎉 چالش با موفقیت ایجاد شد! کاربران می‌تونن از حالا ثبت‌نام کنن."
             )
             await self.show_admin_panel(chat_id, user_id)
         except ValueError:
-            await self.application.bot.send_message(
+            await self.outbox.send(
                 chat_id,
                 "❌ لطفاً یک عدد معتبر وارد کنید"
             )
@@ -815,7 +1468,7 @@ class HabitTrackerBot:
         elif data == "admin":
             await self.show_admin_login(chat_id, user_id)
         elif data == "exit":
-            await self.application.bot.send_message(chat_id, "🚪 خداحافظ! هر وقت خواستی برگرد 😊")
+            await self.outbox.send(chat_id, "🚪 خداحافظ! هر وقت خواستی برگرد 😊")
         elif data == "back_to_start":
             await self.show_start_menu(update, context)
         elif data == "daily_report":
@@ -831,7 +1484,7 @@ class HabitTrackerBot:
         elif data == "join_challenge":
             user_data = self.get_user_data(user_id)
             user_data["challenge_status"] = {"join_date": datetime.now()}
-            await self.application.bot.send_message(chat_id, "🎉 با موفقیت وارد چالش شدی!")
+            await self.outbox.send(chat_id, "🎉 با موفقیت وارد چالش شدی!")
             await self.show_challenge_status(chat_id, user_id, self.challenges[0])
         elif data == "decline_challenge":
             await self.show_main_menu(chat_id, user_id)
@@ -855,7 +1508,9 @@ class HabitTrackerBot:
         elif data.startswith("toggle_habit_report_"):
             habit_id = float(data.split("_")[3])
             user_data = self.get_user_data(user_id)
-            user_data['report_temp'][habit_id] = not user_data['report_temp'].get(habit_id, False)
+            # report_temp ذخیره نمی‌شود و پس از راه‌اندازی مجدد وجود ندارد
+            report_temp = user_data.setdefault('report_temp', {})
+            report_temp[habit_id] = not report_temp.get(habit_id, False)
 
             await query.edit_message_text(
                 text=query.message.text,
@@ -873,6 +1528,8 @@ class HabitTrackerBot:
             await self.show_user_report(chat_id, user_id)
         elif data == "admin_scoreboard":
             await self.show_scoreboard(chat_id, user_id)
+        elif data.startswith("scoreboard_page_"):
+            await self.show_scoreboard(chat_id, user_id, page=int(data.split("_")[2]))
         elif data == "back_to_admin":
             await self.show_admin_panel(chat_id, user_id)
         elif data.startswith("delete_habit_"):
@@ -880,14 +1537,14 @@ class HabitTrackerBot:
             await self.handle_habit_deletion(chat_id, user_id, index)
         elif data.startswith("edit_habit_"):
             self.set_user_state(user_id, "edit_habit")
-            await self.application.bot.send_message(chat_id, "✏️ نام جدید عادت رو بنویس:")
+            await self.outbox.send(chat_id, "✏️ نام جدید عادت رو بنویس:")
         elif data.startswith("delete_user_"):
             target_user_id = int(data.split("_")[2])
             await self.handle_reset_user(chat_id, user_id, target_user_id)
 
     async def handle_daily_report_rest(self, chat_id, user_id):
         user_data = self.get_user_data(user_id)
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.today()
         
         # Check if the user had a 'none' report today
         initial_report_was_none = today in user_data["daily_reports"] and user_data["daily_reports"][today].get("type") == "none"
@@ -896,24 +1553,24 @@ class HabitTrackerBot:
         report_type = "rest"
         
         if initial_report_was_none:
-            user_data["score"] += 10 # Undo the -10 from daily check
+            self.add_score(user_id, 10) # Undo the -10 from daily check
             
-        user_data["daily_reports"][today] = {
+        self.record_daily_report(user_id, today, {
             "type": report_type, 
             "score_change": score_change, 
             "date": datetime.now(),
             "completed_habits": []
-        }
+        })
         user_data.pop('report_temp', None)
 
-        await self.application.bot.send_message(
+        await self.outbox.send_digest(
             self.GROUP_CHAT_ID,
             f"گزارش کار {user_data['name']}\n"
             f"ایدی: @{user_data['username']}\n\n"
             "امروز استراحت کرد! 💤"
         )
         
-        await self.application.bot.send_message(
+        await self.outbox.send(
             chat_id,
             f"✅ گزارش روزانه‌ات ثبت شد! روز استراحت خوبی داشته باشی. 😌"
         )
@@ -921,37 +1578,67 @@ class HabitTrackerBot:
 
     # ⏰ بررسی روزانه
     def schedule_daily_check(self):
-        async def check():
-            today = datetime.now().strftime("%Y-%m-%d")
-            for u_id, user_data in self.users.items():
-                if today not in user_data["daily_reports"]:
-                    user_data["score"] -= 10
-                    user_data["daily_reports"][today] = {
-                        "type": "none", 
-                        "score_change": -10, 
-                        "date": datetime.now(),
-                        "completed_habits": []
-                    }
-            
-            # This part might need adjustment if you want to send a report to the group chat
-            # For now, it's just updating user data.
-            # If you want to send a report, you'd need to call a method like show_user_report
-            # and pass the correct chat_id (self.GROUP_CHAT_ID) and a dummy user_id or handle it differently.
-            pass # Placeholder for potential group report logic
-
-
-        def run_schedule():
-            schedule.every().day.at("00:00").do(lambda: asyncio.run_coroutine_threadsafe(check(), self.application.loop))
-            while True:
-                schedule.run_pending()
-                time.sleep(60)
+        self.application.job_queue.run_daily(
+            self.run_daily_check,
+            time=DAILY_CHECK_TIME.replace(tzinfo=self.timezone),
+            name="daily_check"
+        )
 
-        threading.Thread(target=run_schedule, daemon=True).start()
+    # روزهای از دست رفته از last_daily_check تا امروز به ترتیب پردازش می‌شوند و
+    # هر روز فقط یک بار؛ اجرای دوباره (مثلاً پس از راه‌اندازی مجدد) اثری ندارد.
+    # بدون last_daily_check (ذخیره تازه یا داده‌های پیش از آن) روزی برای جبران
+    # وجود ندارد و امروز هم در میانه روز جریمه نمی‌شود؛ اولین جریمه نیمه‌شب بعد است
+    async def run_daily_check(self, context=None):
+        async with self.daily_check_lock:
+            today = datetime.now(self.timezone).date()
+            if self.last_daily_check is None:
+                self.last_daily_check = today.strftime(DATE_FORMAT)
+                self.persistence.mark_meta("last_daily_check")
+            day = datetime.strptime(self.last_daily_check, DATE_FORMAT).date() + timedelta(days=1)
+            while day <= today:
+                await self.apply_daily_penalties(day)
+                self.last_daily_check = day.strftime(DATE_FORMAT)
+                self.persistence.mark_meta("last_daily_check")
+                day += timedelta(days=1)
+            # روزهای گذشته دیگر جریمه نمی‌شوند
+            for day_key in [d for d in self.reported_days if d < self.last_daily_check]:
+                del self.reported_days[day_key]
+
+    # کاربرانی که برای آن روز گزارشی ندارند 10- امتیاز و گزارش "none" می‌گیرند؛
+    # با ثبت گزارش در همان روز جریمه برگردانده می‌شود. فقط کاربران خارج از
+    # ایندکس گزارش‌ها بررسی و در دسته‌ها پردازش می‌شوند تا هندلرها منتظر نمانند
+    async def apply_daily_penalties(self, day):
+        day_key = day.strftime(DATE_FORMAT)
+        pending = list(self.users.keys() - self.reported_days[day_key])
+        for start in range(0, len(pending), PENALTY_CHUNK_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            for u_id in pending[start:start + PENALTY_CHUNK_SIZE]:
+                user_data = self.users.get(u_id)
+                # ممکن است در فاصله دسته‌ها گزارش داده یا حذف شده باشد
+                if user_data is None or day_key in user_data["daily_reports"]:
+                    continue
+                # join_date به وقت محلی سرور ذخیره شده است
+                if user_data["join_date"].astimezone(self.timezone).date() > day:
+                    continue
+                self.add_score(u_id, -10)
+                self.record_daily_report(u_id, day_key, {
+                    "type": "none",
+                    "score_change": -10,
+                    "date": datetime.now(),
+                    "completed_habits": []
+                })
+        logger.info(f"Daily check done for {day_key}: {len(pending)} users without report")
 
     def run(self):
         self.application.run_polling()
 
 if __name__ == "__main__":
+    # python pot.py benchmark-outbound: اندازه‌گیری گذردهی صف پیام با FakeBotTransport
+    if sys.argv[1:] == ["benchmark-outbound"]:
+        print(json.dumps(asyncio.run(benchmark_outbound_queue())))
+        sys.exit()
+
     bot = HabitTrackerBot(os.getenv("TELEGRAM_TOKEN"), os.getenv("GROUP_CHAT_ID"))
     while True:
         try:
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'companies',
     'matching',
     'notifications',
+    'files',
 ]
 
 MIDDLEWARE = [
@@ -67,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notifications.context_processors.unread_notifications',
             ],
         },
     },
@@ -86,6 +88,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# کش در حافظه هر پردازه نگهداری می‌شود و خواندن آن به پایگاه داده نمی‌رود.
+# بی‌اعتبارسازی‌های worker‌ها و دستورات به کش پردازه وب نمی‌رسند و شمارنده
+# نوتیفیکیشن‌های خوانده نشده حداکثر تا UNREAD_COUNT_TIMEOUT ثانیه قدیمی
+# می‌ماند. در استقرار با چند پردازه از کش مشترک استفاده کنید، مثلاً:
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#   'LOCATION': 'redis://127.0.0.1:6379',
+# و UNREAD_COUNT_TIMEOUT را بیشتر کنید.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pysib',
+    }
+}
+
+UNREAD_COUNT_TIMEOUT = 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -129,6 +151,32 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# File uploads and downloads
+# آپلودها تکه به تکه روی دیسک نوشته و checksum آن‌ها هم‌زمان محاسبه می‌شود
+FILE_UPLOAD_HANDLERS = ['files.uploads.ChecksumUploadHandler']
+# خارج از MEDIA_ROOT تا فایل‌های نیمه‌کاره هیچ‌وقت از MEDIA_URL سرو نشوند؛
+# روی همان دیسک MEDIA_ROOT بماند تا ذخیره نهایی فقط یک rename باشد
+FILE_UPLOAD_TEMP_DIR = BASE_DIR / 'uploads_tmp'
+# 'python'، 'x-accel' (nginx) یا 'x-sendfile' (Apache)
+FILE_DELIVERY = 'python'
+# location داخلی nginx که به MEDIA_ROOT اشاره می‌کند
+FILE_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# مدارک و فایل‌های دانشجویان و شرکت‌ها بر اساس محتوا و بدون تکرار ذخیره می‌شوند
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'documents': {
+        'BACKEND': 'files.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+# محتوای بدون ارجاع تا این مدت پس از آخرین آپلود نگه داشته می‌شود
+BLOB_GRACE_HOURS = 24
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -144,3 +192,10 @@ LOGOUT_REDIRECT_URL = '/'
 
 # Email settings (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Real-time notifications
+NOTIFICATION_BROKER = 'notifications.broker.InProcessBroker'
+
+# Notification retention
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_ARCHIVE_DIR = BASE_DIR / 'archive' / 'notifications'
@@ -7,6 +7,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initMatching();
     initForms();
     initAnimations();
+    initInfiniteScroll();
 });
 
 // Notification System
@@ -437,6 +438,44 @@ function performSearch() {
         });
 }
 
+// Infinite Scroll
+// Lists with data-next-url load the next page from the cursor API when
+// their end scrolls into view
+function initInfiniteScroll() {
+    if (!('IntersectionObserver' in window)) {
+        return;
+    }
+
+    document.querySelectorAll('[data-next-url]').forEach(list => {
+        const sentinel = document.createElement('div');
+        list.after(sentinel);
+
+        let loading = false;
+        const observer = new IntersectionObserver(entries => {
+            if (!entries[0].isIntersecting || loading) {
+                return;
+            }
+            loading = true;
+            fetch(list.dataset.nextUrl, {headers: {'Accept': 'application/json'}})
+                .then(response => response.json())
+                .then(data => {
+                    list.insertAdjacentHTML('beforeend', data.html);
+                    if (data.next_url) {
+                        list.dataset.nextUrl = data.next_url;
+                    } else {
+                        observer.disconnect();
+                        sentinel.remove();
+                    }
+                })
+                .catch(error => console.error('Error:', error))
+                .finally(() => {
+                    loading = false;
+                });
+        });
+        observer.observe(sentinel);
+    });
+}
+
 // Export functions for global use
 window.PYSIB = {
     showAlert,
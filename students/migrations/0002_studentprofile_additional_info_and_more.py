@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0005_fieldgroup_fieldofstudy'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='additional_info',
+            field=models.TextField(blank=True, null=True, verbose_name='اطلاعات اضافی'),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='national_id_document',
+            field=models.FileField(blank=True, null=True, upload_to='verification/national_id/', verbose_name='کارت ملی'),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='student_id_document',
+            field=models.FileField(blank=True, null=True, upload_to='verification/student_id/', verbose_name='کارت دانشجویی'),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='university_email',
+            field=models.EmailField(blank=True, max_length=254, null=True, verbose_name='ایمیل دانشگاهی'),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='verification_notes',
+            field=models.TextField(blank=True, null=True, verbose_name='یادداشت\u200cهای احراز هویت'),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='verification_status',
+            field=models.CharField(choices=[('not_submitted', 'ارسال نشده'), ('pending', 'در انتظار بررسی'), ('approved', 'تایید شده'), ('rejected', 'رد شده')], default='not_submitted', max_length=20, verbose_name='وضعیت احراز هویت'),
+        ),
+        migrations.AddField(
+            model_name='studentrequest',
+            name='canonical_field',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='matching.fieldofstudy', verbose_name='رشته تحصیلی نرمال شده'),
+        ),
+        migrations.AddField(
+            model_name='studentrequest',
+            name='field_group_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='گروه\u200cهای رشته تحصیلی'),
+        ),
+    ]
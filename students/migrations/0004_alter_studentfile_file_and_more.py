@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:21
+
+import files.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_studentfile_checksum'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentfile',
+            name='file',
+            field=models.FileField(storage=files.storage.document_storage, upload_to='student_files/', verbose_name='فایل'),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='national_id_document',
+            field=models.FileField(blank=True, null=True, storage=files.storage.document_storage, upload_to='verification/national_id/', verbose_name='کارت ملی'),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='student_id_document',
+            field=models.FileField(blank=True, null=True, storage=files.storage.document_storage, upload_to='verification/student_id/', verbose_name='کارت دانشجویی'),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='verification_document',
+            field=models.FileField(blank=True, null=True, storage=files.storage.document_storage, upload_to='verification_documents/', verbose_name='مدرک احراز هویت'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
+from files.storage import document_storage
+
 User = get_user_model()
 
 
@@ -61,6 +64,7 @@ class StudentProfile(models.Model):
     # فیلدهای احراز هویت
     student_id_document = models.FileField(
         upload_to='verification/student_id/',
+        storage=document_storage,
         null=True,
         blank=True,
         verbose_name='کارت دانشجویی'
@@ -68,6 +72,7 @@ class StudentProfile(models.Model):
     
     national_id_document = models.FileField(
         upload_to='verification/national_id/',
+        storage=document_storage,
         null=True,
         blank=True,
         verbose_name='کارت ملی'
@@ -105,11 +110,20 @@ class StudentProfile(models.Model):
     
     verification_document = models.FileField(
         upload_to='verification_documents/',
+        storage=document_storage,
         blank=True,
         null=True,
         verbose_name='مدرک احراز هویت'
     )
     
+    # فایل‌هایی از این رکورد که تصاویر کوچکشان ساخته شده است (files.derivatives)
+    derivative_sources = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name='فایل‌های دارای پیش‌نمایش'
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='تاریخ ایجاد'
@@ -187,6 +201,23 @@ class StudentRequest(models.Model):
         verbose_name='رشته تحصیلی'
     )
     
+    # رشته تحصیلی نرمال شده؛ هنگام ذخیره پر می‌شود
+    canonical_field = models.ForeignKey(
+        'matching.FieldOfStudy',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name='رشته تحصیلی نرمال شده'
+    )
+    
+    field_group_mask = models.BigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='گروه‌های رشته تحصیلی'
+    )
+    
     is_available_for_employment = models.BooleanField(
         default=True,
         verbose_name='قابل استخدام'
@@ -331,9 +362,17 @@ class StudentFile(models.Model):
     
     file = models.FileField(
         upload_to='student_files/',
+        storage=document_storage,
         verbose_name='فایل'
     )
     
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name='checksum (sha256)'
+    )
+    
     file_type = models.CharField(
         max_length=20,
         choices=FILE_TYPE_CHOICES,
@@ -362,3 +401,6 @@ class StudentFile(models.Model):
     
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.title}"
+    
+    def get_download_url(self):
+        return reverse('students:download_file', args=[self.pk])
@@ -1,3 +1,275 @@
-from django.test import TestCase
+import hashlib
+import importlib.util
+import io
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from companies.models import CompanyProfile, JobRequest
+from files import derivatives
+from files.derivatives import derivative, derivative_name, process_pending_tasks
+from files.models import Blob
+from files.references import collect_unreferenced
+from files.storage import document_storage
+from matching.models import Match
+
+from .models import StudentFile, StudentProfile, StudentRequest
+
+User = get_user_model()
+
+
+def use_temporary_media_root(test):
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root)
+    settings_override = override_settings(MEDIA_ROOT=media_root)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+
+class FileDownloadTests(TestCase):
+    """دسترسی به فایل‌های دانشجو و پاسخ‌های Range و X-Accel/X-Sendfile"""
+
+    CONTENT = b'0123456789'
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.student = User.objects.create_user('student', password='pass', user_type='student')
+        self.company = User.objects.create_user('company', password='pass', user_type='company')
+        CompanyProfile.objects.create(
+            user=self.company,
+            company_name='شرکت',
+            company_type='startup',
+            industry='فناوری',
+            company_size='1-10',
+        )
+        self.file = StudentFile.objects.create(
+            student=self.student,
+            file=SimpleUploadedFile('resume.txt', self.CONTENT),
+            checksum=hashlib.sha256(self.CONTENT).hexdigest(),
+            file_type='resume',
+            title='رزومه',
+        )
+        self.url = self.file.get_download_url()
+
+    def create_match(self, status):
+        job_request = JobRequest.objects.create(
+            company=self.company, title='برنامه‌نویس', job_type='internship', work_type='remote', description='توضیحات'
+        )
+        student_request = StudentRequest.objects.create(user=self.student, job_type='internship', work_type='remote')
+        return Match.objects.create(
+            student=self.student,
+            company=self.company,
+            job_request=job_request,
+            student_request=student_request,
+            match_score=0.8,
+            status=status,
+        )
+
+    def get(self, **headers):
+        self.client.force_login(self.student)
+        return self.client.get(self.url, headers=headers)
+
+    def test_owner_downloads_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+        self.assertEqual(response['ETag'], f'"{self.file.checksum}"')
+
+    def test_company_needs_a_match(self):
+        self.client.force_login(self.company)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        # پیشنهاد سیستم هنوز به شرکت نمایش داده نشده است
+        match = self.create_match('suggested')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        match.status = 'pending'
+        match.save()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        other = User.objects.create_user('other', password='pass', user_type='company')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_range(self):
+        response = self.get(Range='bytes=2-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(response['Content-Length'], '3')
+
+        # انتهای بیشتر از اندازه فایل کوتاه می‌شود
+        response = self.get(Range='bytes=7-100')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+
+    def test_suffix_range(self):
+        response = self.get(Range='bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+
+        response = self.get(Range='bytes=-100')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+
+    def test_multi_range_returns_whole_file(self):
+        response = self.get(Range='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=10-', 'bytes=5-2', 'bytes=-0'):
+            response = self.get(Range=header)
+            self.assertEqual(response.status_code, 416, header)
+            self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_if_range_mismatch_returns_whole_file(self):
+        response = self.get(Range='bytes=2-4', **{'If-Range': '"other"'})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get(Range='bytes=2-4', **{'If-Range': f'"{self.file.checksum}"'})
+        self.assertEqual(response.status_code, 206)
+
+    @override_settings(FILE_DELIVERY='x-accel', FILE_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_x_accel_redirect(self):
+        response = self.get(Range='bytes=2-4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.file.file.name}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'private')
+
+    @override_settings(FILE_DELIVERY='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sendfile'], self.file.file.path)
+        self.assertEqual(response.content, b'')
+
+
+class BlobReferenceTests(TestCase):
+    """محتوای تکراری یک بار ذخیره و فقط پس از حذف همه ارجاع‌ها پاک می‌شود"""
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.student = User.objects.create_user('student', password='pass', user_type='student')
+        self.storage = document_storage()
+
+    def upload(self, name, content):
+        return StudentFile.objects.create(
+            student=self.student,
+            file=SimpleUploadedFile(name, content),
+            file_type='resume',
+            title=name,
+        )
+
+    def test_identical_upload_is_deduplicated(self):
+        first = self.upload('resume.pdf', b'resume')
+        second = self.upload('resume-copy.PDF', b'resume')
+        self.assertEqual(first.file.name, second.file.name)
+
+        blob = Blob.objects.get()
+        self.assertEqual(blob.name, first.file.name)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(self.storage.blob_names(blob.checksum), [blob.name])
+
+    def test_blob_is_kept_while_referenced(self):
+        first = self.upload('resume.pdf', b'resume')
+        second = self.upload('resume.pdf', b'resume')
+        name = first.file.name
+
+        first.delete()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(collect_unreferenced(grace_hours=0), (0, 0))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StudentFile.objects.get().file.read(), b'resume')
+
+        second.delete()
+        self.assertEqual(Blob.objects.get().ref_count, 0)
+        # حذف رکورد به‌تنهایی محتوا را پاک نمی‌کند
+        self.assertTrue(self.storage.exists(name))
+
+    def test_collect_removes_only_unreferenced_blobs(self):
+        kept = self.upload('kept.pdf', b'kept')
+        removed = self.upload('removed.pdf', b'removed')
+        recent = self.upload('recent.pdf', b'recent')
+        removed.delete()
+        recent.delete()
+        Blob.objects.exclude(name=recent.file.name).update(last_uploaded_at=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(collect_unreferenced(grace_hours=1, dry_run=True), (1, len(b'removed')))
+        self.assertTrue(self.storage.exists(removed.file.name))
+
+        self.assertEqual(collect_unreferenced(grace_hours=1), (1, len(b'removed')))
+        self.assertFalse(self.storage.exists(removed.file.name))
+        # محتوای تازه آپلود شده در مهلت نگهداری باقی می‌ماند
+        self.assertTrue(self.storage.exists(recent.file.name))
+        self.assertTrue(self.storage.exists(kept.file.name))
+        self.assertEqual(
+            set(Blob.objects.values_list('name', flat=True)),
+            {kept.file.name, recent.file.name},
+        )
+
+
+class DocumentDerivativeTests(TestCase):
+    """پیش‌نمایش مدارک احراز هویت تصویری و PDF"""
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        user = User.objects.create_user('student', password='pass', user_type='student')
+        self.profile = StudentProfile.objects.create(
+            user=user, student_id='1234', university='دانشگاه', field_of_study='کامپیوتر', degree_level='bachelor'
+        )
+        # نتیجه بررسی نصب بودن PyMuPDF در پردازه کش می‌شود
+        derivatives._pymupdf.cache_clear()
+        self.addCleanup(derivatives._pymupdf.cache_clear)
+
+    def upload(self, name, content):
+        self.profile.student_id_document = SimpleUploadedFile(name, content)
+        self.profile.save()
+        process_pending_tasks()
+        self.profile.refresh_from_db()
+        return self.profile.student_id_document
+
+    def test_image_document(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1000), 'white').save(buffer, 'JPEG')
+        document = self.upload('card.jpg', buffer.getvalue())
+
+        self.assertEqual(self.profile.derivative_sources, [document.name])
+        for size, dimensions in (('thumb', (160, 80)), ('preview', (1024, 512))):
+            self.assertIsNotNone(derivative(document, size))
+            with default_storage.open(derivative_name(document.name, size, 'jpg')) as file:
+                self.assertEqual(Image.open(file).size, dimensions)
+        self.assertIsNone(derivative(document, 'avatar'))
+
+    def test_pdf_without_pymupdf_is_logged(self):
+        with mock.patch.dict(sys.modules, {'fitz': None}), self.assertLogs('files.derivatives', 'WARNING') as logs:
+            document = self.upload('card.pdf', b'%PDF-1.4')
+        self.assertIn('PyMuPDF', logs.output[0])
+        self.assertEqual(self.profile.derivative_sources, [])
+        self.assertIsNone(derivative(document, 'thumb'))
+        self.assertFalse(default_storage.exists(derivative_name(document.name, 'thumb', 'jpg')))
+
+    @skipUnless(importlib.util.find_spec('fitz'), 'PyMuPDF نصب نیست')
+    def test_pdf_first_page_is_rendered(self):
+        import fitz
+
+        with fitz.open() as pdf:
+            pdf.new_page(width=600, height=300)
+            content = pdf.tobytes()
+        document = self.upload('card.pdf', content)
+
+        self.assertEqual(self.profile.derivative_sources, [document.name])
+        with default_storage.open(derivative_name(document.name, 'thumb', 'jpg')) as file:
+            self.assertEqual(Image.open(file).size, (160, 80))
@@ -12,6 +12,7 @@ urlpatterns = [
     path("tests/<int:test_id>/take/", views.take_test, name="take_test"),
     path("files/", views.student_files, name="files"),
     path("files/upload/", views.upload_file, name="upload_file"),
+    path("files/<int:file_id>/download/", views.download_file, name="download_file"),
     path("verification/", views.student_verification, name="verification"),
     path("resume-builder/", views.resume_builder, name="resume_builder"),
 ]
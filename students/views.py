@@ -1,9 +1,13 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
 from .models import StudentProfile, StudentRequest, PersonalityTest, StudentTestResult, StudentFile
 from .forms import StudentProfileForm, StudentRequestForm, StudentFileForm
+from files.responses import send_file
+from files.uploads import file_checksum
+from matching.models import Match
 
 
 @login_required
@@ -142,6 +146,7 @@ def upload_file(request):
         if form.is_valid():
             file_obj = form.save(commit=False)
             file_obj.student = request.user
+            file_obj.checksum = file_checksum(form.cleaned_data['file'])
             file_obj.save()
             messages.success(request, 'فایل با موفقیت آپلود شد!')
             return redirect('students:files')
@@ -151,6 +156,19 @@ def upload_file(request):
     return render(request, 'students/upload_file.html', {'form': form})
 
 
+@login_required
+def download_file(request, file_id):
+    """دانلود فایل دانشجو برای خود دانشجو، شرکت‌های مچ شده با او و مدیران"""
+    file_obj = get_object_or_404(StudentFile, id=file_id)
+    if request.user != file_obj.student and not request.user.is_staff and not (
+        request.user.user_type == 'company'
+        # پیشنهادهای سیستم هنوز به شرکت نمایش داده نشده‌اند
+        and Match.objects.filter(student=file_obj.student, company=request.user).exclude(status='suggested').exists()
+    ):
+        raise PermissionDenied
+    return send_file(request, file_obj.file, checksum=file_obj.checksum)
+
+
 @login_required
 def student_verification(request):
     """احراز هویت دانشجویی"""
@@ -168,8 +186,8 @@ def student_verification(request):
             profile.save()
             
             # ارسال نوتیفیکیشن به ادمین
-            from notifications.models import Notification
-            Notification.objects.create(
+            from notifications.delivery import notify
+            notify(
                 user=request.user,
                 title='درخواست احراز هویت جدید',
                 message=f'درخواست احراز هویت از {request.user.get_full_name()} دریافت شد.',
@@ -0,0 +1,170 @@
+import asyncio
+import importlib.util
+import selectors
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# ربات به python-telegram-bot نیاز دارد؛ بدون آن (مثلاً در محیط Django) آزمون‌ها رد می‌شوند
+if importlib.util.find_spec("telegram"):
+    import pot
+else:
+    pot = None
+
+
+class FakeClock:
+    # زمان مجازی؛ حلقه asyncio به‌جای انتظار واقعی زمان را جلو می‌برد
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClockSelector(selectors.BaseSelector):
+    # select به‌جای مسدود شدن ساعت را تا اولین رویداد زمان‌بندی شده جلو می‌برد
+    def __init__(self, clock):
+        self.clock = clock
+        self.keys = {}
+
+    def register(self, fileobj, events, data=None):
+        key = selectors.SelectorKey(fileobj, selectors._fileobj_to_fd(fileobj), events, data)
+        self.keys[fileobj] = key
+        return key
+
+    def unregister(self, fileobj):
+        return self.keys.pop(fileobj)
+
+    def select(self, timeout=None):
+        if timeout:
+            self.clock.now += timeout
+        return []
+
+    def get_map(self):
+        return self.keys
+
+
+class FakeClockEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock):
+        super().__init__(FakeClockSelector(clock))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.now
+
+
+@unittest.skipIf(pot is None, "python-telegram-bot نصب نیست")
+class OutboundQueueTests(unittest.TestCase):
+    # صف پیام با FakeBotTransport و ساعت مجازی؛ FakeBotTransport برای عبور از
+    # محدودیت‌های تلگرام RetryAfter می‌دهد
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.loop = FakeClockEventLoop(self.clock)
+        self.addCleanup(self.loop.close)
+        patcher = mock.patch.object(pot, "time", SimpleNamespace(monotonic=self.clock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.transport = pot.FakeBotTransport(latency=0)
+        self.outbox = pot.OutboundQueue(self.transport)
+
+    def run_queue(self, enqueue):
+        async def main():
+            await self.outbox.start()
+            await enqueue()
+            await self.outbox.stop(timeout=3600)
+
+        self.loop.run_until_complete(main())
+        self.assertFalse(self.outbox.has_pending())
+        self.assertEqual(self.transport.flood_errors, 0)
+        self.assertEqual(self.outbox.failed_count, 0)
+
+    def sent_within(self, start, seconds, chat_id=None):
+        return [
+            t for t, c, _ in self.transport.sent
+            if start <= t < start + seconds and (chat_id is None or c == chat_id)
+        ]
+
+    def test_global_rate(self):
+        async def enqueue():
+            for i in range(200):
+                await self.outbox.send(i + 1, f"پیام {i}")
+
+        self.run_queue(enqueue)
+        self.assertEqual(self.outbox.sent_count, 200)
+        times = [t for t, _, _ in self.transport.sent]
+        for start in times:
+            self.assertLessEqual(len(self.sent_within(start, 1)), pot.GLOBAL_BURST + pot.GLOBAL_RATE)
+        # پس از burst با نرخ سراسری ارسال می‌شود
+        expected = (200 - pot.GLOBAL_BURST) / pot.GLOBAL_RATE
+        self.assertAlmostEqual(times[-1], expected, delta=0.5)
+
+    def test_chat_rate_and_order(self):
+        async def enqueue():
+            for i in range(10):
+                await self.outbox.send(1, f"اول {i}")
+                await self.outbox.send(2, f"دوم {i}")
+
+        self.run_queue(enqueue)
+        for chat_id, prefix in ((1, "اول"), (2, "دوم")):
+            sent = [(t, text) for t, c, text in self.transport.sent if c == chat_id]
+            self.assertEqual([text for _, text in sent], [f"{prefix} {i}" for i in range(10)])
+            for start, _ in sent:
+                self.assertLessEqual(len(self.sent_within(start, 1, chat_id)), pot.CHAT_BURST + pot.CHAT_RATE)
+            # پس از burst هر ثانیه یک پیام
+            self.assertAlmostEqual(sent[-1][0], (10 - pot.CHAT_BURST) / pot.CHAT_RATE, delta=0.1)
+
+    def test_busy_chat_does_not_block_others(self):
+        async def enqueue():
+            for i in range(10):
+                await self.outbox.send(1, f"پیام {i}")
+            await self.outbox.send(2, "پیام دیگر")
+
+        self.run_queue(enqueue)
+        other = [t for t, c, _ in self.transport.sent if c == 2]
+        self.assertLess(other[0], 1)
+
+    def test_group_limit(self):
+        async def enqueue():
+            for i in range(pot.GROUP_BURST + 3):
+                await self.outbox.send(-1, f"گروه {i}")
+
+        self.run_queue(enqueue)
+        times = [t for t, _, _ in self.transport.sent]
+        self.assertEqual(len(times), pot.GROUP_BURST + 3)
+        for start in times:
+            self.assertLessEqual(len(self.sent_within(start, 60)), pot.GROUP_BURST + pot.GROUP_RATE * 60)
+        self.assertAlmostEqual(times[-1], 3 / pot.GROUP_RATE, delta=0.1)
+
+    def test_send_digest_coalesces(self):
+        async def enqueue():
+            for i in range(40):
+                await self.outbox.send_digest(-1, f"گزارش {i}")
+                await asyncio.sleep(0.1)
+            await asyncio.sleep(pot.DIGEST_WINDOW)
+
+        self.run_queue(enqueue)
+        self.assertEqual(len(self.transport.sent), 1)
+        sent_at, chat_id, text = self.transport.sent[0]
+        self.assertEqual(chat_id, -1)
+        self.assertEqual(text, pot.DIGEST_SEPARATOR.join(f"گزارش {i}" for i in range(40)))
+        # پس از پایان پنجره ادغام ارسال شده است
+        self.assertAlmostEqual(sent_at, pot.DIGEST_WINDOW, delta=0.01)
+
+    def test_long_digest_is_split(self):
+        async def enqueue():
+            for i in range(3):
+                await self.outbox.send_digest(-1, "x" * 3000)
+
+        # stop خلاصه‌های در انتظار را بدون صبر برای پایان پنجره ارسال می‌کند
+        self.run_queue(enqueue)
+        self.assertLess(self.transport.sent[0][0], pot.DIGEST_WINDOW)
+        texts = [text for _, _, text in self.transport.sent]
+        self.assertGreater(len(texts), 1)
+        self.assertTrue(all(len(text) <= pot.MAX_MESSAGE_LENGTH for text in texts))
+        self.assertEqual("\n".join(texts).count("x"), 9000)
+
+
+if __name__ == "__main__":
+    unittest.main()